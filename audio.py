@@ -1,106 +1,905 @@
 import os
 import threading
-import pdfplumber
-import edge_tts
-import subprocess
-import asyncio
-from googletrans import Translator
-from moviepy.editor import AudioFileClip, concatenate_audioclips
+import time
+from contextlib import nullcontext
+from audio_cache import DEFAULT_MAX_BYTES, AudioCache
+from backends import BackendError, create_tts_backend, shared_translation_backend
+from chunker import TextChunker
+from incremental import BASE_NAME, BuildRecord
+from instrumentation import EventBus, JsonLinesLog, MetricsCollector, ProgressEstimator
+from language_id import LanguageFilter, split_translation
+from manifest import JobManifest, file_digest, text_digest
+from mp3_assembler import Mp3Assembler, Mp3FormatError
+from page_index import FETCH_PAGES, PageIndex
+from pdf_extract import MemoryGuard, count_pages, iter_extracted, iter_extracted_runs, iter_pages, page_fingerprints
+from pipeline import StreamingPipeline
+from playback import LEAD_CHUNK_LIMIT, ProgressivePlayer
+from rate_limit import CallScheduler, is_throttle
+from text_cleaner import PageCleaner
+from translation import BatchTranslator
+from translation_memory import TranslationMemory
+from tts_engine import SynthesisEngine
+
+# Ritmo aproximado de lectura de las voces neuronales, para estimar la duración del audio
+SPEECH_CHARS_PER_SECOND = 15
+
+
+class JobCancelled(Exception):
+    """El trabajo se canceló; lo ya sintetizado se conserva para reanudar."""
+
 
 class AudioBookCreator:
-    def __init__(self, pdf_file, output_dir, start_page=None, end_page=None, chunk_size=500, translate_to_spanish=False, target_language='es'):
+    def __init__(self, pdf_file, output_dir, start_page=None, end_page=None, chunk_size=None,
+                 translate_to_spanish=False, target_language='es', detect_language=True,
+                 tts_concurrency=None, extract_workers=None, low_memory=False, memory_limit_mb=None,
+                 clean_text=True, streaming=False, queue_size=8, voice=None, tts_settings=None,
+                 use_cache=True, cache_dir=None, cache_max_bytes=DEFAULT_MAX_BYTES,
+                 use_translation_memory=True, translation_db=None, use_page_index=True, page_index_db=None,
+                 translation_concurrency=None, translation_retries=3, tts_retries=4,
+                 resume=False, incremental=False, work_dir=None,
+                 progressive=False, playback_buffer=5.0, player_command=None,
+                 tts_backend="edge-tts", tts_options=None, translation_backend="googletrans",
+                 translation_options=None, postprocess=False, postprocess_options=None,
+                 event_log=None, metrics_file=None):
         self.pdf_file = pdf_file
         self.output_dir = output_dir
         self.start_page = start_page
         self.end_page = end_page
+        self.total_pages = None
         self.chunk_size = chunk_size
+        # Los backends se eligen por nombre (ver backends.py); el traductor solo se crea si se usa
+        self.tts_backend = create_tts_backend(tts_backend, tts_options)
+        self.translation_backend_name = translation_backend
+        self.translation_options = translation_options
+        self._translation_backend = None
+        # Sin chunk_size explícito se aprovecha todo lo que admite una petición del backend
+        self.chunker = (TextChunker(chunk_size) if chunk_size
+                        else TextChunker(self.tts_backend.limit, self.tts_backend.unit))
         self.translate_to_spanish = translate_to_spanish
         self.target_language = target_language
-        self.translator = Translator()
+        # Solo se envía al traductor lo que no está ya en el idioma de destino (ni es código o un enlace)
+        self.detect_language = detect_language
+        self.language_filter = LanguageFilter(target_language) if translate_to_spanish and detect_language else None
+        # Tope de chunks en vuelo por trabajo; por debajo, el límite adaptativo del backend decide
+        self.tts_concurrency = tts_concurrency or self.tts_backend.max_concurrency or self.tts_backend.concurrency
+        self.tts_retries = tts_retries
+        # Ritmo y concurrencia AIMD compartidos por todos los trabajos del backend; los reintentos son de cada trabajo
+        self.tts_calls = CallScheduler.for_backend(self.tts_backend)
+        self._translation_calls = None
+        self.translation_retried = 0
+        self.extract_workers = extract_workers
+        # Memoria acotada: página a página, sin juntar el texto del libro y con un techo de RSS opcional
+        self.low_memory = low_memory or memory_limit_mb is not None
+        # Quitar cabeceras, pies y números de página antes de traducir y sintetizar
+        self.clean_text = clean_text
+        self.cleaning_stats = None
+        self.memory_guard = (MemoryGuard(memory_limit_mb, on_throttle=self._memory_throttled)
+                             if memory_limit_mb else None)
+        # El modo progresivo reproduce mientras genera, así que va en streaming salvo en modo incremental,
+        # que necesita la lista completa de chunks antes de sintetizar
+        self.progressive = progressive
+        self.incremental = incremental
+        self.streaming = (streaming or progressive) and not incremental
+        self.playback_buffer = playback_buffer
+        self.player_command = player_command
+        self.queue_size = queue_size
+        self.voice = voice or self.tts_backend.default_voice
+        self.tts_settings = tts_settings or dict(self.tts_backend.default_settings)
+        # Los almacenes en disco se abren al usarlos por primera vez, y nunca si su función está desactivada
+        self.use_cache = use_cache
+        self.cache_dir = cache_dir
+        self.cache_max_bytes = cache_max_bytes
+        self._audio_cache = None
+        self.use_translation_memory = use_translation_memory and translate_to_spanish
+        self.translation_db = translation_db
+        self._translation_memory = None
+        # Texto ya extraído de cada página, para no volver a analizar el PDF al cambiar el rango
+        self.use_page_index = use_page_index
+        self.page_index_db = page_index_db
+        self._page_index = None
+        self._pdf_hash = None
+        # Huella de cada página del rango (modo incremental), para reutilizar el texto entre versiones del PDF
+        self._page_prints = None
+        # Secciones de la construcción incremental en curso: (hash, caracteres, [(índice, texto) de sus chunks de audio])
+        self._build_sections = None
+        # Índice de chunk → tramas del audio copiado de la versión anterior (se une sin volver a analizarlo)
+        self._reused_frames = {}
+        self.translation_concurrency = translation_concurrency or (
+            (self.translation_backend.max_concurrency or self.translation_backend.concurrency)
+            if translate_to_spanish else 1)
+        self.translation_retries = translation_retries
+        self.resume = resume
+        # Los chunks de cada trabajo viven junto a su salida, no en el directorio actual
+        self.work_dir = work_dir or os.path.join(output_dir, ".chunks")
+        self.manifest = None
+        # Cupos compartidos entre trabajos; los asigna el JobScheduler
+        self.tts_limiter = None
+        self.translation_limiter = None
+        self.assembler = None
+        self.player = None
+        self.progress_callback = None
+        # Lo activa `cancel()` desde otro hilo; las etapas lo consultan entre página y página o chunk y chunk
+        self.cancelled = threading.Event()
+        self.status = None
+        # Cada etapa emite eventos con duraciones y tamaños; el progreso y el ETA salen de ahí
+        self.events = EventBus()
+        self.metrics = MetricsCollector()
+        self.events.subscribe(self.metrics)
+        self.progress = ProgressEstimator(self._report_progress)
+        self.events.subscribe(self.progress)
+        self.event_log = event_log
+        self.metrics_file = metrics_file
+        # Recorte de silencios, volumen uniforme y fundidos con NumPy y pydub (opcional)
+        self.postprocessor = None
+        if postprocess:
+            try:
+                from postprocess import AudioPostProcessor
+            except ImportError as e:
+                raise ValueError(f"postprocess=True necesita NumPy y pydub ({e})") from None
+            self.postprocessor = AudioPostProcessor(**(postprocess_options or {}))
+
+    def set_progress_callback(self, callback):
+        """`callback(percent, eta_seconds)`; `eta_seconds` es None mientras no hay medidas."""
+        self.progress_callback = callback
+
+    def cancel(self):
+        """Pide que el trabajo se detenga lo antes posible (se puede llamar desde cualquier hilo)."""
+        self.cancelled.set()
+
+    def check_cancelled(self):
+        if self.cancelled.is_set():
+            raise JobCancelled(self.pdf_file)
+
+    def _report_progress(self, percent, eta):
+        if self.progress_callback:
+            self.progress_callback(percent, eta)
+
+    @property
+    def audio_cache(self):
+        if self._audio_cache is None and self.use_cache:
+            self._audio_cache = AudioCache(self.cache_dir, self.cache_max_bytes)
+        return self._audio_cache
+
+    @property
+    def translation_memory(self):
+        if self._translation_memory is None and self.use_translation_memory:
+            self._translation_memory = TranslationMemory(self.translation_db, backend=self.translation_backend_name)
+        return self._translation_memory
+
+    @property
+    def page_index(self):
+        if self._page_index is None and self.use_page_index:
+            self._page_index = PageIndex(self.page_index_db)
+        return self._page_index
+
+    @property
+    def pdf_hash(self):
+        if self._pdf_hash is None:
+            self._pdf_hash = self.page_index.digest(self.pdf_file) if self.page_index else file_digest(self.pdf_file)
+        return self._pdf_hash
+
+    def resolve_page_range(self):
+        """Ajusta start_page/end_page al PDF; el PDF solo se abre si su número de páginas no está indexado."""
+        if self.total_pages is None:
+            if self.page_index:
+                self.total_pages = self.page_index.page_count(self.pdf_hash)
+            if self.total_pages is None:
+                self.total_pages = count_pages(self.pdf_file)
+                if self.page_index:
+                    self.page_index.set_page_count(self.pdf_hash, self.total_pages)
+            print(f"El PDF '{self.pdf_file}' tiene {self.total_pages} páginas.")
+        if self.start_page is None:
+            self.start_page = 0
+        if self.end_page is None or self.end_page > self.total_pages:
+            self.end_page = self.total_pages
+
+    def _page_extracted(self, page, text, seconds, cached=False):
+        self.events.emit("page_extracted", page=page, chars=len(text), seconds=seconds, cached=cached)
+
+    def _memory_throttled(self, rss_mb, seconds):
+        self.events.emit("memory_throttle", rss_mb=rss_mb, seconds=seconds)
+
+    def _read_pages(self, runs):
+        """Genera (página, texto, segundos) de los tramos de páginas `runs` analizando el PDF."""
+        if not (self.low_memory or self.streaming):
+            # Un único pool de procesos extrae en paralelo todas las páginas que faltan
+            yield from iter_extracted_runs(self.pdf_file, runs, workers=self.extract_workers)
+            return
+        for start, end in runs:
+            pages = iter_pages(self.pdf_file, start, end, guard=self.memory_guard)
+            for page in range(start, end):
+                page_start = time.perf_counter()
+                text = next(pages)
+                yield page, text, time.perf_counter() - page_start
+
+    def iter_page_texts(self):
+        """Genera el texto de cada página del rango, en orden y sin cabeceras, pies ni repeticiones."""
+        pages = self._iter_indexed_pages()
+        if not self.clean_text:
+            yield from pages
+            return
+        cleaner = PageCleaner()
+        yield from cleaner.clean(pages)
+        self.cleaning_stats = cleaner.stats()
+        self.events.emit("text_cleaned", **self.cleaning_stats)
+
+    def _iter_indexed_pages(self):
+        """Genera el texto extraído de cada página del rango, en orden.
+
+        Primero se mira qué páginas del rango ya están en el índice; las que
+        faltan se extraen del PDF de una sola pasada (en paralelo si se puede)
+        y se añaden al índice. El texto indexado se lee por ventanas de
+        FETCH_PAGES páginas para no cargar el libro entero.
+        """
+        self.resolve_page_range()
+        indexed = (self.page_index.indexed_pages(self.pdf_hash, self.start_page, self.end_page)
+                   if self.page_index else set())
+        runs = []
+        for page in range(self.start_page, self.end_page):
+            if page in indexed:
+                continue
+            if runs and runs[-1][1] == page:
+                runs[-1][1] = page + 1
+            else:
+                runs.append([page, page + 1])
+        extracted = self._read_pages(runs)
+        try:
+            for window_start in range(self.start_page, self.end_page, FETCH_PAGES):
+                window_end = min(window_start + FETCH_PAGES, self.end_page)
+                texts = self.page_index.get_pages(self.pdf_hash, window_start, window_end) if self.page_index else {}
+                prints = []
+                for page in range(window_start, window_end):
+                    self.check_cancelled()
+                    if page in indexed:
+                        text = texts.pop(page)
+                        self._page_extracted(page, text, 0.0, cached=True)
+                    else:
+                        _, text, seconds = next(extracted)
+                        if self.page_index:
+                            self.page_index.put_page(self.pdf_hash, page, text)
+                        self._page_extracted(page, text, seconds)
+                    if self._page_prints:
+                        prints.append((self._page_prints[page - self.start_page], text))
+                    yield text
+                if prints:
+                    self.page_index.put_fingerprints(prints)
+        finally:
+            # Al cancelar (o si el consumidor se detiene) se descartan los lotes pendientes
+            extracted.close()
+
+    def _reuse_unchanged_pages(self):
+        """Modo incremental: las páginas cuya huella ya se conoce entran en el índice sin volver a extraerse."""
+        if not self.page_index:
+            return
+        self.resolve_page_range()
+        with self.events.timed("pages_fingerprinted", pages=self.end_page - self.start_page) as event:
+            try:
+                self._page_prints = list(page_fingerprints(self.pdf_file, self.start_page, self.end_page))
+            except Exception as e:
+                # Sin huellas se extrae todo, como en una construcción normal
+                print(f"No se pudieron calcular las huellas de las páginas: {e}")
+                event["error"] = f"{type(e).__name__}: {e}"
+                return
+            known = self.page_index.get_fingerprints(self._page_prints)
+            self.page_index.put_pages(self.pdf_hash, [(self.start_page + i, known[fingerprint])
+                                                      for i, fingerprint in enumerate(self._page_prints)
+                                                      if fingerprint in known])
+            event["known"] = sum(fingerprint in known for fingerprint in self._page_prints)
+
+    def _page_text(self, page):
+        """Texto de una sola página, del índice si ya se extrajo."""
+        if self.page_index:
+            indexed = self.page_index.get_pages(self.pdf_hash, page, page + 1)
+            if page in indexed:
+                return indexed[page]
+        text, _ = next(iter_extracted(self.pdf_file, page, page + 1, workers=1))
+        if self.page_index:
+            self.page_index.put_page(self.pdf_hash, page, text)
+        return text
+
+    def estimate(self, sample_pages=10):
+        """Estima caracteres, chunks, peticiones y minutos de audio sin sintetizar nada.
+
+        Lee `sample_pages` páginas repartidas por el rango (del índice si ya
+        están extraídas) y extrapola al rango completo; con `sample_pages=0`
+        lee todas y la estimación es exacta.
+        """
+        self.resolve_page_range()
+        total = self.end_page - self.start_page
+        if sample_pages and total > sample_pages:
+            step = total / sample_pages
+            pages = sorted({self.start_page + int(i * step) for i in range(sample_pages)})
+        else:
+            pages = list(range(self.start_page, self.end_page))
+        texts = [self._page_text(page) for page in pages]
+        if self.clean_text:
+            texts = list(PageCleaner().clean(texts))
+        sample_text = "".join(texts)
+        sample_chunks = len(self.split_text(sample_text)) if sample_text else 0
+        scale = total / len(pages) if pages else 0
+        chars = round(len(sample_text) * scale)
+        chunks = -(-sample_chunks * total // len(pages)) if pages else 0
+        return {
+            "pages": total,
+            "sampled_pages": len(pages),
+            "exact": len(pages) == total,
+            "chars": chars,
+            "chunks": chunks,
+            "tts_requests": chunks,
+            "translation_requests": chunks if self.translate_to_spanish else 0,
+            "audio_minutes": chars / SPEECH_CHARS_PER_SECOND / 60,
+        }
+
+    def extract_chunks(self, stable=False):
+        """Extrae y divide el texto página a página, sin juntar el libro entero en memoria.
+
+        Los chunks son los mismos que al dividir el texto completo (con
+        `split_stable` si `stable`).
+        """
+        try:
+            return list(self.split_pages(self.iter_page_texts(), stable))
+        except JobCancelled:
+            raise
+        except Exception as e:
+            print(f"Error extrayendo texto del PDF: {e}")
+            return None
 
     def extract_text_from_pdf(self):
         """Extrae el texto de un archivo PDF dentro del rango de páginas especificado."""
-        text = ""
         try:
-            with pdfplumber.open(self.pdf_file) as pdf:
-                total_pages = len(pdf.pages)
-                print(f"El PDF '{self.pdf_file}' tiene {total_pages} páginas.")
-
-                if self.start_page is None:
-                    self.start_page = 0
-                if self.end_page is None or self.end_page > total_pages:
-                    self.end_page = total_pages
-
-                for i in range(self.start_page, self.end_page):
-                    page_text = pdf.pages[i].extract_text()
-                    if page_text:
-                        text += page_text
-            return text
+            return "".join(self.iter_page_texts())
+        except JobCancelled:
+            raise
         except Exception as e:
             print(f"Error extrayendo texto del PDF: {e}")
             return None
 
     def split_text(self, text):
-        """Divide el texto en chunks de tamaño especificado."""
-        return [text[i:i+self.chunk_size] for i in range(0, len(text), self.chunk_size)]
+        """Divide el texto en chunks por frases, sin superar el límite del backend."""
+        return self.chunker.split(text)
+
+    def split_pages(self, pages, stable=False):
+        """Divide un flujo de páginas en chunks: los mismos que `split_text` con el texto unido."""
+        return self.chunker.split_pages(pages, stable)
 
     def translate_text(self, text):
-        """Traduce el texto al idioma de destino si la opción está habilitada."""
-        if self.translate_to_spanish:
+        """Traduce el texto al idioma de destino si la opción está habilitada, conservando los saltos de línea."""
+        if not self.translate_to_spanish:
+            return text
+        # Cada línea se trocea y se traduce por separado para no unir párrafos distintos
+        lines = [self.split_text(line) for line in text.split("\n")]
+        sections = iter(self.translate_sections([chunk for chunks in lines for chunk in chunks]))
+        return "\n".join(" ".join(" ".join(next(sections)) for _ in chunks) for chunks in lines)
+
+    @property
+    def translation_backend(self):
+        if self._translation_backend is None:
+            self._translation_backend = shared_translation_backend(
+                self.translation_backend_name, self.translation_options)
+        return self._translation_backend
+
+    @property
+    def translation_calls(self):
+        if self._translation_calls is None:
+            self._translation_calls = CallScheduler.for_backend(self.translation_backend)
+        return self._translation_calls
+
+    def _on_retry(self, backend, attempt, exc, delay):
+        self.events.emit("call_retry", backend=backend, attempt=attempt, delay=delay,
+                         throttled=is_throttle(exc), error=f"{type(exc).__name__}: {exc}")
+
+    def translate_chunks(self, chunks):
+        """Traduce los chunks en paralelo; un chunk que agota sus reintentos lanza TranslationError."""
+        if not self.translate_to_spanish:
+            return chunks
+        return [piece for pieces in self.translate_sections(chunks) for piece in pieces]
+
+    def translate_sections(self, chunks):
+        """Como `translate_chunks`, pero devuelve por separado los chunks de audio que salen de cada chunk."""
+        if not self.translate_to_spanish:
+            return [[chunk] for chunk in chunks]
+        # Cada chunk se reparte en tramos: unos se traducen (con su idioma de origen) y otros pasan tal cual
+        if self.language_filter:
+            plans = [self.language_filter.plan(chunk) for chunk in chunks]
+            requests = self.language_filter.group(plans)
+        else:
+            plans = [[(chunk, True, None)] for chunk in chunks]
+            requests = [(chunk, None, [(i, 0)]) for i, chunk in enumerate(chunks)]
+        pieces = [[text for text, _, _ in plan] for plan in plans]
+        retry = []
+        translated = self._translate_requests(requests, len(chunks), sum(len(c) for c in chunks))
+        for (text, source, members), result in zip(requests, translated):
+            parts = [result] if len(members) == 1 else split_translation(result, len(members))
+            if parts is None:
+                retry.extend((plans[c][i][0], source, [(c, i)]) for c, i in members)
+                continue
+            for (c, i), part in zip(members, parts):
+                pieces[c][i] = part
+        if retry:
+            # El traductor alteró los separadores de una petición agrupada: sus tramos se piden uno a uno
+            for (text, source, [(c, i)]), result in zip(retry, self._translate_requests(retry, 0, 0)):
+                pieces[c][i] = result
+        # El texto traducido puede ocupar más que el original: se vuelve a ajustar al límite
+        return [self.split_text("".join(chunk)) for chunk in pieces]
+
+    def _translate_requests(self, requests, chunks, chars):
+        """Envía las peticiones (texto, idioma de origen, miembros) en paralelo y devuelve las traducciones.
+
+        `chunks` y `chars` son lo que avanza la etapa de traducción con este lote,
+        incluidos los tramos que no hizo falta enviar.
+        """
+        texts = [text for text, _, _ in requests]
+        sources = {text: source for text, source, _ in requests}
+        # Los reintentos los hace el CallScheduler del backend, no el lote
+        translator = BatchTranslator(
+            lambda text: self._translate_segment(text, sources[text]),
+            self.target_language,
+            concurrency=self.translation_concurrency,
+            retries=0,
+            memory=self.translation_memory,
+        )
+        retried_before = self.translation_retried
+        with self.events.timed("translate_batch", chunks=chunks, chars=chars,
+                               sent_chars=sum(len(t) for t in texts)) as event:
             try:
-                translated = self.translator.translate(text, src='auto', dest=self.target_language)
-                return translated.text
-            except Exception as e:
-                print(f"Error traduciendo el texto: {e}")
-                return text
-        return text
+                return translator.run(texts)
+            finally:
+                event.update(requests=translator.requests, cached=translator.cached,
+                             retries=self.translation_retried - retried_before)
+
+    async def _translate_segment(self, text, source=None):
+        def on_retry(attempt, exc, delay):
+            self.translation_retried += 1
+            self._on_retry(self.translation_backend_name, attempt, exc, delay)
+
+        self.check_cancelled()
+
+        async def translate_once():
+            async with self.translation_limiter or nullcontext():
+                return await self.translation_backend.translate(text, self.target_language, source)
+        return await self.translation_calls.call(translate_once, on_retry, retries=self.translation_retries)
+
+    @property
+    def cache_voice(self):
+        # La misma voz en otro backend suena distinto: el backend forma parte de la clave
+        return f"{self.tts_backend.name}/{self.voice}"
 
     async def text_to_speech(self, text, output_file):
-        """Convierte texto a voz usando edge-tts."""
+        """Convierte texto a voz con el backend de TTS configurado."""
+        # Si se cancela, el motor de síntesis detiene también los chunks en curso
+        self.check_cancelled()
+        with self.events.timed("chunk_synthesized", chars=len(text), ok=False, cached=False) as event:
+            # Un chunk ya sintetizado con la misma voz y ajustes no vuelve a pedirse
+            if self.audio_cache and self.audio_cache.get(text, self.cache_voice, self.tts_settings, output_file):
+                event.update(ok=True, cached=True, bytes=os.path.getsize(output_file))
+                return
+            event["retries"] = 0
+
+            def on_retry(attempt, exc, delay):
+                event["retries"] += 1
+                self._on_retry(self.tts_backend.name, attempt, exc, delay)
+
+            async def synthesize_once():
+                async with self.tts_limiter or nullcontext():
+                    await self.tts_backend.synthesize(text, output_file, self.voice, self.tts_settings)
+                # Un archivo vacío rompería la unión: cuenta como fallo y se reintenta
+                if not os.path.exists(output_file) or os.path.getsize(output_file) == 0:
+                    raise BackendError("El backend devolvió un audio vacío")
+            try:
+                await self.tts_calls.call(synthesize_once, on_retry, retries=self.tts_retries)
+                event.update(ok=True, bytes=os.path.getsize(output_file))
+                if self.audio_cache:
+                    self.audio_cache.put(text, self.cache_voice, self.tts_settings, output_file)
+            except Exception as e:
+                # Tras agotar los reintentos el chunk queda pendiente (sin archivo a medias)
+                event["error"] = f"{type(e).__name__}: {e}"
+                print(f"Error convirtiendo texto a voz tras {event['retries']} reintentos: {e}")
+                try:
+                    os.remove(output_file)
+                except OSError:
+                    pass
+
+    def chunk_file(self, index):
+        return os.path.join(self.work_dir, f"temp_chunk_{index}.mp3")
+
+    def open_manifest(self):
+        """Abre el manifiesto del trabajo, o lo reanuda si `resume` y los parámetros coinciden."""
+        os.makedirs(self.work_dir, exist_ok=True)
+        params = {
+            "pdf_hash": self.pdf_hash,
+            "start_page": self.start_page,
+            "end_page": self.end_page,
+            "streaming": self.streaming,
+            "progressive": self.progressive,
+            "incremental": self.incremental,
+            **self.audio_params(),
+        }
+        self.manifest = JobManifest.open(self.output_dir, params, resume=self.resume)
+        return self.manifest
+
+    def audio_params(self):
+        """Lo que decide el audio de un mismo texto: si cambia, no se puede reutilizar el de otra ejecución."""
+        return {
+            "translate": self.translate_to_spanish,
+            "target_language": self.target_language,
+            "detect_language": self.detect_language,
+            "tts_backend": self.tts_backend.name,
+            "translation_backend": self.translation_backend_name,
+            "voice": self.voice,
+            "tts_settings": self.tts_settings,
+            "chunk_limit": [self.chunker.limit, self.chunker.unit],
+            "clean_text": self.clean_text,
+        }
+
+    def cleanup(self, audio_files):
+        """Borra chunks y manifiesto; solo se llama tras una unión correcta."""
+        for file in audio_files:
+            try:
+                os.remove(file)
+            except Exception as e:
+                print(f"Error eliminando {file}: {e}")
+        self.manifest.remove()
         try:
-            communicate = edge_tts.Communicate(text, "es-ES-AlvaroNeural")  # Cambia la voz si es necesario
-            await communicate.save(output_file)
-        except Exception as e:
-            print(f"Error convirtiendo texto a voz: {e}")
+            os.rmdir(self.work_dir)
+        except OSError:
+            pass
 
-    def create_audiobook(self):
-        text = self.extract_text_from_pdf()
-        if not text:
-            print(f"No se pudo extraer texto del PDF: {self.pdf_file}")
+    def _chunk_finished(self, index, chunk_file):
+        # El MP3 final crece en orden a medida que terminan los chunks
+        if self.assembler and self.manifest.is_done(index):
+            before = self.assembler.audio_bytes
+            with self.events.timed("merge_chunk", index=index) as event:
+                self.assembler.chunk_ready(index, chunk_file, self._reused_frames.get(index))
+                event["bytes"] = self.assembler.audio_bytes - before
+
+    def synthesize_chunks(self):
+        """Extrae, traduce y sintetiza el libro completo; devuelve los chunks de audio en orden."""
+        if self.low_memory:
+            chunks = self.extract_chunks()
+        else:
+            text = self.extract_text_from_pdf()
+            chunks = self.split_text(text) if text else None
+        if not chunks:
+            return None
+        self.events.emit("chunks_planned", chunks=len(chunks), chars=sum(len(c) for c in chunks))
+
+        # Traduce chunk a chunk si es necesario
+        if self.translate_to_spanish:
+            chunks = self.translate_chunks(chunks)
+            self.events.emit("chunks_planned", chunks=len(chunks), chars=sum(len(c) for c in chunks))
+        return self._synthesize_planned(chunks)
+
+    def synthesize_incremental(self):
+        """Como `synthesize_chunks`, pero reutilizando el audio de los chunks que no cambiaron.
+
+        El texto se corta con `split_stable` y cada chunk se busca por su hash
+        en la lista de la versión anterior. Solo los que no aparecen se
+        traducen y se sintetizan; el audio de los demás se copia del MP3
+        anterior antes de empezar a escribir el nuevo.
+        """
+        self._reuse_unchanged_pages()
+        if self.low_memory:
+            sources = self.extract_chunks(stable=True)
+        else:
+            text = self.extract_text_from_pdf()
+            sources = self.chunker.split_stable(text) if text else None
+        if not sources:
+            return None
+        self.events.emit("chunks_planned", chunks=len(sources), chars=sum(len(c) for c in sources))
+
+        record = BuildRecord.load(self.output_dir, self.audio_params())
+        previous = record.sections_by_hash() if record else {}
+        hashes = [text_digest(source) for source in sources]
+        changed = [source for source, digest in zip(sources, hashes) if digest not in previous]
+        reused_chars = sum(len(source) for source in sources) - sum(len(source) for source in changed)
+        if self.translate_to_spanish and reused_chars:
+            # Lo reutilizado cuenta como traducido para el progreso
+            self.events.emit("translate_batch", chunks=len(sources) - len(changed), chars=reused_chars,
+                             requests=0, reused=True, seconds=0.0)
+        translated = iter(self.translate_sections(changed) if changed else [])
+
+        chunks = []
+        reused = []
+        self._build_sections = []
+        for source, digest in zip(sources, hashes):
+            first = len(chunks)
+            if digest in previous:
+                pieces = previous[digest]
+                reused.extend(zip(range(first, first + len(pieces)), pieces))
+                chunks.extend(piece["text"] for piece in pieces)
+            else:
+                chunks.extend(next(translated))
+            self._build_sections.append((digest, len(source), [(i, chunks[i]) for i in range(first, len(chunks))]))
+        if record and record.frame_bytes:
+            self._reused_frames = {index: piece["frames"] for index, piece in reused}
+        if self.translate_to_spanish:
+            self.events.emit("chunks_planned", chunks=len(chunks), chars=sum(len(c) for c in chunks))
+        print(f"Modo incremental: {len(sources) - len(changed)} de {len(sources)} chunks sin cambios; "
+              f"se traducen y sintetizan {len(changed)} ({len(chunks) - len(reused)} chunks de audio)")
+        self.events.emit("incremental_plan", sections=len(sources), changed=len(changed),
+                         changed_chars=sum(len(source) for source in changed),
+                         reused_chunks=len(reused), chunks=len(chunks))
+        return self._synthesize_planned(
+            chunks, lambda manifest, chunk_files: self._copy_reused_audio(record, reused, manifest, chunk_files))
+
+    def _copy_reused_audio(self, record, reused, manifest, chunk_files):
+        """Copia del MP3 anterior el audio de los chunks reutilizados a sus archivos de chunk."""
+        if not reused:
             return
-        
-        # Traduce el texto si es necesario
-        text = self.translate_text(text)
-        
-        chunks = self.split_text(text)
-        audio_files = []
-        
-        for i, chunk in enumerate(chunks):
-            chunk_file = f"temp_chunk_{i}.mp3"
-            asyncio.run(self.text_to_speech(chunk, chunk_file))
-            audio_files.append(chunk_file)
-        
-        if not os.path.exists(self.output_dir):
-            os.makedirs(self.output_dir)
-
-        # Combinación de archivos de audio con MoviePy
+        with self.events.timed("audio_reused", chunks=len(reused), bytes=0) as event:
+            with open(record.base_file, "rb") as base:
+                for index, piece in reused:
+                    self.check_cancelled()
+                    if manifest.is_done(index):
+                        continue
+                    base.seek(piece["offset"])
+                    data = base.read(piece["bytes"])
+                    with open(chunk_files[index], "wb") as f:
+                        f.write(data)
+                    manifest.mark_done(index)
+                    event["bytes"] += len(data)
+
+    def _synthesize_planned(self, chunks, prepare=None):
+        """Sintetiza los chunks que falten y devuelve sus archivos en orden.
+
+        `prepare(manifest, chunk_files)` puede dejar chunks hechos antes de
+        sintetizar (el modo incremental copia ahí el audio reutilizado).
+        """
+        chunk_files = [self.chunk_file(i) for i in range(len(chunks))]
+
+        # Con `resume` no se regeneran los chunks que ya están en disco y coinciden
+        manifest = self.open_manifest()
+        manifest.set_chunks(chunks, chunk_files)
+        already_done = len(chunks) - len(manifest.pending())
+        if already_done:
+            print(f"Reanudando: {already_done} de {len(chunks)} chunks ya estaban sintetizados")
+        if prepare:
+            prepare(manifest, chunk_files)
+        pending = manifest.pending()
+        for i in range(len(chunks)):
+            self._chunk_finished(i, chunk_files[i])
+
+        pending_set = set(pending)
+        for i in range(len(chunks)):
+            if i not in pending_set:
+                # Lo ya sintetizado cuenta como hecho para el progreso
+                self.events.emit("chunk_synthesized", chars=len(chunks[i]), ok=True, resumed=True, seconds=0.0)
+
+        def on_chunk_done(index, chunk_file, completed, total):
+            manifest.mark_done(pending[index])
+            self._chunk_finished(pending[index], chunk_file)
+
+        # Un único event loop sintetiza varios chunks en paralelo
+        engine = SynthesisEngine(self.text_to_speech, concurrency=self.tts_concurrency)
         try:
-            clips = [AudioFileClip(file) for file in audio_files]
-            final_audio = concatenate_audioclips(clips)
-            output_file = os.path.join(self.output_dir, "audiolibro.mp3")
-            final_audio.write_audiofile(output_file)
-            print(f"Audiolibro guardado como {output_file}")
-        except Exception as e:
-            print(f"Error combinando archivos de audio: {e}")
+            engine.run([chunks[i] for i in pending], [chunk_files[i] for i in pending], on_chunk_done)
         finally:
-            # Limpieza de archivos temporales
-            for audio_file in audio_files:
-                try:
-                    os.remove(audio_file)
-                except Exception as e:
-                    print(f"Error eliminando archivo temporal {audio_file}: {e}")
+            manifest.save()
+        return chunk_files
+
+    def synthesize_streaming(self):
+        """Procesa el libro página a página con colas acotadas entre etapas."""
+        def on_chunk_done(index, chunk_file, completed, estimated_total):
+            self._chunk_finished(index, chunk_file)
+
+        lead_chunker = None
+        concurrency = self.tts_concurrency
+        if self.player:
+            # Los primeros minutos se parten en chunks pequeños y la síntesis se acelera
+            # cuando el búfer del reproductor se queda corto
+            lead_chunker = TextChunker(min(LEAD_CHUNK_LIMIT, self.chunker.limit), self.chunker.unit)
+            concurrency = self.player.concurrency
+        pipeline = StreamingPipeline(self, queue_size=self.queue_size, manifest=self.open_manifest(),
+                                     lead_chunker=lead_chunker)
+        audio_files = pipeline.run(concurrency, on_chunk_done)
+        if pipeline.first_chunk_seconds is not None:
+            print(f"Primer chunk sintetizado en {pipeline.first_chunk_seconds:.1f}s")
+        return audio_files
+
+    def concat_with_ffmpeg(self, audio_files, output_file):
+        """Une los chunks con ffmpeg; solo se usa si la unión en proceso no es posible."""
+        import subprocess
+        list_file = os.path.join(self.work_dir, "file_list.txt")
+        with open(list_file, "w") as f:
+            for file in audio_files:
+                f.write(f"file '{os.path.abspath(file)}'\n")
+        command = [
+            "ffmpeg",
+            "-f", "concat",
+            "-safe", "0",
+            "-i", list_file,
+            "-c", "copy",
+            output_file,
+            "-y"
+        ]
+        try:
+            subprocess.run(command, check=True)
+            return True
+        except (subprocess.CalledProcessError, FileNotFoundError) as e:
+            print(f"Error al concatenar audios: {e}")
+            return False
+        finally:
+            os.remove(list_file)
+
+    def create_audiobook(self):
+        """Genera el audiolibro y devuelve su ruta, o None si el trabajo no se completó."""
+        log = JsonLinesLog(self.event_log) if self.event_log else None
+        unsubscribe = self.events.subscribe(log) if log else None
+        start = self.events.clock()
+        output_file = None
+        status = "failed"
+        try:
+            self.resolve_page_range()
+            self.events.emit("job_start", pdf_file=self.pdf_file, pages=self.end_page - self.start_page,
+                             streaming=self.streaming, translate=self.translate_to_spanish,
+                             concurrency={"synthesize": self.tts_concurrency})
+            output_file = self._create_audiobook()
+            status = "done" if output_file else ("cancelled" if self.cancelled.is_set() else "incomplete")
+            return output_file
+        except Exception:
+            if not self.cancelled.is_set():
+                raise
+            # Cualquier error tras cancelar (p. ej. un lote de traducción a medias) es consecuencia de la cancelación
+            status = "cancelled"
+            print(f"Trabajo cancelado: {self.pdf_file}; vuelve a ejecutar con resume=True para continuar")
+            return None
+        finally:
+            self.status = status
+            if self.manifest and status != "done":
+                self.manifest.set_state(status)
+            self.events.emit("job_end", status=status, output_file=output_file,
+                             seconds=self.events.clock() - start)
+            self.print_stage_summary()
+            if self.metrics_file:
+                self.metrics.dump(self.metrics_file)
+            if log:
+                unsubscribe()
+                log.close()
+
+    def print_stage_summary(self):
+        stages = self.metrics.summary()["stages"]
+        if not stages:
+            return
+        names = {"extract": "extracción", "translate": "traducción", "synthesize": "síntesis", "merge": "unión"}
+        parts = [f"{names[stage]} {metrics['load_seconds']:.1f}s" for stage, metrics in stages.items()]
+        print(f"Carga por etapa: {', '.join(parts)} (cuello de botella: {names[self.metrics.bottleneck()]})")
+
+    def _create_audiobook(self):
+        output_file = os.path.join(self.output_dir, "audiolibro.mp3")
+        if self.incremental:
+            # El audio reutilizado se lee de la versión anterior: la nueva se escribe aparte y la sustituye al final
+            raw_file = os.path.join(self.work_dir, "audiolibro.mp3")
+        elif self.postprocessor:
+            # La unión directa (la que oye el reproductor) queda de respaldo en el directorio de trabajo
+            raw_file = os.path.join(self.work_dir, "sin_procesar.mp3")
+        else:
+            raw_file = output_file
+        self.assembler = Mp3Assembler(raw_file)
+        if self.progressive:
+            self.player = ProgressivePlayer(self.player_command, start_buffer=self.playback_buffer,
+                                            base_concurrency=max(1, self.tts_concurrency // 2),
+                                            max_concurrency=self.tts_concurrency)
+            self.assembler.on_audio = self.player.feed
+        try:
+            if self.incremental:
+                audio_files = self.synthesize_incremental()
+            else:
+                audio_files = self.synthesize_streaming() if self.streaming else self.synthesize_chunks()
+        except BaseException:
+            self.assembler.abort()
+            if self.player:
+                self.player.abort()
+            raise
+        if self.player:
+            # Lo ya generado se sigue reproduciendo aunque el trabajo quede incompleto
+            self.player.finish()
+            if self.player.first_audio_seconds is not None:
+                print(f"Primer audio en {self.player.first_audio_seconds:.1f}s "
+                      f"({self.player.underruns} cortes por falta de búfer)")
+        if self._audio_cache:
+            stats = self._audio_cache.stats()
+            print(f"Caché de audio: {stats['hits']} aciertos, {stats['misses']} fallos")
+        if self._translation_memory:
+            stats = self._translation_memory.stats()
+            print(f"Memoria de traducción: {stats['hits']} segmentos reutilizados, "
+                  f"{stats['hit_ratio']:.0%} de los caracteres")
+        if self.language_filter and self.language_filter.chunks:
+            stats = self.language_filter.stats()
+            skipped = stats["skipped_chars_by_reason"]
+            print(f"Detección de idioma: {stats['chars_skipped']} caracteres sin traducir "
+                  f"({stats['skipped_ratio']:.1%}): ya en '{self.target_language}' {skipped.get('target', 0)}, "
+                  f"código {skipped.get('code', 0)}, enlaces {skipped.get('url', 0)}; "
+                  f"{stats['requests']} tramos enviados frente a {stats['chunks']} chunks")
+        if self.cleaning_stats:
+            stats = self.cleaning_stats
+            removed = stats["removed_by_reason"]
+            print(f"Limpieza de texto: {stats['chars_removed']} caracteres eliminados "
+                  f"({stats['chars_removed'] / max(1, stats['chars_in']):.1%}): "
+                  f"cabeceras y pies {removed.get('header_footer', 0)}, "
+                  f"números de página {removed.get('page_number', 0)}, "
+                  f"repeticiones {removed.get('repeated_block', 0) + removed.get('duplicate_line', 0)}")
+        if self._page_index:
+            stats = self._page_index.stats()
+            print(f"Índice de páginas: {stats['hits']} páginas reutilizadas, {stats['misses']} extraídas del PDF")
+        if self.memory_guard and self.memory_guard.throttles:
+            print(f"Extracción frenada {self.memory_guard.throttles} veces "
+                  f"({self.memory_guard.throttled_seconds:.1f}s) por el techo de {self.memory_guard.limit_mb} MB")
+        if not audio_files:
+            self.assembler.abort()
+            print(f"No se pudo extraer texto del PDF: {self.pdf_file}")
+            return None
+        missing = self.manifest.pending()
+        if missing:
+            # Los chunks se conservan para poder reanudar
+            self.assembler.abort()
+            print(f"{len(missing)} chunks no se pudieron sintetizar; "
+                  f"vuelve a ejecutar con resume=True para completarlos")
+            return None
+
+        with self.events.timed("merge_done", chunks=len(audio_files)) as event:
+            try:
+                self.assembler.close()
+                event["bytes"] = os.path.getsize(raw_file)
+            except (Mp3FormatError, OSError) as e:
+                print(f"No se pudo unir el audio en proceso ({e}); se recurre a ffmpeg")
+                event["fallback"] = "ffmpeg"
+                if not self.concat_with_ffmpeg(audio_files, raw_file):
+                    return None
+        base_file = output_file
+        if self.postprocessor and self.postprocess(audio_files, raw_file, output_file):
+            if self.incremental:
+                base_file = os.path.join(self.output_dir, BASE_NAME)
+                os.replace(raw_file, base_file)
+            else:
+                os.remove(raw_file)
+        elif raw_file != output_file:
+            os.replace(raw_file, output_file)
+        if self.incremental:
+            self.save_build_record(base_file, chunks_merged=not event.get("fallback"))
+        print(f"Audiolibro guardado como {output_file}")
+
+        self.cleanup(audio_files)
+        return output_file
+
+    def postprocess(self, audio_files, raw_file, output_file):
+        """Escribe `output_file` posprocesando los chunks; devuelve False si falla (se usará `raw_file`)."""
+        with self.events.timed("postprocess", chunks=len(audio_files)) as event:
+            try:
+                stats = self.postprocessor.run(audio_files, output_file)
+            except Exception as e:
+                print(f"No se pudo posprocesar el audio ({type(e).__name__}: {e}); se guarda sin procesar")
+                event["error"] = f"{type(e).__name__}: {e}"
+                return False
+            raw_bytes = os.path.getsize(raw_file)
+            event.update({key: value for key, value in stats.items() if key != "seconds"},
+                         bytes=os.path.getsize(output_file), raw_bytes=raw_bytes)
+        print(f"Posprocesado: {stats['trimmed_seconds']:.0f}s de silencio recortados "
+              f"({stats['input_seconds'] / 60:.1f} → {stats['output_seconds'] / 60:.1f} min), "
+              f"ganancia entre {stats['gain_db_min']:+.1f} y {stats['gain_db_max']:+.1f} dB, "
+              f"{stats['audio_seconds_per_second']:.0f} s de audio por segundo; "
+              f"{raw_bytes / 1e6:.1f} → {event['bytes'] / 1e6:.1f} MB")
+        return True
+
+    def save_build_record(self, base_file, chunks_merged=True):
+        """Guarda la lista de chunks de esta versión para la próxima reconstrucción incremental."""
+        # Si la unión la hizo ffmpeg no se sabe dónde quedó cada chunk: la próxima vez se construye entero
+        if not chunks_merged or not self._build_sections:
+            BuildRecord.remove(self.output_dir)
+            return
+        spans = self.assembler.spans
+        sections = [(digest, chars, [(text, *spans[i]) for i, text in pieces])
+                    for digest, chars, pieces in self._build_sections]
+        if base_file != os.path.join(self.output_dir, BASE_NAME):
+            # Esta vez no hubo posprocesado: la base de la versión anterior ya no sirve
+            try:
+                os.remove(os.path.join(self.output_dir, BASE_NAME))
+            except FileNotFoundError:
+                pass
+        BuildRecord.save(self.output_dir, self.audio_params(), base_file, sections,
+                         frame_bytes=self.assembler.frame_length)
 
     def play_audiobook(self):
+        import subprocess
         try:
             output_file = os.path.join(self.output_dir, "audiolibro.mp3")
             # Usar mpv para reproducir el archivo
@@ -108,37 +907,17 @@ class AudioBookCreator:
         except Exception as e:
             print(f"Error reproduciendo el audiolibro: {e}")
 
-def process_client(pdf_file, output_dir, start_page=None, end_page=None, translate_to_spanish=False):
-    audiobook_creator = AudioBookCreator(pdf_file, output_dir, start_page, end_page, translate_to_spanish=translate_to_spanish)
+def process_client(pdf_file, output_dir, start_page=None, end_page=None, translate_to_spanish=False, resume=True, progressive=False):
+    audiobook_creator = AudioBookCreator(pdf_file, output_dir, start_page, end_page, translate_to_spanish=translate_to_spanish, resume=resume, progressive=progressive)
     audiobook_creator.create_audiobook()
-    audiobook_creator.play_audiobook()
+    if audiobook_creator.player:
+        # Ya se está reproduciendo desde el primer chunk
+        audiobook_creator.player.wait()
+    else:
+        audiobook_creator.play_audiobook()
 
 if __name__ == "__main__":
-    # Configuración de los clientes (con idioma de destino)
-    clients = [
-        {
-            "pdf_file": "GraphQLAttack.pdf",
-            "output_dir": "Libro1_Audiolibro",
-            "start_page": 9,
-            "end_page": 200,
-            "translate_to_spanish": True,
-            "target_language": "es"  # Español (por defecto)
-        },
-        {
-            "pdf_file": "libroRuso.pdf",
-            "output_dir": "Libro2_Audiolibro",
-            "start_page": 1,
-            "end_page": None,
-            "translate_to_spanish": False,
-            "target_language": "en"  # Inglés (ejemplo)
-        },
-    ]
-
-    threads = []
-    for client in clients:
-        thread = threading.Thread(target=process_client, args=(client["pdf_file"], client["output_dir"], client["start_page"], client["end_page"], client["translate_to_spanish"]))
-        threads.append(thread)
-        thread.start()
-
-    for thread in threads:
-        thread.join()
+    # Los libros se indican por línea de comandos o en un manifiesto (ver cli.py y libros.example.yaml)
+    import sys
+    from cli import main
+    sys.exit(main())
@@ -0,0 +1,141 @@
+import hashlib
+import json
+import os
+import shutil
+import tempfile
+import threading
+import unicodedata
+
+DEFAULT_CACHE_DIR = os.path.join(os.path.expanduser("~"), ".cache", "audiolibros", "tts")
+DEFAULT_MAX_BYTES = 2 * 1024 ** 3  # 2 GiB
+
+
+def normalize_text(text):
+    """Normaliza el texto para que cambios de espaciado no invaliden la caché."""
+    return " ".join(unicodedata.normalize("NFC", text).split())
+
+
+class AudioCache:
+    """Caché en disco de audio sintetizado, direccionada por contenido y con expulsión LRU.
+
+    Cada entrada se guarda como `<dir>/<xx>/<sha256>.mp3`. Las escrituras son
+    atómicas (archivo temporal + `os.replace`), así que varios procesos pueden
+    compartir el mismo directorio. La fecha de modificación hace de marca LRU.
+    """
+
+    def __init__(self, cache_dir=None, max_bytes=DEFAULT_MAX_BYTES):
+        self.cache_dir = cache_dir or DEFAULT_CACHE_DIR
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._lock = threading.Lock()
+        self._approx_bytes = None  # tamaño estimado; se recalcula al expulsar
+        os.makedirs(self.cache_dir, exist_ok=True)
+
+    @staticmethod
+    def make_key(text, voice, settings=None):
+        payload = json.dumps(
+            {"text": normalize_text(text), "voice": voice, "settings": settings or {}},
+            sort_keys=True, ensure_ascii=False,
+        )
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    def _path(self, key):
+        return os.path.join(self.cache_dir, key[:2], f"{key}.mp3")
+
+    def get(self, text, voice, settings, output_file):
+        """Copia el audio cacheado a `output_file`. Devuelve True si había entrada."""
+        path = self._path(self.make_key(text, voice, settings))
+        try:
+            _atomic_copy(path, output_file)
+            os.utime(path)  # marca de uso reciente para el LRU
+        except FileNotFoundError:
+            with self._lock:
+                self.misses += 1
+            return False
+        with self._lock:
+            self.hits += 1
+        return True
+
+    def put(self, text, voice, settings, source_file):
+        """Guarda `source_file` en la caché si es un audio no vacío."""
+        try:
+            size = os.path.getsize(source_file)
+        except OSError:
+            return
+        if size == 0:
+            return
+        path = self._path(self.make_key(text, voice, settings))
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        _atomic_copy(source_file, path)
+
+        # Solo se recorre el directorio cuando la estimación supera el límite
+        with self._lock:
+            if self._approx_bytes is None:
+                self._approx_bytes = self.size()
+            else:
+                self._approx_bytes += size
+            over_limit = self.max_bytes is not None and self._approx_bytes > self.max_bytes
+        if over_limit:
+            self.evict()
+
+    def size(self):
+        return sum(size for _, size, _ in self._entries())
+
+    def _entries(self):
+        for root, _, files in os.walk(self.cache_dir):
+            for name in files:
+                if not name.endswith(".mp3"):
+                    continue
+                path = os.path.join(root, name)
+                try:
+                    st = os.stat(path)
+                except FileNotFoundError:
+                    continue  # otro proceso la expulsó
+                yield path, st.st_size, st.st_mtime
+
+    def evict(self):
+        """Elimina las entradas usadas hace más tiempo hasta quedar bajo `max_bytes`."""
+        if self.max_bytes is None:
+            return
+        entries = list(self._entries())
+        total = sum(size for _, size, _ in entries)
+        if total <= self.max_bytes:
+            with self._lock:
+                self._approx_bytes = total
+            return
+        entries.sort(key=lambda entry: entry[2])
+        for path, size, _ in entries:
+            if total <= self.max_bytes:
+                break
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+            total -= size
+            with self._lock:
+                self.evictions += 1
+        with self._lock:
+            self._approx_bytes = total
+
+    def stats(self):
+        with self._lock:
+            return {"hits": self.hits, "misses": self.misses, "evictions": self.evictions}
+
+
+def _atomic_copy(source, destination):
+    """Copia `source` a `destination` sin que nadie vea nunca un archivo a medias."""
+    directory = os.path.dirname(os.path.abspath(destination))
+    with open(source, "rb") as src:
+        fd, tmp_path = tempfile.mkstemp(dir=directory, suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as tmp:
+                shutil.copyfileobj(src, tmp)
+            os.replace(tmp_path, destination)
+        except BaseException:
+            try:
+                os.remove(tmp_path)
+            except FileNotFoundError:
+                pass
+            raise
@@ -0,0 +1,314 @@
+import asyncio
+import hashlib
+import os
+import random
+import re
+import shutil
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from chunker import BACKEND_LIMITS
+from tts_engine import DEFAULT_TTS_SETTINGS, DEFAULT_VOICE
+
+# Trama MPEG-2 Layer III (24 kHz, 48 kbps, mono) sin datos de audio: suena como silencio
+SILENT_FRAME = bytes([0xFF, 0xF3, 0x64, 0xC4]) + bytes(140)
+SILENT_FRAME_SECONDS = 576 / 24000
+
+TTS_BACKENDS = {}
+TRANSLATION_BACKENDS = {}
+
+# Traductores ya creados, reutilizados entre trabajos (crear el cliente HTTP es caro)
+_SHARED_TRANSLATION_BACKENDS = {}
+_SHARED_LOCK = threading.Lock()
+
+
+class BackendError(Exception):
+    """El backend no está disponible o la petición falló."""
+
+
+class ThrottledError(BackendError):
+    """El servicio rechaza la petición por exceso de carga (HTTP 429)."""
+
+    status = 429
+
+
+def register_tts_backend(cls):
+    TTS_BACKENDS[cls.name] = cls
+    return cls
+
+
+def register_translation_backend(cls):
+    TRANSLATION_BACKENDS[cls.name] = cls
+    return cls
+
+
+def _create(registry, kind, name, options):
+    try:
+        cls = registry[name]
+    except KeyError:
+        raise ValueError(f"Backend de {kind} desconocido: {name} "
+                         f"(disponibles: {', '.join(sorted(registry))})") from None
+    return cls(**(options or {}))
+
+
+def create_tts_backend(name, options=None):
+    return _create(TTS_BACKENDS, "TTS", name, options)
+
+
+def create_translation_backend(name, options=None):
+    return _create(TRANSLATION_BACKENDS, "traducción", name, options)
+
+
+def shared_translation_backend(name, options=None):
+    """Como `create_translation_backend`, pero devuelve la misma instancia para el mismo nombre y opciones."""
+    key = (name, tuple(sorted((options or {}).items())))
+    with _SHARED_LOCK:
+        backend = _SHARED_TRANSLATION_BACKENDS.get(key)
+        if backend is None:
+            backend = _SHARED_TRANSLATION_BACKENDS[key] = create_translation_backend(name, options)
+        return backend
+
+
+class Backend:
+    """Interfaz común de los backends.
+
+    Cada backend declara el tamaño máximo de una petición (`limit` en `unit`,
+    como en `TextChunker`), cuántas peticiones admite a la vez sin que el
+    servicio empiece a rechazarlas (`concurrency`), hasta dónde puede subir
+    el límite adaptativo (`max_concurrency`), el ritmo máximo en llamadas por
+    segundo (`rate_limit`, None si no hay) y el timeout de cada llamada.
+    """
+
+    name = None
+    concurrency = 1
+    max_concurrency = None
+    rate_limit = None
+    burst = None
+    timeout = None
+
+    @property
+    def limit(self):
+        return BACKEND_LIMITS[self.name]["limit"]
+
+    @property
+    def unit(self):
+        return BACKEND_LIMITS[self.name]["unit"]
+
+
+class TTSBackend(Backend):
+    default_voice = None
+    default_settings = DEFAULT_TTS_SETTINGS
+
+    async def synthesize(self, text, output_file, voice, settings):
+        """Escribe en `output_file` el MP3 de `text`; lanza una excepción si falla."""
+        raise NotImplementedError
+
+
+class TranslationBackend(Backend):
+    async def translate(self, text, target, source=None):
+        """Devuelve `text` traducido al idioma `target`; lanza una excepción si falla.
+
+        `source` es el idioma del texto si ya se conoce; con None lo detecta el servicio.
+        """
+        raise NotImplementedError
+
+
+class _SimulatedFailures:
+    """Fallos reproducibles: dependen de la semilla, del texto y del número de intento.
+
+    Con `capacity`, las llamadas que superan ese número de peticiones
+    simultáneas fallan con ThrottledError, como un servicio saturado.
+    """
+
+    def __init__(self, failure_rate, seed, capacity=None):
+        self.failure_rate = failure_rate
+        self.seed = seed
+        self.capacity = capacity
+        self.calls = 0
+        self.throttled = 0
+        self.in_flight = 0
+        self._attempts = {}
+        self._lock = threading.Lock()
+
+    def enter(self):
+        with self._lock:
+            self.in_flight += 1
+            if self.capacity and self.in_flight > self.capacity:
+                self.in_flight -= 1
+                self.throttled += 1
+                raise ThrottledError(f"429 Too Many Requests ({self.capacity} peticiones simultáneas como máximo)")
+
+    def leave(self):
+        with self._lock:
+            self.in_flight -= 1
+
+    def check(self, text):
+        key = hashlib.sha256(text.encode("utf-8")).hexdigest()
+        with self._lock:
+            self.calls += 1
+            attempt = self._attempts.get(key, 0)
+            self._attempts[key] = attempt + 1
+        if self.failure_rate and random.Random(f"{self.seed}:{key}:{attempt}").random() < self.failure_rate:
+            raise BackendError(f"Fallo simulado (intento {attempt + 1})")
+
+
+# --- TTS -------------------------------------------------------------------
+
+
+@register_tts_backend
+class EdgeTTSBackend(TTSBackend):
+    name = "edge-tts"
+    concurrency = 8
+    max_concurrency = 24
+    rate_limit = 20
+    timeout = 60
+    default_voice = DEFAULT_VOICE
+
+    async def synthesize(self, text, output_file, voice, settings):
+        import edge_tts
+        communicate = edge_tts.Communicate(text, voice, **settings)
+        await communicate.save(output_file)
+
+
+def _percent(value):
+    match = re.fullmatch(r"([+-]?\d+)%", value or "")
+    return int(match.group(1)) if match else 0
+
+
+@register_tts_backend
+class EspeakBackend(TTSBackend):
+    """Síntesis local con espeak-ng (sin red); el WAV se codifica a MP3 con lame o ffmpeg."""
+
+    name = "espeak-ng"
+    default_voice = "es"
+
+    def __init__(self, espeak=None, encoder=None, bitrate="48k"):
+        self.espeak = espeak or shutil.which("espeak-ng") or shutil.which("espeak")
+        self.encoder = encoder or shutil.which("lame") or shutil.which("ffmpeg")
+        self.bitrate = bitrate
+        # Es local y limitado por CPU: un proceso por núcleo
+        self.concurrency = os.cpu_count() or 1
+
+    def _espeak_command(self, voice, settings):
+        # Los ajustes usan el formato de edge-tts ("+10%", "+5Hz")
+        speed = round(175 * (1 + _percent(settings.get("rate")) / 100))
+        amplitude = round(100 * (1 + _percent(settings.get("volume")) / 100))
+        pitch_hz = re.fullmatch(r"([+-]?\d+)Hz", settings.get("pitch") or "")
+        pitch = 50 + (int(pitch_hz.group(1)) // 2 if pitch_hz else 0)
+        return [self.espeak, "--stdin", "--stdout", "-v", voice,
+                "-s", str(max(80, speed)), "-a", str(max(0, min(200, amplitude))),
+                "-p", str(max(0, min(99, pitch)))]
+
+    def _encoder_command(self, output_file):
+        if self.encoder.endswith("lame"):
+            return [self.encoder, "--quiet", "-b", self.bitrate.rstrip("k"), "-", output_file]
+        return [self.encoder, "-loglevel", "error", "-y", "-f", "wav", "-i", "-",
+                "-codec:a", "libmp3lame", "-b:a", self.bitrate, output_file]
+
+    async def _run(self, command, data):
+        process = await asyncio.create_subprocess_exec(
+            *command, stdin=asyncio.subprocess.PIPE,
+            stdout=asyncio.subprocess.PIPE, stderr=asyncio.subprocess.PIPE)
+        out, err = await process.communicate(data)
+        if process.returncode != 0:
+            raise BackendError(f"{command[0]} terminó con código {process.returncode}: "
+                               f"{err.decode(errors='replace').strip()}")
+        return out
+
+    async def synthesize(self, text, output_file, voice, settings):
+        if not self.espeak:
+            raise BackendError("No se encontró espeak-ng en el PATH")
+        if not self.encoder:
+            raise BackendError("Se necesita lame o ffmpeg para codificar a MP3")
+        wav = await self._run(self._espeak_command(voice, settings), text.encode("utf-8"))
+        await self._run(self._encoder_command(output_file), wav)
+
+
+@register_tts_backend
+class FakeTTSBackend(TTSBackend):
+    """Backend determinista sin red para pruebas y benchmarks.
+
+    Escribe tramas MP3 silenciosas con la duración que tendría el texto leído
+    (`chars_per_second`), tras esperar `latency` + `per_char` por carácter.
+    Falla con probabilidad `failure_rate`, siempre igual para la misma semilla.
+    """
+
+    name = "fake"
+    concurrency = 16
+    max_concurrency = 32
+    default_voice = "fake"
+
+    def __init__(self, latency=0.0, per_char=0.0, failure_rate=0.0, seed=0, chars_per_second=15,
+                 capacity=None):
+        self.latency = latency
+        self.per_char = per_char
+        self.chars_per_second = chars_per_second
+        self.failures = _SimulatedFailures(failure_rate, seed, capacity)
+
+    @property
+    def calls(self):
+        return self.failures.calls
+
+    async def synthesize(self, text, output_file, voice, settings):
+        self.failures.enter()
+        try:
+            await asyncio.sleep(self.latency + self.per_char * len(text))
+        finally:
+            self.failures.leave()
+        self.failures.check(text)
+        frames = max(1, round(len(text) / self.chars_per_second / SILENT_FRAME_SECONDS))
+        with open(output_file, "wb") as f:
+            f.write(SILENT_FRAME * frames)
+
+
+# --- Traducción --------------------------------------------------------------
+
+
+@register_translation_backend
+class GoogleTranslateBackend(TranslationBackend):
+    name = "googletrans"
+    concurrency = 4
+    max_concurrency = 8
+    rate_limit = 5
+    timeout = 30
+
+    def __init__(self):
+        from googletrans import Translator
+        self.translator = Translator()
+        self._executor = None
+
+    async def translate(self, text, target, source=None):
+        # googletrans es síncrono: cada petición ocupa un hilo propio del backend. El límite
+        # adaptativo puede subir hasta max_concurrency, así que el pool se dimensiona para eso
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(max_workers=self.max_concurrency)
+        loop = asyncio.get_running_loop()
+        result = await loop.run_in_executor(
+            self._executor, lambda: self.translator.translate(text, src=source or 'auto', dest=target))
+        return result.text
+
+
+@register_translation_backend
+class FakeTranslationBackend(TranslationBackend):
+    """Traductor determinista sin red: devuelve el texto tal cual tras `latency` segundos."""
+
+    name = "fake"
+    concurrency = 16
+    max_concurrency = 32
+
+    def __init__(self, latency=0.0, failure_rate=0.0, seed=0, capacity=None):
+        self.latency = latency
+        self.failures = _SimulatedFailures(failure_rate, seed, capacity)
+
+    @property
+    def calls(self):
+        return self.failures.calls
+
+    async def translate(self, text, target, source=None):
+        self.failures.enter()
+        try:
+            await asyncio.sleep(self.latency)
+        finally:
+            self.failures.leave()
+        self.failures.check(text)
+        return text
@@ -0,0 +1,1330 @@
+"""Benchmarks locales del pipeline de audiolibros (sin acceso a red).
+
+Uso:
+    python benchmark.py tts --chunks 200 --delay 0.05 --concurrency 1 4 16
+    python benchmark.py extract --pages 400 --workers 1 2 4
+    python benchmark.py streaming --pages 100 400
+    python benchmark.py cache --pages 20
+    python benchmark.py translation --chunks 200 --concurrency 1 4 16
+    python benchmark.py chunking --megabytes 5
+    python benchmark.py jobs --books 4 --workers 1 2 4
+    python benchmark.py merge --chunks 500
+    python benchmark.py progressive --pages 20 100
+    python benchmark.py ratelimit --chunks 200 --capacity 6
+    python benchmark.py startup --budget-ms 50
+    python benchmark.py memory --pages 2000 --budget-mb 200
+    python benchmark.py pageindex --pages 200
+    python benchmark.py cleaning --pages 100
+    python benchmark.py incremental --pages 100 --edits 1 4 16
+    python benchmark.py service --books 6 --workers 1 2 4
+    python benchmark.py e2e --pages 100 --output actual.json --baseline base.json
+
+Todos los subcomandos aceptan `--output archivo.json` para guardar los resultados.
+"""
+import argparse
+import asyncio
+import json
+import platform
+import os
+import resource
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from backends import SILENT_FRAME, create_translation_backend, create_tts_backend
+from chunker import TextChunker
+from mp3_assembler import Mp3Assembler, iter_frames
+from pdf_extract import iter_extracted
+from rate_limit import CallScheduler
+from scheduler import JobScheduler
+from startup import HEAVY_MODULES
+from translation import BatchTranslator
+from translation_memory import TranslationMemory
+from tts_engine import SynthesisEngine
+
+LOREM = ("Lorem ipsum dolor sit amet, consectetur adipiscing elit, sed do eiusmod "
+         "tempor incididunt ut labore et dolore magna aliqua. Ut enim ad minim veniam.")
+
+
+def bench_tts(chunks=200, delay=0.05, concurrency_levels=(1, 4, 16)):
+    """Mide el tiempo de la etapa de audio para distintos niveles de concurrencia."""
+    texts = [f"chunk {i} " * 50 for i in range(chunks)]
+    results = []
+    with tempfile.TemporaryDirectory() as tmp:
+        files = [os.path.join(tmp, f"temp_chunk_{i}.mp3") for i in range(chunks)]
+        for concurrency in concurrency_levels:
+            backend = create_tts_backend("fake", {"latency": delay})
+            engine = SynthesisEngine(
+                lambda text, output_file: backend.synthesize(text, output_file, backend.default_voice, None),
+                concurrency=concurrency)
+            start = time.perf_counter()
+            engine.run(texts, files)
+            elapsed = time.perf_counter() - start
+            speedup = (results[0]["seconds"] / elapsed) if results else 1.0
+            results.append({"concurrency": concurrency, "seconds": elapsed, "speedup": speedup})
+            print(f"concurrencia={concurrency:>3}  {elapsed:7.3f}s  "
+                  f"{chunks / elapsed:8.1f} chunks/s  aceleración x{speedup:.1f}")
+    return results
+
+
+def make_pdf(path, pages=300, lines_per_page=40, line_chars=70, columns=1, running_headers=False, page_lines=None):
+    """Genera un PDF de texto sintético sin dependencias externas.
+
+    `line_chars` y `columns` controlan la maquetación: líneas más largas dan
+    más texto por página y varias columnas obligan al extractor a ordenar
+    bloques lado a lado. Con `running_headers` cada página lleva cabecera de
+    capítulo y número de página al pie, como un libro real. `page_lines`
+    (una lista de líneas por página) sustituye al texto sintético.
+    """
+    objects = []
+
+    def add(body):
+        objects.append(body)
+        return len(objects)
+
+    font_id = add(b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>")
+    pages_id = add(None)  # se rellena cuando se conocen las páginas
+    page_ids = []
+    filler = LOREM * (line_chars // len(LOREM) + 1)
+    column_width = 515 // columns
+    if page_lines is not None:
+        pages, columns = len(page_lines), 1
+    for p in range(pages):
+        ops = []
+        for c in range(columns):
+            column = f" columna {c + 1}" if columns > 1 else ""
+            lines = page_lines[p] if page_lines is not None else [
+                f"Pagina {p + 1}{column} linea {n + 1}. {filler[:line_chars]}" for n in range(lines_per_page)]
+            ops.append(f"BT /F1 9 Tf 11 TL {40 + c * column_width} 800 Td")
+            ops += [f"({line}) Tj T*" for line in lines]
+            ops.append("ET")
+        if running_headers:
+            header = f"Capitulo {p // 20 + 1} - Libro de prueba {p + 1}"
+            ops.append(f"BT /F1 8 Tf 40 825 Td ({header}) Tj ET")
+            ops.append(f"BT /F1 8 Tf 290 20 Td ({p + 1}) Tj ET")
+        stream = "\n".join(ops).encode("latin-1")
+        content_id = add(b"<< /Length %d >>\nstream\n%s\nendstream" % (len(stream), stream))
+        page_ids.append(add(
+            b"<< /Type /Page /Parent %d 0 R /MediaBox [0 0 595 842] "
+            b"/Resources << /Font << /F1 %d 0 R >> >> /Contents %d 0 R >>"
+            % (pages_id, font_id, content_id)))
+    kids = b" ".join(b"%d 0 R" % i for i in page_ids)
+    objects[pages_id - 1] = b"<< /Type /Pages /Kids [%s] /Count %d >>" % (kids, len(page_ids))
+    catalog_id = add(b"<< /Type /Catalog /Pages %d 0 R >>" % pages_id)
+
+    with open(path, "wb") as f:
+        f.write(b"%PDF-1.4\n")
+        offsets = []
+        for number, body in enumerate(objects, start=1):
+            offsets.append(f.tell())
+            f.write(b"%d 0 obj\n%s\nendobj\n" % (number, body))
+        xref = f.tell()
+        f.write(b"xref\n0 %d\n0000000000 65535 f \n" % (len(objects) + 1))
+        for offset in offsets:
+            f.write(b"%010d 00000 n \n" % offset)
+        f.write(b"trailer\n<< /Size %d /Root %d 0 R >>\nstartxref\n%d\n%%%%EOF\n"
+                % (len(objects) + 1, catalog_id, xref))
+    return path
+
+
+BOOK_WORDS = ("el la de que y en un ser se no haber por con su para como estar tener le lo todo pero "
+              "más hacer o poder decir este ir otro ese si me ya ver porque dar cuando él muy sin vez "
+              "mucho saber qué sobre mi alguno mismo yo también hasta año dos querer entre así").split()
+
+
+def _book_sentence(rng):
+    words = [rng.choice(BOOK_WORDS) for _ in range(rng.randint(6, 24))]
+    return " ".join(words).capitalize() + "."
+
+
+def _book_pages(pages, sentences_per_page=14, seed=0):
+    """Frases de un libro sintético, página a página (distintas entre sí, como en un libro real)."""
+    import random
+    rng = random.Random(seed)
+    return [[_book_sentence(rng) for _ in range(sentences_per_page)] for _ in range(pages)]
+
+
+def _wrap_lines(sentences, width=90):
+    """Reparte las frases de una página en líneas de como mucho `width` caracteres."""
+    lines = [""]
+    for word in " ".join(sentences).split():
+        if lines[-1] and len(lines[-1]) + 1 + len(word) > width:
+            lines.append("")
+        lines[-1] = f"{lines[-1]} {word}" if lines[-1] else word
+    return lines
+
+
+def bench_extract(pages=400, workers_levels=(1, 2, 4)):
+    """Mide páginas/s de la extracción serie frente a la de varios procesos."""
+    results = []
+    with tempfile.TemporaryDirectory() as tmp:
+        pdf_file = make_pdf(os.path.join(tmp, "bench.pdf"), pages)
+        for workers in workers_levels:
+            start = time.perf_counter()
+            texts = [text for text, _ in iter_extracted(pdf_file, 0, pages, workers=workers)]
+            elapsed = time.perf_counter() - start
+            assert len(texts) == pages and texts[-1].startswith(f"Pagina {pages} ")
+            speedup = (results[0]["seconds"] / elapsed) if results else 1.0
+            results.append({"workers": workers, "seconds": elapsed, "speedup": speedup})
+            print(f"workers={workers:>3}  {elapsed:7.3f}s  "
+                  f"{pages / elapsed:8.1f} páginas/s  aceleración x{speedup:.1f}")
+    return results
+
+
+def _fake_creator(pdf_file, output_dir, tts_latency=0.0, per_char=0.0, **options):
+    """AudioBookCreator con los backends falsos y sin cachés compartidas: se mide el camino real del pipeline."""
+    from audio import AudioBookCreator
+    for option in ("use_cache", "use_translation_memory", "use_page_index"):
+        options.setdefault(option, False)
+    return AudioBookCreator(pdf_file, output_dir, tts_backend="fake",
+                            tts_options={"latency": tts_latency, "per_char": per_char},
+                            translation_backend="fake", **options)
+
+
+def _first_event_seconds(creator, name):
+    """Segundos desde ahora hasta el primer evento `name` del creador (se rellena al ejecutarlo)."""
+    start = time.perf_counter()
+    seen = {}
+
+    def on_event(event):
+        if event["event"] == name and "seconds" not in seen:
+            seen["seconds"] = time.perf_counter() - start
+    creator.events.subscribe(on_event)
+    return seen
+
+
+def _run_streaming(pdf_file, delay, concurrency):
+    """Se ejecuta en un proceso nuevo para que el pico de RSS sea el de este libro."""
+    with tempfile.TemporaryDirectory() as output_dir:
+        creator = _fake_creator(pdf_file, output_dir, delay, streaming=True, tts_concurrency=concurrency)
+        first_chunk = _first_event_seconds(creator, "chunk_synthesized")
+        start = time.perf_counter()
+        output_file = creator.create_audiobook()
+        elapsed = time.perf_counter() - start
+        assert output_file, "el libro no se completó"
+    peak_kb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return {"chunks": len(creator.manifest.chunks), "seconds": elapsed,
+            "first_chunk_seconds": first_chunk.get("seconds"), "peak_rss_mb": peak_kb / 1024}
+
+
+def bench_streaming(page_counts=(100, 400), delay=0.01, concurrency=8):
+    """Tiempo hasta el primer chunk y pico de RSS del modo streaming según el tamaño del libro."""
+    results = []
+    with tempfile.TemporaryDirectory() as tmp:
+        for pages in page_counts:
+            pdf_file = make_pdf(os.path.join(tmp, f"bench_{pages}.pdf"), pages)
+            with ProcessPoolExecutor(max_workers=1) as executor:
+                result = executor.submit(_run_streaming, pdf_file, delay, concurrency).result()
+            result["pages"] = pages
+            results.append(result)
+            print(f"páginas={pages:>5}  total {result['seconds']:7.2f}s  "
+                  f"primer chunk {result['first_chunk_seconds']:.3f}s  "
+                  f"pico RSS {result['peak_rss_mb']:.1f} MB")
+    return results
+
+
+def bench_cache(pages=20, delay=0.02, concurrency=8):
+    """Crea el mismo libro dos veces con la caché de audio: la segunda no debe llamar al TTS."""
+    results = []
+    with tempfile.TemporaryDirectory() as tmp:
+        pdf_file = make_pdf(os.path.join(tmp, "bench.pdf"), pages)
+        cache_dir = os.path.join(tmp, "cache")
+        for label in ("frío", "caliente"):
+            # Cada ejecución abre su propia AudioCache: las estadísticas son solo de esa ejecución
+            creator = _fake_creator(pdf_file, os.path.join(tmp, label), delay, tts_concurrency=concurrency,
+                                    use_cache=True, cache_dir=cache_dir)
+            start = time.perf_counter()
+            output_file = creator.create_audiobook()
+            elapsed = time.perf_counter() - start
+            assert output_file, "el libro no se completó"
+            calls = creator.tts_backend.calls
+            stats = creator.audio_cache.stats()
+            results.append({"run": label, "seconds": elapsed, "tts_calls": calls,
+                            "chunks": len(creator.manifest.chunks), **stats})
+            print(f"{label:>8}  {elapsed:7.3f}s  llamadas TTS={calls:>4}  "
+                  f"aciertos={stats['hits']:>4}  fallos={stats['misses']:>4}")
+    assert results[-1]["tts_calls"] == 0, f"la ejecución en caliente hizo {results[-1]['tts_calls']} llamadas TTS"
+    return results
+
+
+def bench_translation(chunks=200, delay=0.02, concurrency_levels=(1, 4, 16)):
+    """Traducción por chunks según la concurrencia, y repetición con la memoria de traducción."""
+    texts = [f"Chunk {i}. {LOREM}" for i in range(chunks)]
+    results = []
+    with tempfile.TemporaryDirectory() as tmp:
+        for concurrency in concurrency_levels:
+            backend = create_translation_backend("fake", {"latency": delay})
+            batch = BatchTranslator(lambda text: backend.translate(text, "es"), "es", concurrency=concurrency)
+            start = time.perf_counter()
+            batch.run(texts)
+            elapsed = time.perf_counter() - start
+            speedup = (results[0]["seconds"] / elapsed) if results else 1.0
+            results.append({"concurrency": concurrency, "seconds": elapsed, "speedup": speedup})
+            print(f"concurrencia={concurrency:>3}  {elapsed:7.3f}s  aceleración x{speedup:.1f}")
+
+        for label in ("primera", "repetida"):
+            memory = TranslationMemory(os.path.join(tmp, "tm.sqlite3"))
+            backend = create_translation_backend("fake", {"latency": delay})
+            start = time.perf_counter()
+            BatchTranslator(lambda text: backend.translate(text, "es"), "es",
+                            concurrency=concurrency_levels[-1], memory=memory).run(texts)
+            elapsed = time.perf_counter() - start
+            stats = memory.stats()
+            memory.close()
+            results.append({"run": label, "seconds": elapsed, "calls": backend.calls, **stats})
+            print(f"{label:>8}  {elapsed:7.3f}s  llamadas={backend.calls:>4}  "
+                  f"desde memoria {stats['hit_ratio']:.0%} de los caracteres")
+    return results
+
+
+def _speech_like_wav(path, seconds, level_db, rng, rate=24000):
+    """WAV con ráfagas de ruido a modo de sílabas, silencio en los bordes y el nivel indicado."""
+    import wave
+    import numpy as np
+    lead, trail = rng.uniform(0.3, 0.8), rng.uniform(0.4, 1.0)
+    parts = [np.zeros(int(lead * rate), dtype=np.float32)]
+    spoken = 0.0
+    while spoken < seconds:
+        syllable = rng.uniform(0.08, 0.25)
+        n = int(syllable * rate)
+        envelope = np.sin(np.linspace(0, np.pi, n, dtype=np.float32))
+        parts.append(rng.standard_normal(n).astype(np.float32) * envelope * 0.3)
+        gap = rng.choice([0.03, 0.08, 0.35])
+        parts.append(np.zeros(int(gap * rate), dtype=np.float32))
+        spoken += syllable + gap
+    parts.append(np.zeros(int(trail * rate), dtype=np.float32))
+    samples = np.concatenate(parts)
+    samples *= 10 ** ((level_db + 10) / 20)
+    samples += rng.standard_normal(len(samples)).astype(np.float32) * 10 ** (-65 / 20)
+    with wave.open(path, "wb") as f:
+        f.setnchannels(1)
+        f.setsampwidth(2)
+        f.setframerate(rate)
+        f.writeframes((np.clip(samples, -1, 1) * 32767).astype("<i2").tobytes())
+
+
+def bench_postprocess(chunks=40, chunk_seconds=20.0, workers_levels=(1, 2), memory_scale=4):
+    """Posprocesado con NumPy: segundos de audio por segundo, duración y tamaño ahorrados y memoria."""
+    import tracemalloc
+    import numpy as np
+    from postprocess import AudioPostProcessor, speech_level_db
+    rng = np.random.default_rng(0)
+    results = {"runs": []}
+    with tempfile.TemporaryDirectory() as tmp:
+        files = []
+        for i in range(chunks * memory_scale):
+            path = os.path.join(tmp, f"chunk_{i}.wav")
+            _speech_like_wav(path, chunk_seconds, rng.uniform(-32, -12), rng)
+            files.append(path)
+        book = files[:chunks]
+        input_bytes = sum(os.path.getsize(f) for f in book)
+        processor = AudioPostProcessor()
+        before = [speech_level_db(processor.decode(f), processor.sample_rate) for f in book]
+        after = [speech_level_db(processor.process(processor.decode(f))[0], processor.sample_rate) for f in book]
+        results["level_spread_db"] = {"before": float(np.std(before)), "after": float(np.std(after))}
+        print(f"dispersión del nivel de voz entre chunks: {np.std(before):.1f} dB → {np.std(after):.1f} dB")
+        for workers in workers_levels:
+            output = os.path.join(tmp, f"libro_{workers}.wav")
+            stats = AudioPostProcessor(decode_workers=workers).run(book, output)
+            result = {"decode_workers": workers, **stats, "input_bytes": input_bytes,
+                      "output_bytes": os.path.getsize(output)}
+            results["runs"].append(result)
+            print(f"workers={workers}  {stats['input_seconds']:7.0f}s de audio en {stats['seconds']:6.2f}s  "
+                  f"{stats['audio_seconds_per_second']:7.0f} s/s  duración -{stats['trimmed_seconds'] / stats['input_seconds']:.1%}  "
+                  f"tamaño {input_bytes / 1e6:.1f} → {result['output_bytes'] / 1e6:.1f} MB")
+        # La memoria no debe crecer con la longitud del libro
+        results["memory"] = []
+        for count in (chunks, chunks * memory_scale):
+            tracemalloc.start()
+            AudioPostProcessor().run(files[:count], os.path.join(tmp, "memoria.wav"))
+            peak = tracemalloc.get_traced_memory()[1]
+            tracemalloc.stop()
+            results["memory"].append({"chunks": count, "audio_minutes": count * chunk_seconds / 60,
+                                      "peak_mb": peak / 1e6})
+            print(f"{count:>5} chunks (~{count * chunk_seconds / 60:.0f} min)  pico de memoria {peak / 1e6:6.1f} MB")
+    return results
+
+
+# Párrafos de un libro técnico mezclado: prosa en varios idiomas, código y enlaces
+MIXED_PARAGRAPHS = {
+    "es": ["La función devuelve una lista con todas las líneas del archivo y se puede recorrer con un bucle.",
+           "En este capítulo vamos a ver cómo se organiza el código de un proyecto cuando crece.",
+           "Como se ve en el ejemplo, no hace falta cerrar el archivo a mano porque lo hace el bloque."],
+    "en": ["The following example shows how to open a file and read all the lines that it contains.",
+           "As the author said in the first edition, there is no better way to learn than to write programs.",
+           "This is the simplest way to do it, but it will not work when the file is too large for memory."],
+    "fr": ["Cette méthode renvoie la liste des lignes du fichier et elle ne modifie pas son contenu.",
+           "Comme on le voit dans cet exemple, il faut toujours fermer le fichier après la lecture."],
+    "code": ["def read(path):\n    with open(path) as f:\n        return f.readlines()",
+             "for (int i = 0; i < n; i++) {\n    total += values[i];\n}"],
+    "url": ["https://docs.python.org/3/library/functions.html#open",
+            "www.example.com/manual/capitulo-3"],
+}
+
+
+def _mixed_chunks(chunks, paragraphs_per_chunk, weights, sections=True, seed=0):
+    """Chunks de párrafos etiquetados con su tipo.
+
+    Con `sections` cada chunk tiene un idioma principal (como un capítulo con
+    citas, código y enlaces); sin él los idiomas se intercalan párrafo a
+    párrafo, el peor caso para agrupar peticiones.
+    """
+    import random
+    rng = random.Random(seed)
+    languages = [k for k in weights if k not in ("code", "url")]
+    result = []
+    for _ in range(chunks):
+        main = rng.choices(languages, [weights[k] for k in languages])[0]
+        paragraphs = []
+        for _ in range(paragraphs_per_chunk):
+            kind = rng.choices(list(weights), [weights[k] for k in weights])[0]
+            if sections and kind in languages and rng.random() < 0.8:
+                kind = main
+            paragraphs.append((kind, rng.choice(MIXED_PARAGRAPHS[kind])))
+        result.append(paragraphs)
+    return result
+
+
+def bench_language(chunks=200, paragraphs_per_chunk=6, latency=0.002):
+    """Tráfico de traducción de un libro técnico mezclado con y sin la detección de idioma por tramo."""
+    from audio import AudioBookCreator
+    from language_id import detect
+    weights = {"es": 4, "en": 3, "fr": 1, "code": 2, "url": 1}
+    results = {}
+    for layout in ("secciones", "intercalado"):
+        book = _mixed_chunks(chunks, paragraphs_per_chunk, weights, sections=layout == "secciones")
+        texts = ["\n\n".join(text for _, text in paragraphs) for paragraphs in book]
+        # Acierto del detector sobre los párrafos de prosa etiquetados
+        prose = [(kind, text) for paragraphs in book for kind, text in paragraphs if kind in ("es", "en", "fr")]
+        correct = sum(detect(text) == kind for kind, text in prose)
+        layout_results = {"accuracy": correct / len(prose), "runs": []}
+        print(f"{layout}: detección correcta en {correct}/{len(prose)} párrafos ({layout_results['accuracy']:.0%})")
+        with tempfile.TemporaryDirectory() as tmp:
+            for detect_language in (False, True):
+                creator = AudioBookCreator(os.path.join(tmp, "libro.pdf"), os.path.join(tmp, "salida"),
+                                           translate_to_spanish=True, target_language="es",
+                                           detect_language=detect_language, chunk_size=100000,
+                                           tts_backend="fake", translation_backend="fake",
+                                           translation_options={"latency": latency},
+                                           use_cache=False, use_translation_memory=False, use_page_index=False)
+                sent = []
+                original = creator.translation_backend.translate
+
+                async def translate(text, target, source=None, original=original, sent=sent):
+                    sent.append((len(text), source))
+                    return await original(text, target, source)
+                creator.translation_backend.translate = translate
+                start = time.perf_counter()
+                translated = creator.translate_chunks(texts)
+                elapsed = time.perf_counter() - start
+                result = {
+                    "detect_language": detect_language,
+                    "requests": len(sent),
+                    "chars_sent": sum(chars for chars, _ in sent),
+                    "pinned_requests": sum(source is not None for _, source in sent),
+                    "seconds": elapsed,
+                    # El traductor falso devuelve el texto tal cual: el libro debe reconstruirse idéntico
+                    "unchanged": "".join(translated) == "".join(texts),
+                }
+                layout_results["runs"].append(result)
+                print(f"  detección={'sí' if detect_language else 'no':>2}  {result['requests']:>5} peticiones  "
+                      f"{result['chars_sent']:>8} caracteres enviados  {result['pinned_requests']:>5} con idioma "
+                      f"fijado  {elapsed:6.3f}s  {'' if result['unchanged'] else 'TEXTO ALTERADO'}")
+        plain, filtered = layout_results["runs"]
+        layout_results["chars_saved"] = 1 - filtered["chars_sent"] / plain["chars_sent"]
+        layout_results["requests_saved"] = 1 - filtered["requests"] / plain["requests"]
+        print(f"  ahorro: {layout_results['chars_saved']:.0%} de los caracteres, "
+              f"{layout_results['requests_saved']:.0%} de las peticiones")
+        results[layout] = layout_results
+    return results
+
+
+def bench_chunking(megabytes=5):
+    """Peticiones por libro y throughput del chunker frente al corte fijo de 500 caracteres."""
+    sentence = "Esta es una frase de ejemplo, con una cláusula; y algo más de texto. "
+    text = sentence * (megabytes * 1024 * 1024 // len(sentence))
+    mb = len(text.encode("utf-8")) / 1024 ** 2
+
+    start = time.perf_counter()
+    fixed = [text[i:i+500] for i in range(0, len(text), 500)]
+    fixed_seconds = time.perf_counter() - start
+
+    results = [{"chunker": "fijo-500", "requests": len(fixed), "seconds": fixed_seconds}]
+    for backend in ("edge-tts", "googletrans"):
+        chunker = TextChunker.for_backend(backend)
+        start = time.perf_counter()
+        chunks = chunker.split(text)
+        elapsed = time.perf_counter() - start
+        assert all(chunker.measure(c) <= chunker.limit for c in chunks)
+        results.append({"chunker": backend, "requests": len(chunks), "seconds": elapsed})
+
+    for r in results:
+        print(f"{r['chunker']:>12}  peticiones={r['requests']:>7}  "
+              f"{mb / r['seconds']:8.1f} MB/s")
+    return results
+
+
+def bench_jobs(books=4, pages=10, delay=0.3, workers_levels=(1, 2, 4), tts_limit=16):
+    """Throughput total del JobScheduler según el número de libros en paralelo."""
+    results = []
+    with tempfile.TemporaryDirectory() as tmp:
+        pdf_file = make_pdf(os.path.join(tmp, "bench.pdf"), pages)
+        for workers in workers_levels:
+            jobs = [{"pdf_file": pdf_file, "output_dir": os.path.join(tmp, f"w{workers}", f"libro{b}"),
+                     "streaming": True, "tts_concurrency": 4, "tts_latency": delay} for b in range(books)]
+            scheduler = JobScheduler(max_workers=workers, tts_limit=tts_limit,
+                                     workspace_root=os.path.join(tmp, f"w{workers}", "jobs"),
+                                     creator_factory=_fake_creator)
+            reports, summary = scheduler.run(jobs)
+            assert summary["done"] == books, reports
+            results.append({"workers": workers, **summary})
+            print(f"libros en paralelo={workers:>2}  {summary['seconds']:6.2f}s  "
+                  f"{summary['chunks_per_second']:7.1f} chunks/s  "
+                  f"pico de TTS compartido {summary['peak_tts_concurrency']}/{tts_limit}")
+    return results
+
+
+def bench_merge(chunks=500, frames_per_chunk=400):
+    """Unión de chunks MP3 en proceso frente a `ffmpeg -f concat` (si está instalado)."""
+    results = []
+    with tempfile.TemporaryDirectory() as tmp:
+        files = []
+        for i in range(chunks):
+            path = os.path.join(tmp, f"chunk_{i}.mp3")
+            with open(path, "wb") as f:
+                f.write(SILENT_FRAME * frames_per_chunk)
+            files.append(path)
+        mb = len(SILENT_FRAME) * frames_per_chunk * chunks / 1024 ** 2
+
+        start = time.perf_counter()
+        assembler = Mp3Assembler(os.path.join(tmp, "en_proceso.mp3"))
+        for i, path in enumerate(files):
+            assembler.chunk_ready(i, path)
+        output_file = assembler.close()
+        elapsed = time.perf_counter() - start
+        with open(output_file, "rb") as f:
+            assert sum(1 for _ in iter_frames(f.read())) == chunks * frames_per_chunk
+        results.append({"method": "en proceso", "seconds": elapsed})
+
+        if shutil.which("ffmpeg"):
+            list_file = os.path.join(tmp, "file_list.txt")
+            with open(list_file, "w") as f:
+                f.writelines(f"file '{path}'\n" for path in files)
+            start = time.perf_counter()
+            subprocess.run(["ffmpeg", "-loglevel", "error", "-f", "concat", "-safe", "0",
+                            "-i", list_file, "-c", "copy", os.path.join(tmp, "ffmpeg.mp3"), "-y"],
+                           check=True)
+            results.append({"method": "ffmpeg", "seconds": time.perf_counter() - start})
+        else:
+            print("ffmpeg no está instalado; solo se mide la unión en proceso")
+
+    for r in results:
+        print(f"{r['method']:>10}  {r['seconds']:6.3f}s  {mb / r['seconds']:8.1f} MB/s")
+    return results
+
+
+def bench_progressive(page_counts=(20, 100), delay=0.05, per_char=0.0005, concurrency=8, start_buffer=5.0):
+    """Tiempo hasta el primer audio: streaming normal frente a modo progresivo, según el tamaño del libro.
+
+    En los dos modos el "primer audio" es cuando el MP3 unido en orden llega a
+    `start_buffer` segundos, que es cuando el reproductor empezaría a sonar.
+    """
+    # Reproductor que descarta el audio, para medir sin altavoces
+    sink = [sys.executable, "-c", "import sys; sys.stdin.buffer.read()"]
+    results = []
+    with tempfile.TemporaryDirectory() as tmp:
+        for pages in page_counts:
+            pdf_file = make_pdf(os.path.join(tmp, f"bench_{pages}.pdf"), pages)
+            for progressive in (False, True):
+                creator = _fake_creator(pdf_file, os.path.join(tmp, f"salida_{pages}_{progressive}"), delay,
+                                        per_char, streaming=True, progressive=progressive,
+                                        tts_concurrency=concurrency, player_command=sink,
+                                        playback_buffer=start_buffer)
+                start = time.perf_counter()
+                first_audio = {}
+
+                def on_merge(event):
+                    if (event["event"] == "merge_chunk" and "seconds" not in first_audio
+                            and creator.assembler.duration >= start_buffer):
+                        first_audio["seconds"] = time.perf_counter() - start
+                creator.events.subscribe(on_merge)
+                output_file = creator.create_audiobook()
+                elapsed = time.perf_counter() - start
+                assert output_file, "el libro no se completó"
+                result = {"pages": pages, "mode": "progresivo" if progressive else "streaming",
+                          "first_audio_seconds": first_audio.get("seconds", elapsed), "seconds": elapsed,
+                          "audio_seconds": creator.assembler.duration,
+                          "underruns": creator.player.underruns if creator.player else None}
+                results.append(result)
+                print(f"páginas={pages:>5}  {result['mode']:>10}  primer audio {result['first_audio_seconds']:6.3f}s  "
+                      f"total {elapsed:7.2f}s  audio {result['audio_seconds'] / 60:6.1f} min  "
+                      f"cortes {result['underruns'] if creator.player else '-'}")
+    return results
+
+
+def bench_ratelimit(chunks=200, capacity=6, latency=0.05, concurrency=16, retries=4):
+    """Servicio que admite `capacity` peticiones simultáneas: concurrencia fija frente a AIMD."""
+    results = []
+    with tempfile.TemporaryDirectory() as tmp:
+        for mode in ("fija", "adaptativa"):
+            backend = create_tts_backend("fake", {"latency": latency, "capacity": capacity})
+            scheduler = CallScheduler("fake", concurrency=concurrency, retries=retries)
+            if mode == "fija":
+                # Sin reducción multiplicativa: solo reintentos con backoff
+                scheduler.concurrency.decrease = 1.0
+
+            async def synthesize(i):
+                output_file = os.path.join(tmp, f"{mode}_{i}.mp3")
+                try:
+                    await scheduler.call(lambda: backend.synthesize(LOREM, output_file, "fake", {}))
+                    return True
+                except Exception:
+                    return False
+
+            async def run_all():
+                return await asyncio.gather(*(synthesize(i) for i in range(chunks)))
+
+            start = time.perf_counter()
+            ok = asyncio.run(run_all())
+            elapsed = time.perf_counter() - start
+            stats = scheduler.stats()
+            result = {"mode": mode, "seconds": elapsed, "chunks_per_second": chunks / elapsed,
+                      "failed_chunks": ok.count(False), **stats}
+            results.append(result)
+            print(f"{mode:>10}  {elapsed:7.2f}s  {result['chunks_per_second']:7.1f} chunks/s  "
+                  f"429 {stats['throttles']:>4}  reintentos {stats['retries']:>4}  "
+                  f"fallidos {result['failed_chunks']:>3}  límite final {stats['limit']:5.1f}")
+    return results
+
+
+# Se ejecuta en un intérprete nuevo: importa la interfaz y, si hay pantalla, dibuja la ventana
+_STARTUP_PROBE = """
+import importlib.util, json, sys, time
+start = time.perf_counter()
+if sys.argv[1] == "audio":
+    import audio
+    module = None
+else:
+    spec = importlib.util.spec_from_file_location("gui_probe", sys.argv[1])
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+imported = time.perf_counter() - start
+window = None
+if module is not None:
+    try:
+        root = module.tk.Tk()
+        module.AudiobookGUI(root)
+        root.update()
+        window = time.perf_counter() - start
+        root.destroy()
+    except module.tk.TclError:
+        pass
+print(json.dumps({"import_seconds": imported, "window_seconds": window,
+                  "heavy_modules": [m for m in json.loads(sys.argv[2]) if m in sys.modules]}))
+"""
+
+
+def _parse_importtime(stderr, top=5):
+    """Módulos de primer nivel más lentos según `-X importtime` (acumulado, en ms)."""
+    modules = []
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative, name = line[len("import time:"):].split("|")
+        if not name.startswith(" ") or name.startswith("  ") or name.strip() == "site":
+            # `site` lo carga el intérprete antes de ejecutar nada
+            continue
+        modules.append((name.strip(), int(cumulative) / 1000))
+    return sorted(modules, key=lambda m: m[1], reverse=True)[:top]
+
+
+def bench_startup(targets=("gui2.py", "gui-audio.py"), repeat=5, budget_ms=50.0):
+    """Tiempo de arranque de las interfaces en un intérprete nuevo (mediana de `repeat`).
+
+    Como referencia se mide también `import audio`, lo que se carga en diferido.
+    """
+    here = os.path.dirname(os.path.abspath(__file__))
+    results = []
+    for target in (*targets, "audio"):
+        path = target if target == "audio" else os.path.join(here, target)
+        runs = []
+        for _ in range(repeat):
+            proc = subprocess.run([sys.executable, "-X", "importtime", "-c", _STARTUP_PROBE, path,
+                                   json.dumps(HEAVY_MODULES)],
+                                  cwd=here, capture_output=True, text=True, check=True)
+            runs.append((json.loads(proc.stdout.strip().splitlines()[-1]), proc.stderr))
+        runs.sort(key=lambda run: run[0]["import_seconds"])
+        probe, stderr = runs[len(runs) // 2]
+        result = {"target": target, "import_ms": probe["import_seconds"] * 1000,
+                  "window_ms": probe["window_seconds"] * 1000 if probe["window_seconds"] else None,
+                  "heavy_modules": probe["heavy_modules"],
+                  "slowest_imports": _parse_importtime(stderr)}
+        result["within_budget"] = target == "audio" or (
+            result["import_ms"] <= budget_ms and not result["heavy_modules"])
+        results.append(result)
+        window = f"{result['window_ms']:7.1f} ms" if result["window_ms"] else "sin pantalla"
+        slowest = ", ".join(f"{name} {ms:.0f}" for name, ms in result["slowest_imports"][:3])
+        print(f"{target:>14}  import {result['import_ms']:7.1f} ms  ventana {window}  "
+              f"pesados {result['heavy_modules'] or '-'}  ({slowest})")
+    return results
+
+
+# Se ejecuta en un proceso nuevo para que el pico de RSS sea solo el de la extracción
+_MEMORY_PROBE = """
+import json, resource, sys, tempfile, time
+from audio import AudioBookCreator
+from pdf_extract import current_rss_mb
+pdf_file, limit = sys.argv[1], float(sys.argv[2])
+with tempfile.TemporaryDirectory() as out:
+    creator = AudioBookCreator(pdf_file, out, memory_limit_mb=limit, tts_backend="fake",
+                               use_cache=False, use_translation_memory=False, use_page_index=False)
+    samples = []
+    creator.events.subscribe(lambda e: e["event"] == "page_extracted" and e["page"] % 50 == 0
+                             and samples.append((e["page"], current_rss_mb())))
+    start = time.perf_counter()
+    chunks = creator.extract_chunks()
+    elapsed = time.perf_counter() - start
+print(json.dumps({"seconds": elapsed, "chunks": len(chunks), "chars": sum(map(len, chunks)),
+                  "peak_rss_mb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024,
+                  "throttles": creator.memory_guard.throttles, "rss_samples": samples}))
+"""
+
+
+def bench_memory(pages=2000, lines_per_page=40, limit_mb=150.0, budget_mb=200.0):
+    """Pico de RSS al extraer un PDF enorme en modo de memoria acotada."""
+    here = os.path.dirname(os.path.abspath(__file__))
+    with tempfile.TemporaryDirectory() as tmp:
+        pdf_file = make_pdf(os.path.join(tmp, f"bench_{pages}.pdf"), pages, lines_per_page)
+        proc = subprocess.run([sys.executable, "-c", _MEMORY_PROBE, pdf_file, str(limit_mb)],
+                              cwd=here, capture_output=True, text=True, check=True)
+    result = json.loads(proc.stdout.strip().splitlines()[-1])
+    samples = result["rss_samples"]
+    # Crecimiento entre el primer y el último muestreo: ~0 si la memoria está acotada
+    growth = samples[-1][1] - samples[0][1] if len(samples) > 1 else 0.0
+    result.update(pages=pages, limit_mb=limit_mb, budget_mb=budget_mb, rss_growth_mb=growth,
+                  pages_per_second=pages / result["seconds"],
+                  within_budget=result["peak_rss_mb"] <= budget_mb)
+    print(f"páginas={pages}  {result['seconds']:7.1f}s  {result['pages_per_second']:6.1f} páginas/s  "
+          f"pico RSS {result['peak_rss_mb']:6.1f} MB (presupuesto {budget_mb:.0f})  "
+          f"crecimiento {growth:+.1f} MB  frenadas {result['throttles']}")
+    return result
+
+
+def bench_page_index(pages=200):
+    """Cambios de rango sobre el mismo PDF con el índice de páginas, y su invalidación al cambiar el archivo."""
+    from audio import AudioBookCreator
+    quarter = pages // 4
+    # (nombre, inicio, fin): en frío, ampliando el rango, dentro de lo ya indexado y tras modificar el PDF
+    steps = [("frío", 0, 2 * quarter), ("ampliado", 0, pages), ("subrango", quarter, 3 * quarter),
+             ("PDF modificado", quarter, 3 * quarter)]
+    results = []
+    with tempfile.TemporaryDirectory() as tmp:
+        pdf_file = make_pdf(os.path.join(tmp, "libro.pdf"), pages)
+        db = os.path.join(tmp, "pages.sqlite3")
+        for name, start, end in steps:
+            if name == "PDF modificado":
+                make_pdf(pdf_file, pages, line_chars=60)
+            creator = AudioBookCreator(pdf_file, os.path.join(tmp, "salida"), start, end, tts_backend="fake",
+                                       use_cache=False, use_translation_memory=False, page_index_db=db)
+            parsed = []
+            creator.events.subscribe(lambda e: e["event"] == "page_extracted" and not e["cached"]
+                                     and parsed.append(e["page"]))
+            start_time = time.perf_counter()
+            text = creator.extract_text_from_pdf()
+            elapsed = time.perf_counter() - start_time
+            creator.page_index.close()
+            result = {"step": name, "start_page": start, "end_page": end, "seconds": elapsed,
+                      "pages_parsed": len(parsed), "chars": len(text)}
+            results.append(result)
+            print(f"{name:>15}  páginas {start:>4}-{end:<4}  {elapsed:7.3f}s  analizadas {len(parsed):>4}")
+    return results
+
+
+def bench_cleaning(pages=100, scale_pages=(1000, 4000)):
+    """Caracteres, chunks y audio que ahorra la limpieza de cabeceras y pies, y su coste (lineal)."""
+    from audio import AudioBookCreator
+    from text_cleaner import PageCleaner
+    chars_per_second = 15
+    results = {"pipeline": [], "scaling": []}
+    with tempfile.TemporaryDirectory() as tmp:
+        pdf_file = make_pdf(os.path.join(tmp, "libro.pdf"), pages, running_headers=True)
+        for clean in (False, True):
+            creator = AudioBookCreator(pdf_file, os.path.join(tmp, "salida"), tts_backend="fake", clean_text=clean,
+                                       use_cache=False, use_translation_memory=False, use_page_index=False)
+            chunks = creator.extract_chunks()
+            chars = sum(len(c) for c in chunks)
+            result = {"clean_text": clean, "chars": chars, "chunks": len(chunks),
+                      "audio_minutes": chars / chars_per_second / 60,
+                      "removed": creator.cleaning_stats["removed_by_reason"] if clean else {}}
+            results["pipeline"].append(result)
+            print(f"limpieza={'sí' if clean else 'no':>2}  {chars:>8} caracteres  {len(chunks):>4} chunks (peticiones TTS)  "
+                  f"audio {result['audio_minutes']:6.1f} min  {result['removed'] or ''}")
+        sample_pages = [text for text, _ in iter_extracted(pdf_file, 0, min(20, pages), workers=1)]
+    # Coste de la limpieza sola, con más páginas: debe crecer linealmente
+    for count in scale_pages:
+        stream = [sample_pages[i % len(sample_pages)] for i in range(count)]
+        start = time.perf_counter()
+        for _ in PageCleaner().clean(stream):
+            pass
+        elapsed = time.perf_counter() - start
+        results["scaling"].append({"pages": count, "seconds": elapsed, "pages_per_second": count / elapsed})
+        print(f"páginas={count:>6}  limpieza {elapsed:6.3f}s  {count / elapsed:9.0f} páginas/s")
+    return results
+
+
+def bench_uievents(jobs=4, rate=5000, seconds=2.0, log_every=10, interval_ms=100):
+    """Cola de eventos de la interfaz: hilos que emiten `rate` eventos/s cada uno y un consumidor por tiempo.
+
+    El consumidor imita al bucle de Tk sin necesitar pantalla: cada
+    `interval_ms` vacía la cola y cuenta las actualizaciones de widgets que
+    haría (una por trabajo con progreso, una por lote de log y una por
+    cambio de estado). Con la agrupación, esas actualizaciones dependen de
+    los trabajos y del intervalo, no de los eventos por segundo.
+    """
+    import threading
+    from gui_events import UiEventQueue
+    events = UiEventQueue()
+    stop = threading.Event()
+    burst = max(1, rate // 100)
+
+    def producer(job):
+        count = 0
+        next_burst = time.perf_counter()
+        while not stop.is_set():
+            # Ráfagas cada 10 ms, como los chunks que terminan a la vez
+            for _ in range(burst):
+                count += 1
+                events.progress(job, count % 100, 60.0)
+                if count % log_every == 0:
+                    events.log(f"trabajo {job}: evento {count}")
+            next_burst += 0.01
+            time.sleep(max(0.0, next_burst - time.perf_counter()))
+        events.state(job, "done")
+
+    def apply(batch):
+        return len(batch.progress) + len(batch.states) + (1 if batch.lines else 0)
+
+    ticks = []
+    updates = 0
+    threads = [threading.Thread(target=producer, args=(job,)) for job in range(jobs)]
+    start = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    while time.perf_counter() - start < seconds:
+        time.sleep(interval_ms / 1000)
+        tick_start = time.perf_counter()
+        updates += apply(events.drain())
+        ticks.append(time.perf_counter() - tick_start)
+    elapsed = time.perf_counter() - start
+    stop.set()
+    for thread in threads:
+        thread.join()
+    # Lo que el consumidor no alcanzó a vaciar a tiempo
+    backlog = events.pending()
+    while True:
+        batch = events.drain()
+        if not batch:
+            break
+        updates += apply(batch)
+    total = events.received
+    results = {
+        "jobs": jobs,
+        "events": total,
+        "events_per_second": total / elapsed,
+        "widget_updates": updates,
+        "coalescing_ratio": total / max(1, updates),
+        "drains": events.drains,
+        "backlog": backlog,
+        "max_drain_ms": max(ticks) * 1000 if ticks else 0.0,
+        "mean_drain_ms": sum(ticks) / len(ticks) * 1000 if ticks else 0.0,
+    }
+    print(f"{jobs} trabajos: {total} eventos ({results['events_per_second']:.0f}/s) → "
+          f"{updates} actualizaciones de widgets ({results['coalescing_ratio']:.0f}:1) en {events.drains} vaciados; "
+          f"vaciado medio {results['mean_drain_ms']:.1f} ms, máximo {results['max_drain_ms']:.1f} ms, "
+          f"{backlog} eventos pendientes al parar")
+    return results
+
+
+# Métricas de `e2e` comparables con una línea base: +1 si más es mejor, -1 si menos es mejor
+METRIC_DIRECTIONS = {
+    "seconds": -1,
+    "pages_per_second": 1,
+    "chars_per_second": 1,
+    "chunks_per_second": 1,
+    "merge_mb_per_second": 1,
+    "first_chunk_seconds": -1,
+    "peak_rss_mb": -1,
+}
+
+
+def bench_incremental(pages=100, edits=(1, 4, 16), tts_latency=0.2, per_char=0.0005, translate=False):
+    """Reconstrucción tras corregir `edits` páginas: modo incremental frente a rehacer el libro entero."""
+    import copy
+    import random
+    from audio import AudioBookCreator
+    rng = random.Random(1)
+    book = _book_pages(pages)
+    results = []
+    with tempfile.TemporaryDirectory() as tmp:
+        pdf_file = os.path.join(tmp, "libro.pdf")
+
+        def build(output_dir, incremental, page_db):
+            creator = AudioBookCreator(pdf_file, output_dir, tts_backend="fake",
+                                       tts_options={"latency": tts_latency, "per_char": per_char},
+                                       translate_to_spanish=translate, translation_backend="fake",
+                                       use_cache=False, use_translation_memory=False, page_index_db=page_db,
+                                       incremental=incremental)
+            counts = {"parsed": 0, "synthesized": 0}
+
+            def count(event):
+                if event["event"] == "page_extracted" and not event["cached"]:
+                    counts["parsed"] += 1
+                elif event["event"] == "chunk_synthesized" and not event.get("resumed"):
+                    counts["synthesized"] += 1
+            creator.events.subscribe(count)
+            start = time.perf_counter()
+            output_file = creator.create_audiobook()
+            return {"seconds": time.perf_counter() - start, "pages_parsed": counts["parsed"],
+                    "chunks_synthesized": counts["synthesized"], "ok": output_file is not None,
+                    "bytes": os.path.getsize(output_file) if output_file else 0}
+
+        make_pdf(pdf_file, page_lines=[_wrap_lines(page) for page in book])
+        db = os.path.join(tmp, "pages.sqlite3")
+        first = build(os.path.join(tmp, "v1"), True, db)
+        results.append({"edited_pages": None, "mode": "inicial", **first})
+        print(f"{'inicial':>12}  {first['seconds']:7.2f}s  {first['chunks_synthesized']:>4} chunks sintetizados  "
+              f"{first['pages_parsed']:>4} páginas analizadas")
+        for count in edits:
+            edited = copy.deepcopy(book)
+            for page in rng.sample(range(pages), min(count, pages)):
+                sentences = edited[page]
+                sentences[rng.randrange(len(sentences))] = _book_sentence(rng)
+            make_pdf(pdf_file, page_lines=[_wrap_lines(page) for page in edited])
+            # Cada nivel parte de la misma versión anterior
+            output_dir = os.path.join(tmp, f"incremental_{count}")
+            shutil.copytree(os.path.join(tmp, "v1"), output_dir)
+            incremental = build(output_dir, True, db)
+            full = build(os.path.join(tmp, f"entero_{count}"), False, os.path.join(tmp, f"pages_{count}.sqlite3"))
+            for mode, result in (("incremental", incremental), ("entero", full)):
+                results.append({"edited_pages": count, "mode": mode, **result})
+            print(f"{count:>3} páginas  incremental {incremental['seconds']:6.2f}s "
+                  f"({incremental['chunks_synthesized']:>3} chunks, {incremental['pages_parsed']:>3} páginas)  "
+                  f"entero {full['seconds']:6.2f}s ({full['chunks_synthesized']:>3} chunks, "
+                  f"{full['pages_parsed']:>3} páginas)  x{full['seconds'] / incremental['seconds']:.1f}")
+    return results
+
+
+def _http(url, method="GET", body=None, headers=None):
+    import urllib.error
+    import urllib.request
+    request = urllib.request.Request(url, data=body, method=method, headers=headers or {})
+    try:
+        with urllib.request.urlopen(request) as response:
+            return response.status, response.read()
+    except urllib.error.HTTPError as e:
+        return e.code, e.read()
+
+
+def _start_service(data_dir, workers, defaults):
+    import threading
+    from server import JobServer, JobService
+    service = JobService(data_dir, workers=workers, defaults=defaults)
+    server = JobServer(("127.0.0.1", 0), service, verbose=False)
+    service.start()
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+
+    def stop():
+        server.shutdown()
+        server.server_close()
+        service.stop()
+    return f"http://127.0.0.1:{server.server_address[1]}", stop
+
+
+def _wait_jobs(base, timeout=600.0):
+    deadline = time.perf_counter() + timeout
+    while time.perf_counter() < deadline:
+        jobs = json.loads(_http(base + "/jobs")[1])["jobs"]
+        if all(job["status"] in ("done", "failed", "cancelled") for job in jobs):
+            return jobs
+        time.sleep(0.1)
+    raise TimeoutError("Los trabajos no terminaron a tiempo")
+
+
+def bench_service(books=6, pages=10, workers_levels=(1, 2, 4), tts_latency=0.3, restart_after=0.5):
+    """Servicio HTTP con backends falsos: libros por minuto según los trabajadores y coste de un reinicio."""
+    results = []
+    with tempfile.TemporaryDirectory() as tmp:
+        pdf_file = make_pdf(os.path.join(tmp, "bench.pdf"), pages)
+        with open(pdf_file, "rb") as f:
+            pdf_bytes = f.read()
+        defaults = {"tts_backend": "fake", "tts_options": {"latency": tts_latency}, "tts_concurrency": 4,
+                    "use_cache": False, "page_index_db": os.path.join(tmp, "pages.sqlite3")}
+        for workers in workers_levels:
+            base, stop = _start_service(os.path.join(tmp, f"w{workers}"), workers, defaults)
+            try:
+                start = time.perf_counter()
+                for b in range(books):
+                    # La mitad se sube en el cuerpo y la otra mitad se pide por ruta
+                    if b % 2:
+                        status, _ = _http(base + "/jobs", "POST", pdf_bytes, {"Content-Type": "application/pdf"})
+                    else:
+                        status, _ = _http(base + "/jobs", "POST", json.dumps({"pdf": pdf_file}).encode())
+                    assert status == 201, status
+                jobs = _wait_jobs(base)
+                elapsed = time.perf_counter() - start
+                assert all(job["status"] == "done" for job in jobs), jobs
+                metrics = json.loads(_http(base + "/metrics")[1])
+                job = jobs[0]
+                start = time.perf_counter()
+                status, audio = _http(base + f"/jobs/{job['id']}/audio", headers={"Range": "bytes=0-"})
+                download = time.perf_counter() - start
+                assert status == 206 and len(audio) == job["bytes"], status
+            finally:
+                stop()
+            result = {"workers": workers, "books": books, "seconds": elapsed,
+                      "books_per_minute": books * 60 / elapsed, "peak_tts_concurrency": metrics["tts"]["peak"],
+                      "download_mb_per_second": len(audio) / download / 1e6 if download else 0.0}
+            results.append(result)
+            print(f"trabajadores={workers:>2}  {elapsed:6.2f}s  {result['books_per_minute']:6.1f} libros/min  "
+                  f"pico de TTS {result['peak_tts_concurrency']:>2}  "
+                  f"descarga {result['download_mb_per_second']:.0f} MB/s")
+
+        # Un libro más largo interrumpido a mitad de síntesis y reanudado en otro arranque del servicio
+        long_pdf = make_pdf(os.path.join(tmp, "largo.pdf"), pages * 4)
+        restart = {}
+        for scenario in ("sin reinicio", "reinicio"):
+            data_dir = os.path.join(tmp, scenario)
+            # Cada escenario con su índice de páginas, para que ninguno extraiga con ventaja
+            defaults = dict(defaults, page_index_db=os.path.join(data_dir, "pages.sqlite3"))
+            base, stop = _start_service(data_dir, 1, defaults)
+            start = time.perf_counter()
+            job_id = json.loads(_http(base + "/jobs", "POST", json.dumps({"pdf": long_pdf}).encode())[1])["id"]
+            if scenario == "reinicio":
+                while json.loads(_http(base + f"/jobs/{job_id}")[1])["progress"] < restart_after * 100:
+                    time.sleep(0.05)
+                stop()
+                base, stop = _start_service(data_dir, 1, defaults)
+            try:
+                job = _wait_jobs(base)[0]
+            finally:
+                stop()
+            restart[scenario] = {"status": job["status"], "attempts": job["attempts"],
+                                 "seconds": time.perf_counter() - start}
+        results.append({"scenario": "restart", "restart_after": restart_after,
+                        "uninterrupted": restart["sin reinicio"], "restarted": restart["reinicio"]})
+        print(f"reinicio al {restart_after:.0%}: {restart['reinicio']['status']} en "
+              f"{restart['reinicio']['seconds']:.2f}s ({restart['reinicio']['attempts']} intentos), "
+              f"sin reinicio {restart['sin reinicio']['seconds']:.2f}s")
+    return results
+
+
+def _timed(obj, name, totals):
+    """Sustituye obj.name por una versión que acumula su tiempo en totals[name]."""
+    original = getattr(obj, name)
+
+    def wrapper(*args, **kwargs):
+        start = time.perf_counter()
+        try:
+            return original(*args, **kwargs)
+        finally:
+            totals[name] += time.perf_counter() - start
+    setattr(obj, name, wrapper)
+
+
+def _run_e2e(pdf_file, work_dir, streaming, translate, tts_latency, translation_latency):
+    """Pipeline completo de AudioBookCreator con backends falsos; corre en un proceso nuevo."""
+    from collections import defaultdict
+
+    import mp3_assembler
+    from audio import AudioBookCreator
+
+    creator = AudioBookCreator(
+        pdf_file, os.path.join(work_dir, "salida"), streaming=streaming,
+        translate_to_spanish=translate, use_cache=False, use_translation_memory=False, use_page_index=False,
+        tts_backend="fake", tts_options={"latency": tts_latency},
+        translation_backend="fake", translation_options={"latency": translation_latency})
+    totals = defaultdict(float)
+    for name in ("extract_text_from_pdf", "split_text", "translate_chunks"):
+        _timed(creator, name, totals)
+    # La unión ocurre chunk a chunk durante la síntesis: se mide el tiempo dentro del ensamblador
+    _timed(mp3_assembler.Mp3Assembler, "append", totals)
+
+    first_chunk = []
+    text_to_speech = creator.text_to_speech
+
+    async def timed_tts(text, output_file):
+        await text_to_speech(text, output_file)
+        if not first_chunk:
+            first_chunk.append(time.perf_counter() - start)
+    creator.text_to_speech = timed_tts
+
+    start = time.perf_counter()
+    output_file = creator.create_audiobook()
+    elapsed = time.perf_counter() - start
+    assert output_file, "el pipeline no generó el audiolibro"
+
+    chunks = creator.manifest.chunks
+    chars = chunks[-1]["end"] if chunks else 0
+    pages = creator.end_page - creator.start_page
+    mb = os.path.getsize(output_file) / 1024 ** 2
+    if streaming:
+        # Las etapas se solapan: los ritmos se miden sobre el tiempo total
+        extract_seconds = split_seconds = synth_seconds = elapsed
+    else:
+        extract_seconds = totals["extract_text_from_pdf"]
+        split_seconds = totals["split_text"]
+        synth_seconds = elapsed - extract_seconds - split_seconds - totals["translate_chunks"]
+    return {
+        "seconds": elapsed,
+        "pages": pages,
+        "chars": chars,
+        "chunks": len(chunks),
+        "pages_per_second": pages / extract_seconds,
+        "chars_per_second": chars / split_seconds if split_seconds else 0.0,
+        "chunks_per_second": len(chunks) / synth_seconds,
+        "merge_mb_per_second": mb / totals["append"] if totals["append"] else 0.0,
+        "first_chunk_seconds": first_chunk[0] if first_chunk else None,
+        "peak_rss_mb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024,
+    }
+
+
+def bench_e2e(pages=100, lines_per_page=40, line_chars=70, columns=1, modes=("batch", "streaming"),
+              translate=True, tts_latency=0.01, translation_latency=0.005):
+    """Pipeline completo contra backends falsos, con ritmos por etapa y pico de RSS por modo."""
+    scenarios = {}
+    with tempfile.TemporaryDirectory() as tmp:
+        pdf_file = make_pdf(os.path.join(tmp, "bench.pdf"), pages, lines_per_page, line_chars, columns)
+        for mode in modes:
+            with ProcessPoolExecutor(max_workers=1) as executor:
+                result = executor.submit(_run_e2e, pdf_file, os.path.join(tmp, mode), mode == "streaming",
+                                         translate, tts_latency, translation_latency).result()
+            scenarios[mode] = result
+            print(f"{mode:>10}  total {result['seconds']:7.2f}s  {result['pages_per_second']:7.1f} páginas/s  "
+                  f"{result['chars_per_second'] / 1e6:6.2f} Mcar/s  {result['chunks_per_second']:7.1f} chunks/s  "
+                  f"unión {result['merge_mb_per_second']:6.1f} MB/s  primer chunk {result['first_chunk_seconds']:.3f}s  "
+                  f"pico RSS {result['peak_rss_mb']:.1f} MB")
+    return scenarios
+
+
+def compare_to_baseline(scenarios, baseline, threshold):
+    """Devuelve las métricas que empeoran más de `threshold` (fracción) respecto a la línea base."""
+    regressions = []
+    for mode, metrics in scenarios.items():
+        previous = baseline.get(mode)
+        if not previous:
+            continue
+        for metric, direction in METRIC_DIRECTIONS.items():
+            old, new = previous.get(metric), metrics.get(metric)
+            if not old or new is None:
+                continue
+            change = (new - old) / old * direction
+            if change < -threshold:
+                regressions.append(f"{mode}.{metric}: {old:.4g} → {new:.4g} ({change:+.0%})")
+    return regressions
+
+
+def write_results(path, command, params, results):
+    payload = {
+        "benchmark": command,
+        "params": params,
+        "created": time.time(),
+        "python": platform.python_version(),
+        "results": results,
+    }
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(payload, f, ensure_ascii=False, indent=1)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    sub = parser.add_subparsers(dest="command", required=True)
+    common = argparse.ArgumentParser(add_help=False)
+    common.add_argument("--output", help="Guarda los resultados en este archivo JSON")
+
+    tts = sub.add_parser("tts", parents=[common], help="Síntesis concurrente contra un TTS falso")
+    tts.add_argument("--chunks", type=int, default=200)
+    tts.add_argument("--delay", type=float, default=0.05, help="Retraso por llamada en segundos")
+    tts.add_argument("--concurrency", type=int, nargs="+", default=[1, 4, 16])
+
+    extract = sub.add_parser("extract", parents=[common], help="Extracción de texto en varios procesos")
+    extract.add_argument("--pages", type=int, default=400)
+    extract.add_argument("--workers", type=int, nargs="+", default=[1, 2, os.cpu_count() or 1])
+
+    streaming = sub.add_parser("streaming", parents=[common], help="Tiempo al primer chunk y memoria del modo streaming")
+    streaming.add_argument("--pages", type=int, nargs="+", default=[100, 400])
+    streaming.add_argument("--delay", type=float, default=0.01)
+    streaming.add_argument("--concurrency", type=int, default=8)
+
+    cache = sub.add_parser("cache", parents=[common], help="Ejecución en frío frente a en caliente con la caché de audio")
+    cache.add_argument("--pages", type=int, default=20)
+    cache.add_argument("--delay", type=float, default=0.02)
+
+    translation = sub.add_parser("translation", parents=[common], help="Memoria de traducción en ejecuciones repetidas")
+    translation.add_argument("--chunks", type=int, default=200)
+    translation.add_argument("--delay", type=float, default=0.02)
+    translation.add_argument("--concurrency", type=int, nargs="+", default=[1, 4, 16])
+
+    chunking = sub.add_parser("chunking", parents=[common], help="Peticiones por libro y velocidad del chunker")
+    chunking.add_argument("--megabytes", type=int, default=5)
+
+    jobs = sub.add_parser("jobs", parents=[common], help="Varios libros a la vez con el JobScheduler")
+    jobs.add_argument("--books", type=int, default=4)
+    jobs.add_argument("--pages", type=int, default=10)
+    jobs.add_argument("--delay", type=float, default=0.3)
+    jobs.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4])
+    jobs.add_argument("--tts-limit", type=int, default=16)
+
+    merge = sub.add_parser("merge", parents=[common], help="Unión de chunks MP3 en proceso frente a ffmpeg")
+    merge.add_argument("--chunks", type=int, default=500)
+    merge.add_argument("--frames", type=int, default=400, help="Tramas por chunk")
+
+    progressive = sub.add_parser("progressive", parents=[common], help="Tiempo hasta el primer audio en modo progresivo")
+    progressive.add_argument("--pages", type=int, nargs="+", default=[20, 100])
+    progressive.add_argument("--delay", type=float, default=0.05)
+    progressive.add_argument("--per-char", type=float, default=0.0005, help="Latencia del TTS por carácter")
+    progressive.add_argument("--concurrency", type=int, default=8)
+
+    ratelimit = sub.add_parser("ratelimit", parents=[common], help="Concurrencia adaptativa contra un servicio que devuelve 429")
+    ratelimit.add_argument("--chunks", type=int, default=200)
+    ratelimit.add_argument("--capacity", type=int, default=6, help="Peticiones simultáneas que admite el servicio")
+    ratelimit.add_argument("--latency", type=float, default=0.05)
+    ratelimit.add_argument("--concurrency", type=int, default=16)
+    ratelimit.add_argument("--retries", type=int, default=4)
+
+    startup = sub.add_parser("startup", parents=[common], help="Arranque de las interfaces con -X importtime")
+    startup.add_argument("--targets", nargs="+", default=["gui2.py", "gui-audio.py"])
+    startup.add_argument("--repeat", type=int, default=5)
+    startup.add_argument("--budget-ms", type=float, default=50.0,
+                         help="Tiempo máximo de import de cada interfaz")
+
+    memory = sub.add_parser("memory", parents=[common], help="Pico de memoria extrayendo un PDF muy grande")
+    memory.add_argument("--pages", type=int, default=2000)
+    memory.add_argument("--lines-per-page", type=int, default=40)
+    memory.add_argument("--limit-mb", type=float, default=150.0, help="Techo de memoria de la extracción")
+    memory.add_argument("--budget-mb", type=float, default=200.0, help="Pico de RSS máximo aceptado")
+
+    pageindex = sub.add_parser("pageindex", parents=[common], help="Cambios de rango con el índice de páginas")
+    pageindex.add_argument("--pages", type=int, default=200)
+
+    cleaning = sub.add_parser("cleaning", parents=[common], help="Ahorro de la limpieza de cabeceras y pies")
+    cleaning.add_argument("--pages", type=int, default=100)
+
+    post = sub.add_parser("postprocess", parents=[common], help="Posprocesado del audio con NumPy (sin ffmpeg, con WAV)")
+    post.add_argument("--chunks", type=int, default=40)
+    post.add_argument("--chunk-seconds", type=float, default=20.0)
+    post.add_argument("--workers", type=int, nargs="+", default=[1, 2])
+
+    language = sub.add_parser("language", parents=[common], help="Traducción de un libro mezclado con detección de idioma")
+    language.add_argument("--chunks", type=int, default=200)
+    language.add_argument("--paragraphs", type=int, default=6, help="Párrafos por chunk")
+
+    uievents = sub.add_parser("uievents", parents=[common], help="Agrupación de eventos en la cola de la interfaz")
+    uievents.add_argument("--jobs", type=int, default=4)
+    uievents.add_argument("--rate", type=int, default=5000, help="Eventos por segundo de cada trabajo")
+    uievents.add_argument("--seconds", type=float, default=2.0)
+    uievents.add_argument("--interval-ms", type=int, default=100)
+
+    incremental = sub.add_parser("incremental", parents=[common], help="Reconstrucción tras corregir algunas páginas del PDF")
+    incremental.add_argument("--pages", type=int, default=100)
+    incremental.add_argument("--edits", type=int, nargs="+", default=[1, 4, 16], help="Páginas corregidas")
+    incremental.add_argument("--tts-latency", type=float, default=0.2)
+    incremental.add_argument("--translate", action="store_true")
+
+    service = sub.add_parser("service", parents=[common], help="Servicio HTTP con cola persistente y reinicio a mitad")
+    service.add_argument("--books", type=int, default=6)
+    service.add_argument("--pages", type=int, default=10)
+    service.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4])
+    service.add_argument("--tts-latency", type=float, default=0.3)
+
+    e2e = sub.add_parser("e2e", parents=[common], help="Pipeline completo con backends falsos y comparación con una línea base")
+    e2e.add_argument("--pages", type=int, default=100)
+    e2e.add_argument("--lines-per-page", type=int, default=40)
+    e2e.add_argument("--line-chars", type=int, default=70)
+    e2e.add_argument("--columns", type=int, default=1)
+    e2e.add_argument("--modes", nargs="+", choices=["batch", "streaming"], default=["batch", "streaming"])
+    e2e.add_argument("--no-translate", dest="translate", action="store_false")
+    e2e.add_argument("--tts-latency", type=float, default=0.01)
+    e2e.add_argument("--translation-latency", type=float, default=0.005)
+    e2e.add_argument("--baseline", help="JSON de una ejecución anterior con el que comparar")
+    e2e.add_argument("--threshold", type=float, default=0.2,
+                     help="Empeoramiento máximo tolerado por métrica (fracción)")
+
+    args = parser.parse_args()
+    results = None
+    if args.command == "tts":
+        results = bench_tts(args.chunks, args.delay, args.concurrency)
+    elif args.command == "extract":
+        results = bench_extract(args.pages, args.workers)
+    elif args.command == "streaming":
+        results = bench_streaming(args.pages, args.delay, args.concurrency)
+    elif args.command == "cache":
+        results = bench_cache(args.pages, args.delay)
+    elif args.command == "translation":
+        results = bench_translation(args.chunks, args.delay, args.concurrency)
+    elif args.command == "chunking":
+        results = bench_chunking(args.megabytes)
+    elif args.command == "jobs":
+        results = bench_jobs(args.books, args.pages, args.delay, workers_levels=args.workers, tts_limit=args.tts_limit)
+    elif args.command == "merge":
+        results = bench_merge(args.chunks, args.frames)
+    elif args.command == "progressive":
+        results = bench_progressive(args.pages, args.delay, args.per_char, args.concurrency)
+    elif args.command == "ratelimit":
+        results = bench_ratelimit(args.chunks, args.capacity, args.latency, args.concurrency, args.retries)
+    elif args.command == "startup":
+        results = bench_startup(args.targets, args.repeat, args.budget_ms)
+    elif args.command == "memory":
+        results = bench_memory(args.pages, args.lines_per_page, args.limit_mb, args.budget_mb)
+    elif args.command == "pageindex":
+        results = bench_page_index(args.pages)
+    elif args.command == "cleaning":
+        results = bench_cleaning(args.pages)
+    elif args.command == "postprocess":
+        results = bench_postprocess(args.chunks, args.chunk_seconds, args.workers)
+    elif args.command == "language":
+        results = bench_language(args.chunks, args.paragraphs)
+    elif args.command == "uievents":
+        results = bench_uievents(args.jobs, args.rate, args.seconds, interval_ms=args.interval_ms)
+    elif args.command == "incremental":
+        results = bench_incremental(args.pages, args.edits, args.tts_latency, translate=args.translate)
+    elif args.command == "service":
+        results = bench_service(args.books, args.pages, args.workers, args.tts_latency)
+    elif args.command == "e2e":
+        results = bench_e2e(args.pages, args.lines_per_page, args.line_chars, args.columns, args.modes,
+                            args.translate, args.tts_latency, args.translation_latency)
+
+    if args.output:
+        params = {k: v for k, v in vars(args).items() if k not in ("command", "output")}
+        write_results(args.output, args.command, params, results)
+        print(f"Resultados guardados en {args.output}")
+
+    if args.command == "startup":
+        over = [r["target"] for r in results if not r["within_budget"]]
+        if over:
+            print(f"Fuera del presupuesto de {args.budget_ms:.0f} ms o con módulos pesados: {', '.join(over)}")
+            sys.exit(1)
+        print(f"Todas las interfaces arrancan en menos de {args.budget_ms:.0f} ms")
+
+    if args.command == "memory":
+        if not results["within_budget"]:
+            print(f"El pico de RSS supera el presupuesto de {args.budget_mb:.0f} MB")
+            sys.exit(1)
+        print(f"Pico de RSS dentro del presupuesto de {args.budget_mb:.0f} MB")
+
+    if args.command == "e2e" and args.baseline:
+        with open(args.baseline, encoding="utf-8") as f:
+            baseline = json.load(f)["results"]
+        regressions = compare_to_baseline(results, baseline, args.threshold)
+        if regressions:
+            print(f"Regresiones de más del {args.threshold:.0%} respecto a {args.baseline}:")
+            for line in regressions:
+                print(f"  {line}")
+            sys.exit(1)
+        print(f"Sin regresiones respecto a {args.baseline}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,285 @@
+"""Interfaz de línea de comandos: un libro o un manifiesto con varios, sin interfaz gráfica.
+
+Uso:
+    python cli.py libro.pdf -o salida/ --start-page 9 --end-page 200 --translate
+    python cli.py --manifest libros.yaml --workers 2 --report-dir informes/
+    python cli.py --manifest libros.json --dry-run
+
+Códigos de salida: 0 si todos los libros se completan, 1 si alguno falla o
+queda incompleto, 2 si los argumentos o el manifiesto no son válidos y 130 si
+se interrumpe con Ctrl+C.
+"""
+import argparse
+import inspect
+import json
+import os
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from scheduler import JobScheduler, job_id, print_report
+
+EXIT_OK = 0
+EXIT_FAILED = 1
+EXIT_USAGE = 2
+EXIT_INTERRUPTED = 130
+
+# Nombres cortos que acepta el manifiesto, además de los argumentos de AudioBookCreator
+KEY_ALIASES = {
+    "pdf": "pdf_file",
+    "output": "output_dir",
+    "translate": "translate_to_spanish",
+}
+
+
+class ManifestError(Exception):
+    """El manifiesto o los argumentos no describen trabajos válidos."""
+
+
+def _creator_class():
+    from audio import AudioBookCreator
+    return AudioBookCreator
+
+
+def load_manifest(path):
+    """Lee un manifiesto JSON o YAML: una lista de libros o {"defaults": {...}, "jobs": [...]}."""
+    try:
+        with open(path, encoding="utf-8") as f:
+            text = f.read()
+    except OSError as e:
+        raise ManifestError(f"No se pudo leer el manifiesto: {e}") from None
+    if path.endswith((".yaml", ".yml")):
+        try:
+            import yaml
+        except ImportError:
+            raise ManifestError("Los manifiestos YAML necesitan PyYAML (pip install pyyaml); "
+                                "también se aceptan en JSON") from None
+        try:
+            data = yaml.safe_load(text)
+        except yaml.YAMLError as e:
+            raise ManifestError(f"YAML no válido en {path}: {e}") from None
+    else:
+        try:
+            data = json.loads(text)
+        except json.JSONDecodeError as e:
+            raise ManifestError(f"JSON no válido en {path}: {e}") from None
+    if isinstance(data, list):
+        data = {"jobs": data}
+    if not isinstance(data, dict) or not isinstance(data.get("jobs"), list):
+        raise ManifestError(f"{path} debe ser una lista de libros o tener una clave 'jobs' con la lista")
+    return data
+
+
+def normalize_job(entry, defaults, creator_params):
+    """Convierte una entrada del manifiesto en argumentos de AudioBookCreator."""
+    if not isinstance(entry, dict):
+        raise ManifestError(f"Cada libro debe ser un objeto, no {entry!r}")
+    job = {}
+    merged = {**defaults, **entry}
+    for key, value in merged.items():
+        name = KEY_ALIASES.get(key, key)
+        if name not in creator_params:
+            raise ManifestError(f"Opción desconocida '{key}' en {entry.get('pdf') or entry.get('pdf_file')}")
+        job[name] = value
+    # Indicar un idioma de destino (en el libro, en los defaults o con --target-language)
+    # implica traducir, salvo que se diga lo contrario
+    if "target_language" in merged and "translate" not in merged and "translate_to_spanish" not in merged:
+        job["translate_to_spanish"] = True
+    for required in ("pdf_file", "output_dir"):
+        if not job.get(required):
+            raise ManifestError(f"Falta '{required}' en {entry}")
+    return job
+
+
+def build_jobs(args):
+    """Trabajos a ejecutar según la línea de comandos; devuelve (trabajos, workers)."""
+    creator_params = set(inspect.signature(_creator_class()).parameters)
+    # Las opciones de la línea de comandos valen para todos los libros
+    options = {
+        "start_page": args.start_page,
+        "end_page": args.end_page,
+        "target_language": args.target_language,
+        "translate_to_spanish": args.translate,
+        "voice": args.voice,
+        "tts_backend": args.tts_backend,
+        "translation_backend": args.translation_backend,
+        "streaming": args.streaming,
+        "resume": args.resume,
+        "incremental": args.incremental,
+    }
+    options = {key: value for key, value in options.items() if value is not None}
+    # Por defecto se reanuda lo interrumpido; el manifiesto, cada libro o --no-resume pueden cambiarlo
+    base = {"resume": True}
+    if args.manifest:
+        if args.pdf:
+            raise ManifestError("Indica un PDF o un manifiesto, no ambos")
+        manifest = load_manifest(args.manifest)
+        defaults = {**base, **(manifest.get("defaults") or {}), **options}
+        entries = manifest["jobs"]
+        workers = args.workers or manifest.get("workers") or 2
+    else:
+        if not args.pdf or not args.output:
+            raise ManifestError("Indica un PDF y un directorio de salida (-o), o un manifiesto (--manifest)")
+        defaults = {**base, **options}
+        entries = [{"pdf_file": args.pdf, "output_dir": args.output}]
+        workers = 1
+    if not entries:
+        raise ManifestError("El manifiesto no contiene libros")
+    jobs = [normalize_job(entry, defaults, creator_params) for entry in entries]
+    return jobs, workers
+
+
+def report_path(job, report_dir):
+    if report_dir:
+        return os.path.join(report_dir, f"{job_id(job)}.json")
+    return os.path.join(job["output_dir"], "informe.json")
+
+
+def write_json(path, data):
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(data, f, ensure_ascii=False, indent=1, default=str)
+
+
+class FailureCollector:
+    """Guarda los chunks que fallaron tras agotar sus reintentos, por trabajo."""
+
+    def __init__(self):
+        self.failures = []
+        self.retries = 0
+        self._lock = threading.Lock()
+
+    def __call__(self, event):
+        with self._lock:
+            if event["event"] == "chunk_synthesized" and event.get("error"):
+                self.failures.append({"chars": event.get("chars"), "retries": event.get("retries", 0),
+                                      "error": event["error"]})
+            elif event["event"] == "call_retry":
+                self.retries += 1
+
+
+def run_jobs(jobs, workers, args):
+    """Ejecuta los trabajos con el JobScheduler y escribe un informe JSON por trabajo."""
+    creator_class = _creator_class()
+    collectors = {}
+
+    def factory(**job):
+        creator = creator_class(**job)
+        collector = collectors[os.path.abspath(job["output_dir"])] = FailureCollector()
+        creator.events.subscribe(collector)
+        return creator
+
+    def on_job_done(creator, report):
+        collector = collectors.get(os.path.abspath(report["output_dir"]))
+        report["failed_chunks"] = collector.failures if collector else []
+        report["retries"] = collector.retries if collector else 0
+        if creator is not None:
+            report["stages"] = creator.metrics.summary()["stages"]
+            if report["status"] != "done" and creator.manifest:
+                # Lo que queda para la próxima ejecución (con resume)
+                report["pending_chunks"] = len(creator.manifest.pending())
+            if creator.cleaning_stats:
+                report["chars_removed"] = creator.cleaning_stats["chars_removed"]
+        job = next(j for j in jobs if os.path.abspath(j["output_dir"]) == os.path.abspath(report["output_dir"]))
+        path = report_path(job, args.report_dir)
+        write_json(path, report)
+        print(f"Informe de {report['pdf_file']}: {path}")
+
+    scheduler = JobScheduler(max_workers=workers, tts_limit=args.tts_limit,
+                             translation_limit=args.translation_limit, creator_factory=factory)
+    reports, summary = scheduler.run(jobs, on_job_done)
+    print_report(reports, summary)
+    if args.report_dir:
+        write_json(os.path.join(args.report_dir, "resumen.json"), {"summary": summary, "jobs": reports})
+    return EXIT_OK if summary["failed"] == 0 else EXIT_FAILED
+
+
+def dry_run(jobs, workers, args):
+    """Estima chunks y peticiones de cada trabajo sin llamar a ningún backend."""
+    creator_class = _creator_class()
+
+    def estimate(job):
+        report = {"id": job_id(job), "pdf_file": job["pdf_file"], "output_dir": job["output_dir"],
+                  "dry_run": True}
+        start = time.perf_counter()
+        try:
+            creator = creator_class(**job)
+            report.update(creator.estimate(args.sample_pages))
+            report["status"] = "estimated"
+        except Exception as e:
+            report["status"] = "failed"
+            report["error"] = f"{type(e).__name__}: {e}"
+        report["seconds"] = time.perf_counter() - start
+        return report
+
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        reports = list(executor.map(estimate, jobs))
+    for job, report in zip(jobs, reports):
+        if report["status"] == "failed":
+            print(f"[failed] {report['pdf_file']}  ({report['error']})")
+            continue
+        exact = "" if report["exact"] else f" (estimado con {report['sampled_pages']} páginas)"
+        print(f"[plan] {report['pdf_file']} → {report['output_dir']}  {report['pages']} páginas, "
+              f"~{report['chars']} caracteres, ~{report['chunks']} chunks, "
+              f"{report['tts_requests']} peticiones TTS, {report['translation_requests']} de traducción, "
+              f"~{report['audio_minutes']:.0f} min de audio{exact}")
+        if args.report_dir:
+            write_json(report_path(job, args.report_dir), report)
+    totals = {key: sum(r.get(key, 0) for r in reports)
+              for key in ("pages", "chars", "chunks", "tts_requests", "translation_requests", "audio_minutes")}
+    print(f"Total: {len(jobs)} libros, {totals['chunks']} chunks, {totals['tts_requests']} peticiones TTS, "
+          f"{totals['translation_requests']} de traducción, ~{totals['audio_minutes']:.0f} min de audio")
+    if args.report_dir:
+        write_json(os.path.join(args.report_dir, "resumen.json"), {"summary": totals, "jobs": reports})
+    return EXIT_OK if all(r["status"] != "failed" for r in reports) else EXIT_FAILED
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Crea audiolibros a partir de PDFs sin interfaz gráfica.")
+    parser.add_argument("pdf", nargs="?", help="PDF de un único libro")
+    parser.add_argument("-o", "--output", help="Directorio de salida del libro")
+    parser.add_argument("-m", "--manifest", help="Manifiesto JSON o YAML con varios libros")
+    parser.add_argument("--start-page", type=int, help="Primera página (0 es la primera del PDF)")
+    parser.add_argument("--end-page", type=int, help="Página final, sin incluir")
+    parser.add_argument("--translate", action="store_true", default=None, help="Traducir antes de sintetizar")
+    parser.add_argument("--target-language", help="Idioma de destino de la traducción (implica --translate)")
+    parser.add_argument("--voice")
+    parser.add_argument("--tts-backend")
+    parser.add_argument("--translation-backend")
+    parser.add_argument("--streaming", action="store_true", default=None)
+    parser.add_argument("--no-resume", dest="resume", action="store_false", default=None,
+                        help="Empezar de cero aunque haya un trabajo interrumpido")
+    parser.add_argument("--incremental", action="store_true", default=None,
+                        help="Rehacer solo los chunks que cambiaron respecto a la versión anterior del libro")
+    parser.add_argument("-w", "--workers", type=int, help="Libros en paralelo (por defecto 2 con manifiesto)")
+    parser.add_argument("--tts-limit", type=int, default=16, help="Peticiones TTS simultáneas entre todos los libros")
+    parser.add_argument("--translation-limit", type=int, default=8)
+    parser.add_argument("--report-dir", help="Directorio de los informes JSON (por defecto, informe.json en cada salida)")
+    parser.add_argument("--dry-run", action="store_true", help="Solo estimar chunks y peticiones")
+    parser.add_argument("--sample-pages", type=int, default=10,
+                        help="Páginas leídas por libro en --dry-run (0 = todas, estimación exacta)")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    try:
+        jobs, workers = build_jobs(args)
+        if args.dry_run:
+            return dry_run(jobs, workers, args)
+        return run_jobs(jobs, workers, args)
+    except ManifestError as e:
+        print(f"Error: {e}", file=sys.stderr)
+        return EXIT_USAGE
+    except ValueError as e:
+        # Backends desconocidos, salidas repetidas...
+        print(f"Error: {e}", file=sys.stderr)
+        return EXIT_USAGE
+    except KeyboardInterrupt:
+        print("Interrumpido; vuelve a ejecutar para reanudar los libros pendientes", file=sys.stderr)
+        return EXIT_INTERRUPTED
+
+
+if __name__ == "__main__":
+    sys.exit(main())
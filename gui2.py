@@ -1,133 +1,8 @@
 import tkinter as tk
 from tkinter import ttk, filedialog, messagebox
-import threading
-import os
-import pdfplumber
-import edge_tts
-import subprocess
-import asyncio
-from googletrans import Translator
 
-# Clase para procesamiento de audio
-class AudioBookCreator:
-    def __init__(self, pdf_file, output_dir, start_page=None, end_page=None, chunk_size=500, translate_to_spanish=False, target_language='es'):
-        self.pdf_file = pdf_file
-        self.output_dir = output_dir
-        self.start_page = start_page
-        self.end_page = end_page
-        self.chunk_size = chunk_size
-        self.translate_to_spanish = translate_to_spanish
-        self.target_language = target_language
-        self.translator = Translator()
-        self.progress_callback = None
-
-    def set_progress_callback(self, callback):
-        self.progress_callback = callback
-
-    def extract_text_from_pdf(self):
-        text = ""
-        try:
-            with pdfplumber.open(self.pdf_file) as pdf:
-                total_pages = len(pdf.pages)
-                print(f"El PDF '{self.pdf_file}' tiene {total_pages} páginas.")
-
-                if self.start_page is None:
-                    self.start_page = 0
-                if self.end_page is None or self.end_page > total_pages:
-                    self.end_page = total_pages
-
-                for i in range(self.start_page, self.end_page):
-                    page_text = pdf.pages[i].extract_text()
-                    if page_text:
-                        text += page_text
-            return text
-        except Exception as e:
-            print(f"Error extrayendo texto del PDF: {e}")
-            return None
-
-    def split_text(self, text):
-        return [text[i:i+self.chunk_size] for i in range(0, len(text), self.chunk_size)]
-
-    def translate_text(self, text):
-        if self.translate_to_spanish:
-            try:
-                translated = self.translator.translate(text, src='auto', dest=self.target_language)
-                return translated.text
-            except Exception as e:
-                print(f"Error traduciendo el texto: {e}")
-                return text
-        return text
-
-    async def text_to_speech(self, text, output_file):
-        try:
-            communicate = edge_tts.Communicate(text, "es-ES-AlvaroNeural")
-            await communicate.save(output_file)
-        except Exception as e:
-            print(f"Error convirtiendo texto a voz: {e}")
-
-    def create_audiobook(self):
-        text = self.extract_text_from_pdf()
-        if not text:
-            return
-
-        if self.progress_callback:
-            self.progress_callback(10)  # Progreso después de extraer texto
-
-        text = self.translate_text(text)
-        if self.progress_callback:
-            self.progress_callback(20)  # Progreso después de traducir
-
-        chunks = self.split_text(text)
-        if self.progress_callback:
-            self.progress_callback(25)  # Progreso después de dividir texto
-
-        total_chunks = len(chunks)
-        chunk_step = 70 / total_chunks if total_chunks else 0
-        current_progress = 25
-        audio_files = []
-
-        for i, chunk in enumerate(chunks):
-            chunk_file = f"temp_chunk_{i}.mp3"
-            asyncio.run(self.text_to_speech(chunk, chunk_file))
-            audio_files.append(chunk_file)
-            current_progress += chunk_step
-            if self.progress_callback:
-                self.progress_callback(current_progress)
-
-        # Crear lista para FFmpeg
-        list_file = "file_list.txt"
-        with open(list_file, "w") as f:
-            for file in audio_files:
-                f.write(f"file '{file}'\n")
-
-        # Concatenar con FFmpeg
-        output_file = os.path.join(self.output_dir, "audiolibro.mp3")
-        command = [
-            "ffmpeg",
-            "-f", "concat",
-            "-safe", "0",
-            "-i", list_file,
-            "-c", "copy",
-            output_file,
-            "-y"
-        ]
-
-        try:
-            subprocess.run(command, check=True)
-            if self.progress_callback:
-                self.progress_callback(95)
-        except subprocess.CalledProcessError as e:
-            print(f"Error al concatenar audios: {e}")
-        finally:
-            # Limpiar archivos temporales
-            for file in audio_files + [list_file]:
-                try:
-                    os.remove(file)
-                except Exception as e:
-                    print(f"Error eliminando {file}: {e}")
-
-        if self.progress_callback:
-            self.progress_callback(100)
+import startup
+from gui_jobs import JobsPanel
 
 # Clase para la interfaz gráfica
 class AudiobookGUI:
@@ -136,8 +11,7 @@ class AudiobookGUI:
         self.root.title("Creador de Audiolibros")
         self.root.geometry("800x600")
         self.setup_ui()
-        self.current_processes = []
-        self.progress_bars = {}
+        self.root.protocol("WM_DELETE_WINDOW", self.on_close)
 
     def setup_ui(self):
         style = ttk.Style()
@@ -179,16 +53,20 @@ class AudiobookGUI:
         self.translate_var = tk.BooleanVar()
         ttk.Checkbutton(main_frame, text="Traducir a Español", variable=self.translate_var).pack(anchor=tk.W, pady=5)
 
+        # Reanudar desde el último chunk completado si el trabajo se interrumpió
+        self.resume_var = tk.BooleanVar(value=True)
+        ttk.Checkbutton(main_frame, text="Reanudar trabajo interrumpido", variable=self.resume_var).pack(anchor=tk.W, pady=5)
+
+        # Reproducción progresiva
+        self.progressive_var = tk.BooleanVar()
+        ttk.Checkbutton(main_frame, text="Reproducir mientras se genera", variable=self.progressive_var).pack(anchor=tk.W, pady=5)
+
         # Botón principal
         ttk.Button(main_frame, text="Crear Audiolibro", command=self.start_processing).pack(pady=20)
 
-        # Consola de estado
-        self.status_text = tk.Text(main_frame, height=10, state=tk.DISABLED)
-        self.status_text.pack(fill=tk.BOTH, expand=True)
-        
-        # Barra de progreso
-        self.progress = ttk.Progressbar(main_frame, orient=tk.HORIZONTAL, mode='determinate')
-        self.progress.pack(fill=tk.X, pady=10)
+        # Un libro por fila, con su progreso, ETA y botón de cancelar, y la consola de estado
+        self.jobs = JobsPanel(main_frame, on_finished=self.job_finished)
+        self.jobs.pack(fill=tk.BOTH, expand=True)
 
     def browse_pdf(self):
         filepath = filedialog.askopenfilename(filetypes=[("PDF Files", "*.pdf")])
@@ -201,34 +79,33 @@ class AudiobookGUI:
             self.output_dir.set(dirpath)
 
     def log_message(self, message):
-        self.status_text.configure(state=tk.NORMAL)
-        self.status_text.insert(tk.END, message + "\n")
-        self.status_text.see(tk.END)
-        self.status_text.configure(state=tk.DISABLED)
-
-    def update_progress(self, value):
-        self.root.after(0, self._set_progress, value)
-
-    def _set_progress(self, value):
-        self.progress['value'] = value
-        self.root.update_idletasks()
+        # Se puede llamar desde cualquier hilo: la línea se pinta en el siguiente vaciado de la cola
+        self.jobs.events.log(message)
 
     def start_processing(self):
         if not self.validate_inputs():
             return
-        
-        self.progress['value'] = 0
+        try:
+            start_page = int(self.start_page.get()) if self.start_page.get() else None
+            end_page = int(self.end_page.get()) if self.end_page.get() else None
+        except ValueError:
+            messagebox.showerror("Error", "Las páginas deben ser números enteros")
+            return
 
         params = {
             "pdf_file": self.pdf_path.get(),
             "output_dir": self.output_dir.get(),
-            "start_page": self.start_page.get() or None,
-            "end_page": self.end_page.get() or None,
-            "translate_to_spanish": self.translate_var.get()
+            "start_page": start_page,
+            "end_page": end_page,
+            "translate_to_spanish": self.translate_var.get(),
+            "resume": self.resume_var.get(),
+            "progressive": self.progressive_var.get()
         }
-
-        processing_thread = threading.Thread(target=self.run_processing, args=(params,))
-        processing_thread.start()
+        # Se pueden encolar varios libros; se procesan en paralelo según el cupo del panel
+        try:
+            self.jobs.submit(params)
+        except ValueError as e:
+            messagebox.showerror("Error", str(e))
 
     def validate_inputs(self):
         required_fields = [
@@ -241,30 +118,22 @@ class AudiobookGUI:
                 return False
         return True
 
-    def run_processing(self, params):
-        try:
-            self.log_message("Iniciando procesamiento...")
-            start_page = int(params["start_page"]) if params["start_page"] else None
-            end_page = int(params["end_page"]) if params["end_page"] else None
-            
-            processor = AudioBookCreator(
-                pdf_file=params["pdf_file"],
-                output_dir=params["output_dir"],
-                start_page=start_page,
-                end_page=end_page,
-                translate_to_spanish=params["translate_to_spanish"]
-            )
-            
-            processor.set_progress_callback(lambda value: self.update_progress(value))
-            processor.create_audiobook()
-            
-            self.log_message("¡Proceso completado!")
-            messagebox.showinfo("Éxito", "Audiolibro creado correctamente")
-        except Exception as e:
-            self.log_message(f"Error: {str(e)}")
-            messagebox.showerror("Error", f"Error: {str(e)}")
+    def job_finished(self, row, status, detail):
+        # Se llama desde el bucle de Tk, no desde el hilo del trabajo
+        if status == "done":
+            messagebox.showinfo("Éxito", f"Audiolibro creado correctamente: {row.name}")
+        elif status == "failed":
+            messagebox.showerror("Error", f"Error en {row.name}: {detail or 'el trabajo no se completó'}")
+
+    def on_close(self):
+        if self.jobs.active_jobs() and not messagebox.askyesno(
+                "Salir", "Hay libros en proceso. ¿Cancelarlos y salir? Se podrán reanudar más tarde."):
+            return
+        self.jobs.close()
+        self.root.destroy()
 
 if __name__ == "__main__":
     root = tk.Tk()
     app = AudiobookGUI(root)
+    startup.preload(root)
     root.mainloop()
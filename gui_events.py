@@ -0,0 +1,113 @@
+import queue
+import time
+
+# Cada cuánto vacía la interfaz la cola de eventos
+DRAIN_INTERVAL_MS = 100
+
+# Eventos como máximo por vaciado: si los hilos producen más, el resto espera al siguiente
+MAX_EVENTS_PER_DRAIN = 5000
+
+# Líneas que conserva la consola de estado
+MAX_LOG_LINES = 1000
+
+
+class UiBatch:
+    """Lo acumulado en la cola desde el último vaciado, ya agrupado."""
+
+    def __init__(self):
+        self.lines = []
+        # Solo el último progreso de cada trabajo: (porcentaje, eta)
+        self.progress = {}
+        # Cambios de estado de cada trabajo, en orden: (trabajo, estado, detalle)
+        self.states = []
+        self.calls = []
+        self.events = 0
+
+    def __bool__(self):
+        return bool(self.events)
+
+
+class UiEventQueue:
+    """Cola segura entre hilos entre los trabajos y la interfaz de Tk.
+
+    Tk no admite que otros hilos toquen sus widgets, así que los hilos de
+    trabajo solo encolan y el bucle de Tk vacía la cola con un temporizador
+    (`pump`). Al vaciar se agrupan los eventos: de cada trabajo solo se
+    aplica el último progreso y las líneas de log se insertan de una vez, de
+    modo que el coste para la interfaz depende del intervalo de vaciado y no
+    de cuántos eventos por segundo produzcan los trabajos.
+    """
+
+    def __init__(self, max_events=MAX_EVENTS_PER_DRAIN):
+        self._queue = queue.SimpleQueue()
+        self.max_events = max_events
+        self.received = 0
+        self.drains = 0
+
+    def log(self, message):
+        self._queue.put(("log", message))
+
+    def progress(self, job, percent, eta=None):
+        self._queue.put(("progress", job, percent, eta))
+
+    def state(self, job, status, detail=None):
+        self._queue.put(("state", job, status, detail))
+
+    def call(self, fn, *args):
+        """Ejecuta `fn(*args)` en el hilo de Tk (diálogos, por ejemplo)."""
+        self._queue.put(("call", fn, args))
+
+    def pending(self):
+        return self._queue.qsize()
+
+    def drain(self):
+        """Saca lo pendiente (hasta `max_events`) y lo devuelve agrupado en un UiBatch."""
+        batch = UiBatch()
+        while batch.events < self.max_events:
+            try:
+                item = self._queue.get_nowait()
+            except queue.Empty:
+                break
+            batch.events += 1
+            kind = item[0]
+            if kind == "progress":
+                batch.progress[item[1]] = item[2:]
+            elif kind == "log":
+                batch.lines.append(item[1])
+            elif kind == "state":
+                # Se aplican después del progreso: un trabajo terminado no vuelve a un porcentaje anterior
+                batch.states.append(item[1:])
+            else:
+                batch.calls.append(item[1:])
+        self.received += batch.events
+        self.drains += 1
+        return batch
+
+
+def pump(root, events, apply, interval_ms=DRAIN_INTERVAL_MS):
+    """Vacía `events` cada `interval_ms` desde el bucle de Tk y pasa cada UiBatch a `apply`.
+
+    Devuelve una función que detiene el temporizador.
+    """
+    pending = [None]
+
+    def tick():
+        started = time.perf_counter()
+        batch = events.drain()
+        if batch:
+            try:
+                apply(batch)
+            except Exception as e:
+                # Un fallo al pintar no debe parar el temporizador
+                print(f"Error actualizando la interfaz: {e}")
+        # Si pintar tardó, se espera algo más: la ventana sigue atendiendo al usuario
+        elapsed_ms = (time.perf_counter() - started) * 1000
+        pending[0] = root.after(max(interval_ms, int(2 * elapsed_ms)), tick)
+
+    def stop():
+        if pending[0] is not None:
+            root.after_cancel(pending[0])
+            pending[0] = None
+
+    pending[0] = root.after(interval_ms, tick)
+    return stop
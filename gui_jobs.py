@@ -0,0 +1,200 @@
+import os
+import tkinter as tk
+from tkinter import ttk
+
+import startup
+from gui_events import MAX_LOG_LINES, UiEventQueue, pump
+from instrumentation import format_eta
+
+STATUS_LABELS = {
+    "queued": "En cola",
+    "running": "En curso",
+    "cancelling": "Cancelando…",
+    "done": "Completado",
+    "failed": "Error",
+    "cancelled": "Cancelado",
+}
+FINAL_STATES = ("done", "failed", "cancelled")
+
+
+class JobRow:
+    """Fila de un libro en el panel: nombre, barra de progreso, ETA y botón de cancelar."""
+
+    def __init__(self, parent, index, name, on_cancel):
+        self.name = name
+        self.status = "queued"
+        self.output_dir = None
+        self.future = None
+        self.creator = None
+        self.cancel_requested = False
+        ttk.Label(parent, text=name, width=30, anchor=tk.W).grid(row=index, column=0, sticky=tk.W, padx=(0, 5))
+        self.bar = ttk.Progressbar(parent, orient=tk.HORIZONTAL, mode="determinate")
+        self.bar.grid(row=index, column=1, sticky=tk.EW, pady=2)
+        self.eta_var = tk.StringVar(value=STATUS_LABELS["queued"])
+        ttk.Label(parent, textvariable=self.eta_var, width=28, anchor=tk.W).grid(row=index, column=2, padx=5)
+        self.cancel_button = ttk.Button(parent, text="Cancelar", command=on_cancel)
+        self.cancel_button.grid(row=index, column=3)
+
+    @property
+    def finished(self):
+        return self.status in FINAL_STATES
+
+
+class JobsPanel(ttk.Frame):
+    """Cola de libros con una fila por trabajo y una consola de estado.
+
+    Los libros se ejecutan en paralelo con el JobScheduler (`max_workers` a la
+    vez, con los cupos de TTS y traducción compartidos). Los hilos de trabajo
+    nunca tocan los widgets: todo pasa por `self.events`, que el bucle de Tk
+    vacía con un temporizador. `on_finished(row, status, detail)` se llama en
+    el hilo de Tk cuando termina cada libro.
+    """
+
+    def __init__(self, parent, max_workers=2, on_finished=None):
+        super().__init__(parent)
+        self.max_workers = max_workers
+        self.on_finished = on_finished
+        self.events = UiEventQueue()
+        self.rows = {}
+        # Directorio de salida → fila, solo de los trabajos que no han terminado
+        self._active = {}
+        self._scheduler = None
+
+        self.jobs_frame = ttk.Frame(self)
+        self.jobs_frame.pack(fill=tk.X, pady=5)
+        self.jobs_frame.columnconfigure(1, weight=1)
+
+        self.status_text = tk.Text(self, height=10, state=tk.DISABLED)
+        self.status_text.pack(fill=tk.BOTH, expand=True)
+
+        self._stop_pump = pump(self.winfo_toplevel(), self.events, self.apply)
+
+    @property
+    def scheduler(self):
+        if self._scheduler is None:
+            # El scheduler arrastra asyncio: se importa con el primer trabajo, no al abrir la ventana
+            from scheduler import JobScheduler
+            self._scheduler = JobScheduler(max_workers=self.max_workers,
+                                           creator_factory=self._create_creator)
+        return self._scheduler
+
+    def active_jobs(self):
+        return [key for key, row in self.rows.items() if not row.finished]
+
+    def submit(self, params):
+        """Encola un libro con los argumentos de AudioBookCreator; devuelve su clave en `rows`."""
+        output_dir = os.path.abspath(params["output_dir"])
+        if output_dir in self._active:
+            raise ValueError(f"Ya hay un trabajo en curso que escribe en {params['output_dir']}")
+        key = len(self.rows)
+        row = JobRow(self.jobs_frame, key, os.path.basename(params["pdf_file"]),
+                     lambda: self.cancel(key))
+        row.output_dir = output_dir
+        self.rows[key] = row
+        self._active[output_dir] = key
+        self.log_lines([f"[{row.name}] En cola"])
+        row.future = self.scheduler.submit(params, lambda creator, report: self._job_done(key, report))
+        return key
+
+    def cancel(self, key):
+        row = self.rows[key]
+        if row.finished or row.cancel_requested:
+            return
+        row.cancel_requested = True
+        if row.future.cancel():
+            # Aún no había empezado: no llega a ejecutarse
+            self.events.state(key, "cancelled")
+            return
+        # Si el creator todavía no existe, `_create_creator` verá la petición al crearlo
+        creator = row.creator
+        if creator is not None:
+            creator.cancel()
+        self.events.state(key, "cancelling")
+
+    def close(self):
+        """Cancela todos los trabajos y detiene el temporizador (antes de destruir la ventana)."""
+        for key in self.active_jobs():
+            self.cancel(key)
+        self._stop_pump()
+        if self._scheduler:
+            self._scheduler.shutdown(wait=False)
+
+    # --- Hilos de trabajo: solo encolan eventos --------------------------
+
+    def _create_creator(self, **job):
+        key = self._active[os.path.abspath(job["output_dir"])]
+        row = self.rows[key]
+        self.events.state(key, "running")
+        # El pipeline se importa en el primer trabajo (o en la precarga), no al abrir la ventana
+        AudioBookCreator = startup.load_creator()
+        creator = AudioBookCreator(**job)
+        creator.set_progress_callback(lambda percent, eta: self.events.progress(key, percent, eta))
+        creator.events.subscribe(self._job_logger(row.name))
+        row.creator = creator
+        if row.cancel_requested:
+            creator.cancel()
+        return creator
+
+    def _job_logger(self, name):
+        def on_event(event):
+            kind = event["event"]
+            if kind == "chunk_synthesized" and event.get("error"):
+                self.events.log(f"[{name}] Chunk fallido: {event['error']}")
+            elif kind == "call_retry" and event.get("throttled"):
+                self.events.log(f"[{name}] {event['backend']} limita las peticiones; "
+                                f"reintento en {event['delay']:.1f}s")
+        return on_event
+
+    def _job_done(self, key, report):
+        self.events.state(key, report["status"], report.get("error"))
+
+    # --- Hilo de Tk ------------------------------------------------------
+
+    def apply(self, batch):
+        """Aplica a los widgets un UiBatch de la cola (lo llama `pump`)."""
+        if batch.lines:
+            self.log_lines(batch.lines)
+        for key, (percent, eta) in batch.progress.items():
+            row = self.rows[key]
+            if row.finished:
+                continue
+            row.bar["value"] = percent
+            if row.status == "running":
+                row.eta_var.set(f"{percent:.0f}% — quedan {format_eta(eta)}")
+        for key, status, detail in batch.states:
+            self._set_state(key, status, detail)
+        for fn, args in batch.calls:
+            fn(*args)
+
+    def _set_state(self, key, status, detail):
+        row = self.rows[key]
+        if row.finished:
+            return
+        if status == "running" and row.cancel_requested:
+            status = "cancelling"
+        row.status = status
+        row.eta_var.set(STATUS_LABELS.get(status, status))
+        if not row.finished:
+            if status == "running":
+                self.log_lines([f"[{row.name}] Iniciando procesamiento..."])
+            return
+        self._active.pop(row.output_dir, None)
+        row.cancel_button.state(["disabled"])
+        if status == "done":
+            row.bar["value"] = 100
+        message = f"[{row.name}] {STATUS_LABELS[status]}"
+        self.log_lines([f"{message}: {detail}" if detail else message])
+        if self.on_finished:
+            # Fuera del vaciado: un diálogo modal no debe detener el temporizador de la cola
+            self.after_idle(self.on_finished, row, status, detail)
+
+    def log_lines(self, lines):
+        # Una sola inserción por lote y la consola acotada a MAX_LOG_LINES líneas
+        lines = lines[-MAX_LOG_LINES:]
+        self.status_text.configure(state=tk.NORMAL)
+        self.status_text.insert(tk.END, "\n".join(lines) + "\n")
+        excess = int(self.status_text.index("end-1c").split(".")[0]) - 1 - MAX_LOG_LINES
+        if excess > 0:
+            self.status_text.delete("1.0", f"{excess + 1}.0")
+        self.status_text.see(tk.END)
+        self.status_text.configure(state=tk.DISABLED)
@@ -0,0 +1,112 @@
+"""Reconstrucción incremental: al rehacer un libro se reutiliza el audio de los chunks que no cambiaron.
+
+Se activa con `AudioBookCreator(incremental=True)`. Tras cada construcción
+se guarda junto a la salida la lista de chunks del texto de origen y el
+tramo del MP3 que ocupa el audio de cada uno. Con un PDF corregido solo los
+chunks nuevos o modificados pasan por traducción y TTS; el resto se copia
+trama a trama de la versión anterior.
+"""
+import json
+import os
+import tempfile
+import time
+
+BUILD_NAME = "audiolibro.build.json"
+BUILD_VERSION = 1
+
+# Con posprocesado el audiolibro está recodificado y sus tramas ya no
+# corresponden a los chunks: se conserva aparte la unión sin procesar
+BASE_NAME = ".audiolibro.base.mp3"
+
+
+class BuildRecord:
+    """Chunks de la última versión construida del libro y dónde está el audio de cada uno.
+
+    Cada sección es un chunk del texto de origen (cortado con
+    `TextChunker.split_stable`, así que sus límites no se mueven con las
+    ediciones) con su hash y los chunks de audio que salieron de él: el
+    texto sintetizado y el tramo de bytes (y tramas) que ocupa en el MP3 de
+    base. Si todas las tramas de la base miden lo mismo (`frame_bytes`), el
+    audio reutilizado se une sin volver a analizarlo trama a trama. El MP3
+    de base se reconoce por su tamaño y fecha de modificación; si se ha
+    sustituido, la lista deja de valer y el libro se construye entero.
+    """
+
+    def __init__(self, path, data):
+        self.path = path
+        self.data = data
+
+    @classmethod
+    def load(cls, output_dir, params):
+        """La lista de la versión anterior si sigue valiendo para `params`; si no, None."""
+        path = os.path.join(output_dir, BUILD_NAME)
+        if not os.path.exists(path):
+            return None
+        try:
+            with open(path, encoding="utf-8") as f:
+                data = json.load(f)
+        except (OSError, ValueError) as e:
+            print(f"Lista de chunks anterior ilegible, se construye el libro entero: {e}")
+            return None
+        if data.get("version") != BUILD_VERSION or data.get("params") != params:
+            print("La versión anterior usaba otros parámetros; se construye el libro entero.")
+            return None
+        record = cls(path, data)
+        try:
+            stat = os.stat(record.base_file)
+        except OSError:
+            stat = None
+        if stat is None or [stat.st_size, stat.st_mtime_ns] != [data["base_size"], data["base_mtime_ns"]]:
+            print(f"El audio de la versión anterior ({data['base']}) falta o ha cambiado; "
+                  f"se construye el libro entero.")
+            return None
+        return record
+
+    @property
+    def base_file(self):
+        return os.path.join(os.path.dirname(self.path), self.data["base"])
+
+    @property
+    def frame_bytes(self):
+        return self.data.get("frame_bytes")
+
+    def sections_by_hash(self):
+        """{hash del chunk de origen: [{"text", "offset", "bytes", "frames"}, ...]}"""
+        return {section["hash"]: section["pieces"] for section in self.data["sections"]}
+
+    @classmethod
+    def save(cls, output_dir, params, base_file, sections, frame_bytes=None):
+        """Escribe la lista de la versión recién construida.
+
+        `sections` son (hash, caracteres, [(texto, offset, bytes, tramas), ...]) en orden.
+        """
+        stat = os.stat(base_file)
+        data = {
+            "version": BUILD_VERSION,
+            "params": params,
+            "built": time.time(),
+            "base": os.path.basename(base_file),
+            "base_size": stat.st_size,
+            "base_mtime_ns": stat.st_mtime_ns,
+            "frame_bytes": frame_bytes,
+            "sections": [
+                {"hash": digest, "chars": chars,
+                 "pieces": [{"text": text, "offset": offset, "bytes": length, "frames": frames}
+                            for text, offset, length, frames in pieces]}
+                for digest, chars, pieces in sections
+            ],
+        }
+        path = os.path.join(output_dir, BUILD_NAME)
+        fd, tmp_path = tempfile.mkstemp(dir=output_dir, suffix=".tmp")
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            json.dump(data, f, ensure_ascii=False)
+        os.replace(tmp_path, path)
+        return cls(path, data)
+
+    @staticmethod
+    def remove(output_dir):
+        for name in (BUILD_NAME, BASE_NAME):
+            try:
+                os.remove(os.path.join(output_dir, name))
+            except FileNotFoundError:
+                pass
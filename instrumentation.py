@@ -0,0 +1,286 @@
+import json
+import threading
+import time
+import traceback
+from contextlib import contextmanager
+
+# Etapas del pipeline y el evento que marca cada unidad de trabajo terminada
+STAGE_EVENTS = {
+    "extract": "page_extracted",
+    "translate": "translate_batch",
+    "synthesize": "chunk_synthesized",
+    "merge": "merge_chunk",
+}
+
+# Coste inicial supuesto (segundos de reloj por carácter, con la concurrencia por
+# defecto) hasta medir el ritmo real de cada etapa
+PRIOR_SECONDS_PER_CHAR = {
+    "extract": 1 / 20000,
+    "translate": 1 / 10000,
+    "synthesize": 1 / 3000,
+}
+
+
+class EventBus:
+    """Reparte eventos estructurados (dicts) entre los suscriptores.
+
+    Cada evento lleva su nombre en "event" y en "t" los segundos desde que se
+    creó el bus. Los suscriptores se llaman en el hilo que emite, así que deben
+    ser rápidos; un suscriptor que falla no interrumpe el trabajo.
+    """
+
+    def __init__(self, clock=time.monotonic):
+        self.clock = clock
+        self.started_at = clock()
+        self._subscribers = []
+        self._lock = threading.Lock()
+
+    def subscribe(self, callback):
+        """Registra `callback(event)` y devuelve la función que lo da de baja."""
+        with self._lock:
+            self._subscribers.append(callback)
+
+        def unsubscribe():
+            with self._lock:
+                if callback in self._subscribers:
+                    self._subscribers.remove(callback)
+        return unsubscribe
+
+    def emit(self, event, **fields):
+        fields["event"] = event
+        fields["t"] = self.clock() - self.started_at
+        with self._lock:
+            subscribers = list(self._subscribers)
+        for callback in subscribers:
+            try:
+                callback(fields)
+            except Exception:
+                traceback.print_exc()
+        return fields
+
+    @contextmanager
+    def timed(self, event, **fields):
+        """Emite `event` al salir del bloque con su duración en "seconds".
+
+        El bloque recibe el dict de campos para completarlo (bytes, chars...).
+        """
+        start = self.clock()
+        try:
+            yield fields
+        finally:
+            fields["seconds"] = self.clock() - start
+            self.emit(event, **fields)
+
+
+class JsonLinesLog:
+    """Suscriptor que escribe cada evento como una línea JSON."""
+
+    def __init__(self, path):
+        self.path = path
+        self._file = open(path, "a", encoding="utf-8")
+        self._lock = threading.Lock()
+
+    def __call__(self, event):
+        line = json.dumps(event, ensure_ascii=False, default=str)
+        with self._lock:
+            self._file.write(line + "\n")
+            self._file.flush()
+
+    def close(self):
+        with self._lock:
+            self._file.close()
+
+
+class MetricsCollector:
+    """Agrega los eventos por etapa: unidades, tiempo ocupado, intervalo de reloj, bytes, caracteres y reintentos."""
+
+    def __init__(self):
+        self.stages = {stage: {"count": 0, "busy_seconds": 0.0, "first": None, "last": None,
+                               "chars": 0, "bytes": 0, "retries": 0, "cached": 0}
+                       for stage in STAGE_EVENTS}
+        self.max_queue_depth = {}
+        # Unidades de cada etapa que pueden estar en curso a la vez (llega en job_start)
+        self.concurrency = {stage: 1 for stage in STAGE_EVENTS}
+        self._event_stage = {event: stage for stage, event in STAGE_EVENTS.items()}
+        self._lock = threading.Lock()
+
+    def __call__(self, event):
+        with self._lock:
+            if event["event"] == "job_start":
+                self.concurrency.update(event.get("concurrency", {}))
+                return
+            if event["event"] == "queue_depth":
+                for name, depth in event["depths"].items():
+                    self.max_queue_depth[name] = max(self.max_queue_depth.get(name, 0), depth)
+                return
+            stage = self._event_stage.get(event["event"])
+            if stage is None:
+                return
+            metrics = self.stages[stage]
+            seconds = event.get("seconds", 0.0)
+            metrics["count"] += 1
+            metrics["busy_seconds"] += seconds
+            start = event["t"] - seconds
+            metrics["first"] = start if metrics["first"] is None else min(metrics["first"], start)
+            metrics["last"] = event["t"] if metrics["last"] is None else max(metrics["last"], event["t"])
+            for key in ("chars", "bytes", "retries"):
+                metrics[key] += event.get(key, 0)
+            metrics["cached"] += bool(event.get("cached"))
+
+    def summary(self):
+        """Métricas por etapa.
+
+        `wall_seconds` es el intervalo entre la primera y la última unidad y
+        `load_seconds` el tiempo ocupado dividido por la concurrencia de la etapa:
+        lo mínimo que tardaría la etapa sola. Con etapas solapadas (streaming,
+        unión incremental) solo la segunda sirve para compararlas.
+        """
+        with self._lock:
+            result = {}
+            for stage, metrics in self.stages.items():
+                if not metrics["count"]:
+                    continue
+                wall = metrics["last"] - metrics["first"]
+                result[stage] = {
+                    "count": metrics["count"],
+                    "busy_seconds": metrics["busy_seconds"],
+                    "wall_seconds": wall,
+                    "load_seconds": metrics["busy_seconds"] / max(1, self.concurrency.get(stage, 1)),
+                    "chars": metrics["chars"],
+                    "bytes": metrics["bytes"],
+                    "retries": metrics["retries"],
+                    "cached": metrics["cached"],
+                    "chars_per_second": metrics["chars"] / wall if wall else 0.0,
+                }
+            return {"stages": result, "max_queue_depth": dict(self.max_queue_depth)}
+
+    def bottleneck(self):
+        """La etapa con más carga: la que más limita el ritmo del trabajo."""
+        stages = self.summary()["stages"]
+        if not stages:
+            return None
+        return max(stages, key=lambda stage: stages[stage]["load_seconds"])
+
+    def dump(self, path):
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(self.summary(), f, ensure_ascii=False, indent=1)
+
+
+class ProgressEstimator:
+    """Progreso y tiempo restante calculados con el ritmo medido de cada etapa.
+
+    El trabajo se mide en caracteres: la extracción avanza por páginas y el
+    total de caracteres se estima a partir de las páginas ya leídas hasta que
+    se conoce. Para cada etapa, el tiempo restante es lo que falta dividido por
+    su ritmo medido (o por `PRIOR_SECONDS_PER_CHAR` mientras no hay medidas).
+    En modo streaming las etapas se solapan y cuenta la más lenta; en modo
+    lote se suman.
+
+    `on_progress(percent, eta_seconds)` se llama tras cada evento relevante.
+    """
+
+    def __init__(self, on_progress=None, clock=time.monotonic):
+        self.on_progress = on_progress
+        self.clock = clock
+        self.percent = 0.0
+        self.eta = None
+        self._lock = threading.Lock()
+        self._reset()
+
+    def _reset(self):
+        self.started_at = self.clock()
+        self.streaming = False
+        self.stages = ["extract", "synthesize"]
+        self.total_pages = 0
+        self.pages_done = 0
+        self.chars_extracted = 0
+        self.total_chars = None
+        self.done_chars = {stage: 0 for stage in PRIOR_SECONDS_PER_CHAR}
+        self.first_at = {}
+        self.finished = False
+
+    def __call__(self, event):
+        kind = event["event"]
+        with self._lock:
+            if kind == "job_start":
+                self._reset()
+                self.streaming = event.get("streaming", False)
+                self.total_pages = event.get("pages", 0)
+                if event.get("translate"):
+                    self.stages = ["extract", "translate", "synthesize"]
+                return
+            now = self.clock()
+            if kind == "page_extracted":
+                self._mark("extract", now, event)
+                self.pages_done += 1
+                self.chars_extracted += event.get("chars", 0)
+                self.done_chars["extract"] += event.get("chars", 0)
+            elif kind == "chunks_planned":
+                self.total_chars = event["chars"]
+            elif kind == "translate_batch":
+                self._mark("translate", now, event)
+                self.done_chars["translate"] += event.get("chars", 0)
+            elif kind == "chunk_synthesized":
+                self._mark("synthesize", now, event)
+                self.done_chars["synthesize"] += event.get("chars", 0)
+            elif kind == "job_end":
+                self.finished = True
+            else:
+                return
+            self.percent, self.eta = self._estimate(now)
+            percent, eta = self.percent, self.eta
+        if self.on_progress:
+            self.on_progress(percent, eta)
+
+    def _mark(self, stage, now, event):
+        if stage not in self.first_at:
+            self.first_at[stage] = now - event.get("seconds", 0.0)
+
+    def _estimated_total_chars(self):
+        if self.total_chars is not None:
+            return self.total_chars
+        if not self.pages_done:
+            return None
+        return self.chars_extracted * max(self.total_pages, self.pages_done) / self.pages_done
+
+    def _remaining(self, stage, now, total_chars):
+        if stage == "extract":
+            if self.total_pages <= self.pages_done:
+                return 0.0
+            elapsed = now - self.first_at.get("extract", now)
+            per_page = elapsed / self.pages_done if self.pages_done else None
+            if not per_page:
+                return total_chars * PRIOR_SECONDS_PER_CHAR["extract"] if total_chars else 0.0
+            return (self.total_pages - self.pages_done) * per_page
+        left = max(0.0, total_chars - self.done_chars[stage])
+        done = self.done_chars[stage]
+        elapsed = now - self.first_at[stage] if stage in self.first_at else 0.0
+        if done and elapsed > 0:
+            return left * elapsed / done
+        return left * PRIOR_SECONDS_PER_CHAR[stage]
+
+    def _estimate(self, now):
+        if self.finished:
+            return 100.0, 0.0
+        total_chars = self._estimated_total_chars()
+        if not total_chars:
+            return self.percent, None
+        remaining = [self._remaining(stage, now, total_chars) for stage in self.stages]
+        eta = max(remaining) if self.streaming else sum(remaining)
+        elapsed = now - self.started_at
+        percent = 100.0 * elapsed / (elapsed + eta) if elapsed + eta > 0 else 0.0
+        # La estimación puede oscilar; la barra nunca retrocede
+        return max(self.percent, min(percent, 99.0)), eta
+
+
+def format_eta(seconds):
+    if seconds is None:
+        return "calculando..."
+    seconds = int(round(seconds))
+    hours, rest = divmod(seconds, 3600)
+    minutes, seconds = divmod(rest, 60)
+    if hours:
+        return f"{hours}h {minutes:02d}m"
+    if minutes:
+        return f"{minutes}m {seconds:02d}s"
+    return f"{seconds}s"
@@ -0,0 +1,167 @@
+import json
+import os
+import secrets
+import sqlite3
+import threading
+import time
+
+# Estados de un trabajo en la cola; los tres últimos son definitivos
+STATUSES = ("queued", "running", "cancelling", "done", "failed", "cancelled")
+FINAL_STATUSES = ("done", "failed", "cancelled")
+
+_COLUMNS = ("id", "params", "status", "created", "started", "finished", "attempts",
+            "progress", "eta", "output_file", "error", "report")
+
+
+class JobQueue:
+    """Cola persistente de trabajos en SQLite para el servicio HTTP.
+
+    Cada trabajo guarda los argumentos de `AudioBookCreator`, su estado, el
+    último progreso conocido y el informe final. Los trabajos que estaban en
+    marcha cuando el proceso se detuvo vuelven a la cola con `recover()` y,
+    como se ejecutan con `resume=True`, siguen desde el último chunk
+    terminado.
+    """
+
+    def __init__(self, db_path):
+        self.db_path = db_path
+        os.makedirs(os.path.dirname(os.path.abspath(db_path)), exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(db_path, timeout=30, check_same_thread=False)
+        self._conn.row_factory = sqlite3.Row
+        with self._conn:
+            # WAL permite leer el estado desde otro proceso mientras el servicio escribe
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS jobs ("
+                " id TEXT PRIMARY KEY,"
+                " params TEXT NOT NULL,"
+                " status TEXT NOT NULL,"
+                " created REAL NOT NULL,"
+                " started REAL,"
+                " finished REAL,"
+                " attempts INTEGER NOT NULL DEFAULT 0,"
+                " progress REAL NOT NULL DEFAULT 0,"
+                " eta REAL,"
+                " output_file TEXT,"
+                " error TEXT,"
+                " report TEXT)"
+            )
+            self._conn.execute("CREATE INDEX IF NOT EXISTS jobs_status ON jobs (status, created)")
+
+    @staticmethod
+    def new_id():
+        return secrets.token_hex(6)
+
+    def add(self, params, job_id=None):
+        """Encola un trabajo con los argumentos de AudioBookCreator y lo devuelve."""
+        job_id = job_id or self.new_id()
+        with self._lock, self._conn:
+            self._conn.execute(
+                "INSERT INTO jobs (id, params, status, created) VALUES (?, ?, 'queued', ?)",
+                (job_id, json.dumps(params, ensure_ascii=False), time.time()),
+            )
+        return self.get(job_id)
+
+    def claim(self):
+        """Pasa a "running" el trabajo más antiguo de la cola y lo devuelve; None si no hay."""
+        with self._lock, self._conn:
+            # Sin UPDATE ... RETURNING (SQLite 3.35+): BEGIN IMMEDIATE reserva la escritura antes
+            # de elegir, así que otro proceso no puede reclamar el mismo trabajo entre medias
+            self._conn.execute("BEGIN IMMEDIATE")
+            row = self._conn.execute(
+                "SELECT id FROM jobs WHERE status = 'queued' ORDER BY created LIMIT 1").fetchone()
+            if row is None:
+                return None
+            self._conn.execute(
+                "UPDATE jobs SET status = 'running', started = ?, attempts = attempts + 1, error = NULL"
+                " WHERE id = ? AND status = 'queued'",
+                (time.time(), row["id"]),
+            )
+            row = self._conn.execute("SELECT * FROM jobs WHERE id = ?", (row["id"],)).fetchone()
+        return _job(row)
+
+    def recover(self):
+        """Tras un reinicio: lo que estaba en marcha vuelve a la cola y lo que se estaba cancelando se da por cancelado."""
+        now = time.time()
+        with self._lock, self._conn:
+            requeued = self._conn.execute(
+                "UPDATE jobs SET status = 'queued' WHERE status = 'running'").rowcount
+            self._conn.execute(
+                "UPDATE jobs SET status = 'cancelled', finished = ? WHERE status = 'cancelling'", (now,))
+        return requeued
+
+    def set_progress(self, job_id, progress, eta):
+        with self._lock, self._conn:
+            self._conn.execute("UPDATE jobs SET progress = ?, eta = ? WHERE id = ?", (progress, eta, job_id))
+
+    def finish(self, job_id, status, output_file=None, error=None, report=None):
+        progress_sql = ", progress = 100, eta = 0" if status == "done" else ""
+        with self._lock, self._conn:
+            self._conn.execute(
+                f"UPDATE jobs SET status = ?, finished = ?, output_file = ?, error = ?, report = ?{progress_sql}"
+                f" WHERE id = ?",
+                (status, time.time(), output_file, error,
+                 json.dumps(report, ensure_ascii=False, default=str) if report is not None else None, job_id),
+            )
+
+    def requeue(self, job_id):
+        """Devuelve a la cola un trabajo en marcha (al detener el servicio) o uno fallido o cancelado (reintento)."""
+        with self._lock, self._conn:
+            return self._conn.execute(
+                "UPDATE jobs SET status = 'queued', finished = NULL WHERE id = ? AND status != 'queued'"
+                " AND status != 'done'",
+                (job_id,),
+            ).rowcount > 0
+
+    def request_cancel(self, job_id):
+        """Cancela un trabajo en cola al momento o marca uno en marcha como "cancelling"; devuelve el nuevo estado."""
+        with self._lock, self._conn:
+            row = self._conn.execute("SELECT status FROM jobs WHERE id = ?", (job_id,)).fetchone()
+            if row is None:
+                return None
+            status = row["status"]
+            if status == "queued":
+                status = "cancelled"
+                self._conn.execute("UPDATE jobs SET status = ?, finished = ? WHERE id = ?",
+                                   (status, time.time(), job_id))
+            elif status == "running":
+                status = "cancelling"
+                self._conn.execute("UPDATE jobs SET status = ? WHERE id = ?", (status, job_id))
+        return status
+
+    def get(self, job_id):
+        with self._lock:
+            row = self._conn.execute("SELECT * FROM jobs WHERE id = ?", (job_id,)).fetchone()
+        return _job(row) if row else None
+
+    def list(self, status=None, limit=100):
+        """Trabajos más recientes primero, opcionalmente solo los de un estado."""
+        query = "SELECT * FROM jobs"
+        args = []
+        if status:
+            query += " WHERE status = ?"
+            args.append(status)
+        query += " ORDER BY created DESC LIMIT ?"
+        args.append(limit)
+        with self._lock:
+            rows = self._conn.execute(query, args).fetchall()
+        return [_job(row) for row in rows]
+
+    def counts(self):
+        with self._lock:
+            rows = self._conn.execute("SELECT status, COUNT(*) FROM jobs GROUP BY status").fetchall()
+        counts = dict.fromkeys(STATUSES, 0)
+        counts.update({status: count for status, count in rows})
+        return counts
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+
+def _job(row):
+    job = {column: row[column] for column in _COLUMNS}
+    job["params"] = json.loads(job["params"])
+    job["report"] = json.loads(job["report"]) if job["report"] else None
+    return job
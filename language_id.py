@@ -0,0 +1,259 @@
+import re
+from collections import Counter
+
+# Palabras muy frecuentes de cada idioma. Las que comparten varios idiomas
+# ("de", "que", "a"...) pesan menos, así que bastan unas pocas por párrafo.
+STOPWORDS = {
+    "es": "de la que el en y a los se del las un por con no una su para es al lo como más pero sus le ya o "
+          "este sí porque esta entre cuando muy sin sobre también me hasta hay donde quien desde todo nos "
+          "durante todos uno les ni contra otros ese eso ante ellos esto antes algunos qué unos yo otro "
+          "otras otra él tanto esa estos mucho quienes nada muchos cual poco ella estar estas algunas algo "
+          "nosotros puede hace ser fue han era son así cada después tiene",
+    "en": "the of and to in is that it was for on are as with his they at be this have from or one had by "
+          "but not what all were we when your can said there use an each which she do how their if will up "
+          "other about out many then them these so some her would make like him into time has two more "
+          "could people my than first been who its now did get may should does between through",
+    "fr": "le de un et à il ne je son que se qui ce dans en du elle au pour pas vous par sur plus "
+          "me on mon lui nous comme mais avec tout y bien où sans tu ou leur si deux moi te quand celui "
+          "notre là même votre rien encore aussi dont ça peu sous alors les des est une sont été cette "
+          "fait ces ont peut être entre la qu aux cela était avait",
+    "de": "der die und in den von zu das mit sich des auf für ist im dem nicht ein eine als auch es an "
+          "werden aus er hat dass sie nach wird bei einer um am sind noch wie einem über einen so zum "
+          "war haben nur oder aber vor zur bis mehr durch man sein wurde sei kann ich wir",
+    "it": "di e il la che è per un in non una sono mi si ho ma lo ha le con ti cosa se io come da ci "
+          "questo qui hai bene tu sei del me mio solo della era gli anche al lei più quando ora fatto "
+          "essere così nel dove lui tutto alla delle degli nella questa",
+    "pt": "de a o que e do da em um para é com não uma os no se na por mais as dos como mas foi ao ele "
+          "das tem à seu sua ou ser quando muito há nos já está eu também só pelo pela até isso ela entre "
+          "era depois sem mesmo aos ter seus quem nas esse eles estão você tinha foram essa num nem suas "
+          "meu às minha numa pelos elas havia seja qual será nós tenho lhe deles essas esses pelas este",
+}
+
+# Letras y signos que casi solo aparecen en algunos de los idiomas
+DISTINCTIVE_CHARS = {
+    "ñ": ("es",), "¿": ("es",), "¡": ("es",),
+    "ã": ("pt",), "õ": ("pt",), "ç": ("fr", "pt"),
+    "è": ("fr", "it"), "ê": ("fr", "pt"), "œ": ("fr",), "à": ("fr", "it", "pt"),
+    "á": ("es", "pt"), "í": ("es", "pt"), "ó": ("es", "pt"), "ú": ("es", "pt"),
+    "ß": ("de",), "ä": ("de",), "ö": ("de",), "ü": ("de",),
+}
+
+
+def _weights():
+    languages = Counter(word for words in STOPWORDS.values() for word in set(words.split()))
+    weights = {}
+    for language, words in STOPWORDS.items():
+        for word in set(words.split()):
+            weights.setdefault(word, []).append((language, 1.0 / languages[word]))
+    return weights
+
+
+_WORD_WEIGHTS = _weights()
+_WORD = re.compile(r"[^\W\d_]+")
+
+# Puntuación mínima para decidir: por debajo (frases muy cortas, listas de nombres) no se adivina
+MIN_SCORE = 2.0
+# El idioma ganador debe sacar al menos esta ventaja al segundo
+MIN_MARGIN = 1.3
+
+
+def detect(text):
+    """Idioma más probable de `text` según sus palabras frecuentes; None si no hay pruebas suficientes."""
+    scores = Counter()
+    for word in _WORD.findall(text.lower()):
+        for language, weight in _WORD_WEIGHTS.get(word, ()):
+            scores[language] += weight
+    lowered = text.lower()
+    for char, languages in DISTINCTIVE_CHARS.items():
+        count = lowered.count(char)
+        if count:
+            for language in languages:
+                scores[language] += 0.5 * min(count, 4) / len(languages)
+    ranked = scores.most_common(2)
+    if not ranked or ranked[0][1] < MIN_SCORE:
+        return None
+    if len(ranked) > 1 and ranked[0][1] < MIN_MARGIN * ranked[1][1]:
+        return None
+    return ranked[0][0]
+
+
+# Líneas que solo contienen enlaces, correos o rutas
+_URL_LINE = re.compile(r"^\s*(?:(?:https?://|ftp://|www\.)\S+|[\w.+-]+@[\w-]+\.[\w.-]+|(?:\.{0,2}/)?[\w.-]+(?:/[\w.-]+)+)"
+                       r"(?:\s+(?:(?:https?://|ftp://|www\.)\S+|[\w.+-]+@[\w-]+\.[\w.-]+))*\s*$")
+# Comienzos típicos de una línea de código
+_CODE_START = re.compile(
+    r"^\s*(?:def \w+\s*\(|class \w+\s*[(:{]|import [\w.]+|from [\w.]+ import |#include\s*[<\"]|"
+    r"(?:public|private|protected|static)\s+\w+|function\s*\w*\s*\(|(?:var|let|const)\s+\w+\s*=|"
+    r"(?:if|for|while|switch)\s*\(|return\s+[^.?!]*;\s*$|[}\])]+;?\s*$|\$ |>>> |<\/?\w+[^>]*>)")
+# Símbolos que abundan en el código y casi no aparecen en prosa
+_CODE_SYMBOLS = set("{}[]()<>=;+*/\\|&%$#@^~_`")
+# Proporción de símbolos (sin espacios) a partir de la cual una línea parece código
+CODE_SYMBOL_RATIO = 0.08
+# Con esta proporción basta una sola línea; por debajo hacen falta dos seguidas
+STRONG_CODE_SYMBOL_RATIO = 0.3
+
+
+def _symbol_ratio(line):
+    chars = [c for c in line if not c.isspace()]
+    if not chars:
+        return 0.0
+    return sum(c in _CODE_SYMBOLS for c in chars) / len(chars)
+
+
+def _line_kind(line):
+    if not line.strip():
+        return "blank"
+    if _URL_LINE.match(line):
+        return "url"
+    ratio = _symbol_ratio(line)
+    if ratio >= STRONG_CODE_SYMBOL_RATIO:
+        return "code"
+    if _CODE_START.match(line) or ratio >= CODE_SYMBOL_RATIO:
+        return "code?"
+    return "text"
+
+
+def split_segments(text):
+    """Divide `text` en tramos (tipo, texto) de tipo "text", "code" o "url"; unidos reproducen `text`.
+
+    Los párrafos de texto se separan en las líneas en blanco. Una línea
+    dudosa solo cuenta como código si tiene otra de código al lado: así una
+    frase con un paréntesis o un signo igual no se queda sin traducir.
+    """
+    lines = text.splitlines(keepends=True)
+    kinds = [_line_kind(line) for line in lines]
+    for i, kind in enumerate(kinds):
+        if kind == "code?":
+            neighbours = [kinds[j] for j in (i - 1, i + 1) if 0 <= j < len(kinds)]
+            kinds[i] = "code" if any(k in ("code", "code?") for k in neighbours) else "text"
+        elif kind == "text" and i and kinds[i - 1] == "code" and lines[i][:1] in (" ", "\t"):
+            # Cuerpo sangrado de un bloque de código
+            kinds[i] = "code"
+    segments = []
+    paragraph_break = False
+    for line, kind in zip(lines, kinds):
+        if kind == "blank":
+            # La línea en blanco viaja con el tramo anterior y cierra el párrafo
+            if segments:
+                segments[-1][1] += line
+            else:
+                segments.append(["text", line])
+            paragraph_break = True
+            continue
+        if segments and segments[-1][0] == kind and not (kind == "text" and paragraph_break):
+            segments[-1][1] += line
+        else:
+            segments.append([kind, line])
+        paragraph_break = False
+    return [(kind, piece) for kind, piece in segments]
+
+
+# Línea que separa los tramos de una petición agrupada; los traductores la dejan tal cual
+SEGMENT_SEPARATOR = "\n\n###\n\n"
+SEPARATOR_PATTERN = re.compile(r"\s*\n\s*#\s*#\s*#\s*\n\s*")
+
+
+class LanguageFilter:
+    """Decide qué partes de cada chunk hay que traducir y desde qué idioma.
+
+    Cada chunk se divide en párrafos, bloques de código y enlaces. El
+    código, los enlaces y los párrafos que ya están en el idioma de destino
+    se dejan tal cual; el resto se agrupa por idioma de origen y se envía al
+    traductor con ese idioma fijado en lugar de la detección automática. Los
+    párrafos demasiado cortos para decidir heredan el idioma del chunk.
+    """
+
+    def __init__(self, target):
+        self.target = target
+        self.chunks = 0
+        self.requests = 0
+        self.chars_in = 0
+        self.chars_sent = 0
+        self.skipped_chars = Counter()
+        self.skipped_segments = Counter()
+        self.sources = Counter()
+
+    def plan(self, text):
+        """Lista de (texto, traducir, idioma de origen); al unir los textos se recupera `text`."""
+        self.chars_in += len(text)
+        if not text.strip():
+            return [(text, False, None)]
+        self.chunks += 1
+        segments = split_segments(text)
+        chunk_language = detect("".join(piece for kind, piece in segments if kind == "text"))
+        plan = []
+        for kind, piece in segments:
+            if kind == "text":
+                language = detect(piece) or chunk_language
+                if language == self.target:
+                    kind = "target"
+            if kind != "text":
+                self.skipped_chars[kind] += len(piece)
+                self.skipped_segments[kind] += 1
+                _append(plan, piece, False, None)
+                continue
+            # Los espacios de los bordes no se envían: los servicios los recortan
+            body = piece.strip()
+            start = piece.index(body)
+            _append(plan, piece[:start], False, None)
+            _append(plan, body, True, language)
+            _append(plan, piece[start + len(body):], False, None)
+        return plan
+
+    def group(self, plans):
+        """Agrupa los tramos a traducir de cada chunk por idioma de origen.
+
+        Devuelve una lista de peticiones (texto, idioma, miembros), donde
+        `miembros` son los (chunk, tramo) que viajan juntos separados por
+        SEGMENT_SEPARATOR. Así un chunk con párrafos intercalados de dos
+        idiomas sigue costando como mucho una petición por idioma.
+        """
+        requests = []
+        for chunk_index, plan in enumerate(plans):
+            by_source = {}
+            for piece_index, (piece, translate, language) in enumerate(plan):
+                if translate:
+                    by_source.setdefault(language, []).append(piece_index)
+            for language, members in by_source.items():
+                text = SEGMENT_SEPARATOR.join(plan[i][0] for i in members)
+                requests.append((text, language, [(chunk_index, i) for i in members]))
+                self.requests += 1
+                self.chars_sent += len(text)
+                self.sources[language or "auto"] += 1
+        return requests
+
+    def stats(self):
+        skipped = sum(self.skipped_chars.values())
+        return {
+            "chunks": self.chunks,
+            "requests": self.requests,
+            "chars_in": self.chars_in,
+            "chars_sent": self.chars_sent,
+            "chars_skipped": skipped,
+            "skipped_ratio": skipped / self.chars_in if self.chars_in else 0.0,
+            "skipped_chars_by_reason": dict(self.skipped_chars),
+            "skipped_segments_by_reason": dict(self.skipped_segments),
+            "requests_by_source": dict(self.sources),
+        }
+
+
+def split_translation(text, count):
+    """Separa la traducción de una petición agrupada; None si el traductor no respetó los separadores."""
+    parts = SEPARATOR_PATTERN.split(text)
+    if len(parts) != count:
+        return None
+    return [part.strip() for part in parts]
+
+
+def _append(plan, piece, translate, language):
+    """Añade un tramo al plan, fundiéndolo con el anterior si va igual (mismo destino e idioma)."""
+    if not piece:
+        return
+    if plan and plan[-1][1] == translate and plan[-1][2] == language:
+        piece = plan.pop()[0] + piece
+    elif (translate and len(plan) >= 2 and not plan[-1][1] and not plan[-1][0].strip()
+          and plan[-2][1] and plan[-2][2] == language):
+        # Dos párrafos del mismo idioma separados solo por espacios van en la misma petición
+        gap = plan.pop()[0]
+        piece = plan.pop()[0] + gap + piece
+    plan.append((piece, translate, language))
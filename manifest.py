@@ -0,0 +1,164 @@
+import hashlib
+import json
+import os
+import tempfile
+import threading
+import time
+
+MANIFEST_NAME = "audiolibro.manifest.json"
+MANIFEST_VERSION = 1
+
+
+def file_digest(path, block_size=1024 * 1024):
+    """SHA-256 del contenido de un archivo, leído por bloques."""
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(block_size), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def text_digest(text):
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+class JobManifest:
+    """Estado persistente de un trabajo: rango de páginas, chunks y cuáles ya están sintetizados.
+
+    Se guarda como JSON en el directorio de salida y se reescribe de forma
+    atómica a medida que se completan chunks, así que una ejecución
+    interrumpida puede continuar desde el último chunk terminado.
+    """
+
+    def __init__(self, path, data, min_save_interval=1.0):
+        self.path = path
+        self.data = data
+        # Reescribir el JSON tras cada chunk sería cuadrático en libros largos
+        self.min_save_interval = min_save_interval
+        self._last_save = 0.0
+        self._lock = threading.Lock()
+
+    @classmethod
+    def open(cls, output_dir, params, resume=True):
+        """Carga el manifiesto si `resume` y coincide con `params`; si no, empieza uno nuevo."""
+        path = os.path.join(output_dir, MANIFEST_NAME)
+        if resume and os.path.exists(path):
+            try:
+                with open(path, encoding="utf-8") as f:
+                    data = json.load(f)
+                if data.get("version") == MANIFEST_VERSION and data.get("params") == params:
+                    data["state"] = "running"
+                    return cls(path, data)
+                print("El trabajo anterior usaba otros parámetros; se empieza de cero.")
+            except (OSError, ValueError) as e:
+                print(f"Manifiesto ilegible, se empieza de cero: {e}")
+        manifest = cls(path, {
+            "version": MANIFEST_VERSION,
+            "params": params,
+            "created": time.time(),
+            "state": "running",
+            "chunks": [],
+        })
+        manifest.save()
+        return manifest
+
+    @property
+    def chunks(self):
+        return self.data["chunks"]
+
+    def set_chunks(self, chunks, chunk_files):
+        """Registra los límites y hashes de los chunks, conservando los ya completados que coincidan."""
+        with self._lock:
+            previous = {c["index"]: c for c in self.chunks}
+            entries = []
+            offset = 0
+            for i, (chunk, chunk_file) in enumerate(zip(chunks, chunk_files)):
+                entries.append(self._entry(i, chunk, chunk_file, offset, previous.get(i)))
+                offset += len(chunk)
+            self.data["chunks"] = entries
+        self.save()
+
+    def add_chunk(self, index, chunk, chunk_file):
+        """Añade (o revalida) un chunk cuando se conoce de forma incremental, como en modo streaming."""
+        with self._lock:
+            entries = self.chunks
+            offset = entries[index - 1]["end"] if index and len(entries) >= index else 0
+            previous = entries[index] if index < len(entries) else None
+            entry = self._entry(index, chunk, chunk_file, offset, previous)
+            if index < len(entries):
+                entries[index] = entry
+            else:
+                entries.append(entry)
+
+    @staticmethod
+    def _entry(index, chunk, chunk_file, offset, previous):
+        digest = text_digest(chunk)
+        done = bool(previous and previous["hash"] == digest and previous["done"])
+        return {
+            "index": index,
+            "start": offset,
+            "end": offset + len(chunk),
+            "hash": digest,
+            "file": chunk_file,
+            "done": done,
+            "bytes": previous["bytes"] if done else 0,
+        }
+
+    def truncate(self, count):
+        """Descarta entradas sobrantes de una ejecución anterior (modo streaming)."""
+        with self._lock:
+            del self.chunks[count:]
+
+    def is_done(self, index):
+        """Un chunk cuenta como hecho si el manifiesto lo dice y su archivo sigue intacto."""
+        with self._lock:
+            if index >= len(self.chunks):
+                return False
+            entry = self.chunks[index]
+            if not entry["done"]:
+                return False
+            try:
+                return os.path.getsize(entry["file"]) == entry["bytes"] > 0
+            except OSError:
+                return False
+
+    def mark_done(self, index):
+        """Marca el chunk como sintetizado si su archivo existe y no está vacío."""
+        with self._lock:
+            entry = self.chunks[index]
+            try:
+                size = os.path.getsize(entry["file"])
+            except OSError:
+                size = 0
+            entry["done"] = size > 0
+            entry["bytes"] = size
+            due = time.monotonic() - self._last_save >= self.min_save_interval
+        if due:
+            self.save()
+        return size > 0
+
+    def pending(self):
+        return [entry["index"] for entry in self.chunks if not self.is_done(entry["index"])]
+
+    def set_state(self, state):
+        """Anota cómo terminó el trabajo ("failed", "incomplete" o "cancelled"); uno completado borra el manifiesto."""
+        with self._lock:
+            self.data["state"] = state
+        self.save()
+
+    def save(self):
+        with self._lock:
+            payload = json.dumps(self.data, ensure_ascii=False, indent=1)
+            directory = os.path.dirname(os.path.abspath(self.path))
+            os.makedirs(directory, exist_ok=True)
+            fd, tmp_path = tempfile.mkstemp(dir=directory, suffix=".tmp")
+            with os.fdopen(fd, "w", encoding="utf-8") as f:
+                f.write(payload)
+            os.replace(tmp_path, self.path)
+            self._last_save = time.monotonic()
+
+    def remove(self):
+        try:
+            os.remove(self.path)
+        except FileNotFoundError:
+            pass
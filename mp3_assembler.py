@@ -0,0 +1,335 @@
+import os
+import struct
+from array import array
+
+# Tablas de la cabecera de trama MPEG audio (kbps / Hz)
+_BITRATES = {
+    (1, 1): [0, 32, 64, 96, 128, 160, 192, 224, 256, 288, 320, 352, 384, 416, 448],
+    (1, 2): [0, 32, 48, 56, 64, 80, 96, 112, 128, 160, 192, 224, 256, 320, 384],
+    (1, 3): [0, 32, 40, 48, 56, 64, 80, 96, 112, 128, 160, 192, 224, 256, 320],
+    (2, 1): [0, 32, 48, 56, 64, 80, 96, 112, 128, 144, 160, 176, 192, 224, 256],
+    (2, 2): [0, 8, 16, 24, 32, 40, 48, 56, 64, 80, 96, 112, 128, 144, 160],
+    (2, 3): [0, 8, 16, 24, 32, 40, 48, 56, 64, 80, 96, 112, 128, 144, 160],
+}
+_SAMPLE_RATES = {
+    "1": [44100, 48000, 32000],
+    "2": [22050, 24000, 16000],
+    "2.5": [11025, 12000, 8000],
+}
+_VERSIONS = {0b00: "2.5", 0b10: "2", 0b11: "1"}
+_LAYERS = {0b01: 3, 0b10: 2, 0b11: 1}
+
+_XING_FLAGS = 0x0001 | 0x0002 | 0x0004  # frames, bytes, TOC
+_TOC_STRIDE = 64  # se guarda el offset de una de cada N tramas para la tabla de búsqueda
+
+
+class Mp3FormatError(Exception):
+    """El chunk no es un MP3 que se pueda concatenar trama a trama."""
+
+
+class FrameHeader:
+    __slots__ = ("version", "layer", "bitrate_index", "bitrate", "sample_rate_index",
+                 "sample_rate", "padding", "mode", "raw")
+
+    @classmethod
+    def parse(cls, data, pos):
+        """Interpreta la cabecera de 4 bytes en `pos`; devuelve None si no es una trama válida."""
+        if pos + 4 > len(data) or data[pos] != 0xFF or data[pos + 1] & 0xE0 != 0xE0:
+            return None
+        b1, b2, b3 = data[pos + 1], data[pos + 2], data[pos + 3]
+        version = _VERSIONS.get((b1 >> 3) & 0b11)
+        layer = _LAYERS.get((b1 >> 1) & 0b11)
+        bitrate_index = b2 >> 4
+        sample_rate_index = (b2 >> 2) & 0b11
+        if version is None or layer is None or bitrate_index in (0, 15) or sample_rate_index == 3:
+            return None  # formato libre o valores reservados
+        header = cls()
+        header.version = version
+        header.layer = layer
+        header.bitrate_index = bitrate_index
+        header.bitrate = _BITRATES[(1 if version == "1" else 2, layer)][bitrate_index] * 1000
+        header.sample_rate_index = sample_rate_index
+        header.sample_rate = _SAMPLE_RATES[version][sample_rate_index]
+        header.padding = (b2 >> 1) & 1
+        header.mode = b3 >> 6
+        header.raw = bytes(data[pos:pos + 4])
+        return header
+
+    @property
+    def samples(self):
+        if self.layer == 1:
+            return 384
+        if self.layer == 3 and self.version != "1":
+            return 576
+        return 1152
+
+    @property
+    def length(self):
+        if self.layer == 1:
+            return (12 * self.bitrate // self.sample_rate + self.padding) * 4
+        return self.samples // 8 * self.bitrate // self.sample_rate + self.padding
+
+    @property
+    def side_info_length(self):
+        mono = self.mode == 0b11
+        if self.version == "1":
+            return 17 if mono else 32
+        return 9 if mono else 17
+
+    def stream_format(self):
+        """Lo que debe coincidir entre chunks para poder concatenarlos sin recodificar."""
+        return self.version, self.layer, self.sample_rate, self.mode == 0b11
+
+
+def _skip_id3v2(data):
+    if len(data) >= 10 and data[:3] == b"ID3":
+        size = (data[6] << 21) | (data[7] << 14) | (data[8] << 7) | data[9]
+        footer = 10 if data[5] & 0x10 else 0
+        return 10 + size + footer
+    return 0
+
+
+def _audio_end(data):
+    """Fin de los datos de audio, sin la etiqueta ID3v1 ni APEv2 del final."""
+    end = len(data)
+    if end >= 128 and data[end - 128:end - 125] == b"TAG":
+        end -= 128
+    if end >= 32 and data[end - 32:end - 24] == b"APETAGEX":
+        size = struct.unpack("<I", data[end - 20:end - 16])[0]
+        end -= size + (32 if data[end - 9] & 0x80 else 0)
+    return max(end, 0)
+
+
+def _is_info_frame(data, pos, header):
+    """Detecta la trama Xing/Info (LAME) o VBRI (Fraunhofer) que precede al audio."""
+    tag_pos = pos + 4 + header.side_info_length
+    if data[tag_pos:tag_pos + 4] in (b"Xing", b"Info"):
+        return True
+    return data[pos + 36:pos + 40] == b"VBRI"
+
+
+def iter_frames(data):
+    """Genera (offset, cabecera) de cada trama de audio, sin etiquetas ni trama Xing."""
+    pos = _skip_id3v2(data)
+    end = _audio_end(data)
+    first = True
+    while pos + 4 <= end:
+        header = FrameHeader.parse(data, pos)
+        if header is None or pos + header.length > end:
+            # Basura entre tramas: se busca la siguiente sincronización
+            next_sync = data.find(b"\xff", pos + 1, end)
+            if next_sync < 0:
+                break
+            pos = next_sync
+            continue
+        if not (first and _is_info_frame(data, pos, header)):
+            yield pos, header
+        first = False
+        pos += header.length
+
+
+class Mp3Assembler:
+    """Une chunks MP3 en un solo archivo copiando tramas, sin procesos externos ni recodificar.
+
+    Los chunks se añaden en orden a medida que terminan (`chunk_ready` admite
+    que lleguen desordenados), así que el archivo de salida se puede ir
+    reproduciendo mientras el trabajo sigue. Al cerrar se escribe una trama
+    Xing/Info al principio con el número de tramas, los bytes y la tabla de
+    búsqueda, para que los reproductores muestren la duración correcta.
+    """
+
+    def __init__(self, output_file):
+        self.output_file = output_file
+        self.frames = 0
+        self.audio_bytes = 0
+        self.error = None
+        self._file = None
+        self._format = None
+        self._template = None
+        self._bitrates = set()
+        self._lengths = set()
+        self._tag_length = 0
+        self._offsets = array("Q")
+        self._next_index = 0
+        self._ready = {}
+        # Índice del chunk → (offset, bytes, tramas) de su audio en el archivo de salida
+        self.spans = {}
+        # on_audio(datos, segundos) recibe cada tramo de tramas escrito, en orden
+        self.on_audio = None
+
+    @property
+    def duration(self):
+        if not self._template:
+            return 0.0
+        return self.frames * self._template.samples / self._template.sample_rate
+
+    @property
+    def frame_length(self):
+        """Bytes por trama si todas miden lo mismo (CBR sin relleno, como edge-tts); si no, None."""
+        return next(iter(self._lengths)) if len(self._lengths) == 1 else None
+
+    def _open(self, header):
+        if header.layer != 3:
+            raise Mp3FormatError("Solo se admite MPEG Layer III")
+        os.makedirs(os.path.dirname(os.path.abspath(self.output_file)), exist_ok=True)
+        self._file = open(self.output_file, "wb")
+        self._format = header.stream_format()
+        self._template = header
+        # Hueco para la trama Xing: una trama silenciosa válida que se reescribe al cerrar
+        placeholder = self._xing_frame(silent=True)
+        self._tag_length = len(placeholder)
+        self._file.write(placeholder)
+
+    def append(self, data):
+        """Copia las tramas de audio de `data` al final del archivo de salida."""
+        # Las tramas consecutivas se escriben de una vez
+        runs = []
+        run_start = run_end = 0
+        added = 0
+        for pos, header in iter_frames(data):
+            if self._file is None:
+                self._open(header)
+            elif header.stream_format() != self._format:
+                raise Mp3FormatError(
+                    f"Formato distinto entre chunks: {header.stream_format()} frente a {self._format}")
+            if pos != run_end:
+                runs.append(data[run_start:run_end])
+                run_start = pos
+            run_end = pos + header.length
+            if self.frames % _TOC_STRIDE == 0:
+                self._offsets.append(self.audio_bytes)
+            self._bitrates.add(header.bitrate)
+            self._lengths.add(header.length)
+            self.frames += 1
+            self.audio_bytes += header.length
+            added += 1
+        if self._file is None:
+            return
+        runs.append(data[run_start:run_end])
+        for run in runs:
+            self._file.write(run)
+        self._file.flush()
+        if self.on_audio and added:
+            self.on_audio(b"".join(runs), added * self._template.samples / self._template.sample_rate)
+
+    def append_copy(self, data, frames):
+        """Añade `frames` tramas de tamaño fijo copiadas de otra unión, sin recorrerlas una a una.
+
+        Es lo que reutiliza el modo incremental. Si `data` no son exactamente
+        `frames` tramas del tamaño de la primera, se analiza como en `append`.
+        """
+        header = FrameHeader.parse(data, 0)
+        if header is None or not frames or len(data) != frames * header.length:
+            self.append(data)
+            return
+        if self._file is None:
+            self._open(header)
+        elif header.stream_format() != self._format:
+            raise Mp3FormatError(
+                f"Formato distinto entre chunks: {header.stream_format()} frente a {self._format}")
+        # Las entradas de la tabla de búsqueda se calculan en lugar de medirse
+        for k in range(-self.frames % _TOC_STRIDE, frames, _TOC_STRIDE):
+            self._offsets.append(self.audio_bytes + k * header.length)
+        self._bitrates.add(header.bitrate)
+        self._lengths.add(header.length)
+        self.frames += frames
+        self.audio_bytes += len(data)
+        self._file.write(data)
+        self._file.flush()
+        if self.on_audio:
+            self.on_audio(data, frames * self._template.samples / self._template.sample_rate)
+
+    def append_file(self, path, frames=None):
+        with open(path, "rb") as f:
+            data = f.read()
+        if frames:
+            self.append_copy(data, frames)
+        else:
+            self.append(data)
+
+    def chunk_ready(self, index, path, frames=None):
+        """Registra un chunk terminado y añade todos los que ya estén contiguos en orden.
+
+        `frames` solo se indica para audio copiado de una unión anterior con
+        tramas de tamaño fijo (ver `append_copy`).
+        """
+        if self.error:
+            return
+        self._ready[index] = (path, frames)
+        try:
+            while self._next_index in self._ready:
+                start = self.audio_bytes
+                start_frames = self.frames
+                self.append_file(*self._ready.pop(self._next_index))
+                # La trama Xing va delante del audio
+                self.spans[self._next_index] = (self._tag_length + start, self.audio_bytes - start,
+                                                self.frames - start_frames)
+                self._next_index += 1
+        except (Mp3FormatError, OSError) as e:
+            self.error = e
+            self.abort()
+
+    def close(self):
+        """Escribe la trama Xing definitiva. Lanza el error si algún chunk no se pudo unir."""
+        if self.error:
+            raise self.error
+        if self._ready:
+            raise Mp3FormatError(f"Faltan chunks antes del {min(self._ready)}")
+        if self._file is None:
+            raise Mp3FormatError("No hay tramas de audio que unir")
+        self._file.seek(0)
+        self._file.write(self._xing_frame())
+        self._file.close()
+        self._file = None
+        return self.output_file
+
+    def abort(self):
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+            try:
+                os.remove(self.output_file)
+            except OSError:
+                pass
+
+    def _xing_frame(self, silent=False):
+        template = self._template
+        side = template.side_info_length
+        needed = 4 + side + 4 + 4 + 4 + 4 + 100
+        # La trama más pequeña (menor bitrate) en la que cabe la etiqueta
+        table = _BITRATES[(1 if template.version == "1" else 2, 3)]
+        for bitrate_index in range(1, 15):
+            bitrate = table[bitrate_index] * 1000
+            length = template.samples // 8 * bitrate // template.sample_rate
+            if length >= needed:
+                break
+        b1 = template.raw[1] | 0x01  # sin CRC
+        b2 = (bitrate_index << 4) | (template.sample_rate_index << 2)
+        b3 = template.raw[3] & 0xC0
+        frame = bytearray(length)
+        frame[0:4] = bytes([0xFF, b1, b2, b3])
+        if silent:
+            return bytes(frame)
+
+        tag = b"Info" if len(self._bitrates) <= 1 else b"Xing"
+        total_bytes = self._tag_length + self.audio_bytes
+        pos = 4 + side
+        frame[pos:pos + 16] = tag + struct.pack(">III", _XING_FLAGS, self.frames, total_bytes)
+        frame[pos + 16:pos + 116] = self._toc()
+        return bytes(frame)
+
+    def _toc(self):
+        """Tabla de búsqueda: posición relativa (0-255) del audio en cada 1% de la duración."""
+        total_bytes = self._tag_length + self.audio_bytes
+        toc = bytearray(100)
+        for percent in range(100):
+            frame = percent * self.frames // 100
+            # Interpolación lineal entre los offsets muestreados
+            i = frame // _TOC_STRIDE
+            start_frame = i * _TOC_STRIDE
+            end_frame = min(start_frame + _TOC_STRIDE, self.frames)
+            start = self._offsets[i]
+            end = self._offsets[i + 1] if i + 1 < len(self._offsets) else self.audio_bytes
+            offset = start + (end - start) * (frame - start_frame) // max(1, end_frame - start_frame)
+            toc[percent] = min(255, (self._tag_length + offset) * 256 // total_bytes)
+        return bytes(toc)
@@ -0,0 +1,174 @@
+import os
+import sqlite3
+import threading
+import time
+
+from manifest import file_digest
+
+DEFAULT_DB_PATH = os.path.join(os.path.expanduser("~"), ".cache", "audiolibros", "pages.sqlite3")
+
+# Páginas que se piden al índice de una vez (acota la memoria en libros enormes)
+FETCH_PAGES = 200
+
+# Súbelo si cambia la forma de extraer el texto: las páginas ya indexadas dejan de servir
+EXTRACTOR_VERSION = 1
+
+
+class PageIndex:
+    """Índice persistente del texto de cada página, por hash del contenido del PDF.
+
+    Se llena a medida que se extraen páginas y sirve cualquier rango posterior
+    sin volver a analizar la maquetación. Como la clave es el contenido, un
+    PDF modificado no reutiliza nada y dos copias del mismo PDF comparten
+    entradas. Para no leer el archivo entero en cada ejecución, el hash se
+    guarda junto al tamaño y la fecha de modificación y solo se recalcula si
+    cambian.
+
+    Aparte, el modo incremental guarda el texto por huella de página: así las
+    páginas que no cambian entre dos versiones de un PDF tampoco se vuelven a
+    analizar.
+    """
+
+    def __init__(self, db_path=None):
+        self.db_path = db_path or DEFAULT_DB_PATH
+        os.makedirs(os.path.dirname(os.path.abspath(self.db_path)), exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(self.db_path, timeout=30, check_same_thread=False)
+        with self._conn:
+            # WAL permite que varios procesos lean mientras otro escribe
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS files ("
+                " path TEXT PRIMARY KEY,"
+                " size INTEGER NOT NULL,"
+                " mtime_ns INTEGER NOT NULL,"
+                " digest TEXT NOT NULL)"
+            )
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS documents ("
+                " digest TEXT PRIMARY KEY,"
+                " page_count INTEGER NOT NULL)"
+            )
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS pages ("
+                " digest TEXT NOT NULL,"
+                " version INTEGER NOT NULL,"
+                " page INTEGER NOT NULL,"
+                " text TEXT NOT NULL,"
+                " created REAL NOT NULL,"
+                " PRIMARY KEY (digest, version, page))"
+            )
+            # Texto por huella de página (ver pdf_extract.page_fingerprints), entre versiones de un PDF
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS fingerprints ("
+                " fingerprint TEXT NOT NULL,"
+                " version INTEGER NOT NULL,"
+                " text TEXT NOT NULL,"
+                " created REAL NOT NULL,"
+                " PRIMARY KEY (fingerprint, version))"
+            )
+        self.hits = 0
+        self.misses = 0
+
+    def digest(self, pdf_file):
+        """Hash del contenido del PDF; solo se recalcula si cambian su tamaño o su fecha."""
+        path = os.path.abspath(pdf_file)
+        stat = os.stat(path)
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT digest FROM files WHERE path = ? AND size = ? AND mtime_ns = ?",
+                (path, stat.st_size, stat.st_mtime_ns),
+            ).fetchone()
+        if row:
+            return row[0]
+        digest = file_digest(path)
+        with self._lock, self._conn:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO files (path, size, mtime_ns, digest) VALUES (?, ?, ?, ?)",
+                (path, stat.st_size, stat.st_mtime_ns, digest),
+            )
+        return digest
+
+    def page_count(self, digest):
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT page_count FROM documents WHERE digest = ?", (digest,)).fetchone()
+        return row[0] if row else None
+
+    def set_page_count(self, digest, page_count):
+        with self._lock, self._conn:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO documents (digest, page_count) VALUES (?, ?)",
+                (digest, page_count),
+            )
+
+    def get_pages(self, digest, start, end):
+        """Devuelve {página: texto} con las páginas de [start, end) ya indexadas."""
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT page, text FROM pages WHERE digest = ? AND version = ? AND page >= ? AND page < ?",
+                (digest, EXTRACTOR_VERSION, start, end),
+            ).fetchall()
+            self.hits += len(rows)
+            self.misses += (end - start) - len(rows)
+        return dict(rows)
+
+    def indexed_pages(self, digest, start, end):
+        """Números de las páginas de [start, end) ya indexadas, sin leer su texto."""
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT page FROM pages WHERE digest = ? AND version = ? AND page >= ? AND page < ?",
+                (digest, EXTRACTOR_VERSION, start, end),
+            ).fetchall()
+        return {page for page, in rows}
+
+    def put_page(self, digest, page, text):
+        self.put_pages(digest, [(page, text)])
+
+    def put_pages(self, digest, pages):
+        now = time.time()
+        rows = [(digest, EXTRACTOR_VERSION, page, text, now) for page, text in pages]
+        with self._lock, self._conn:
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO pages (digest, version, page, text, created) VALUES (?, ?, ?, ?, ?)",
+                rows,
+            )
+
+    def get_fingerprints(self, fingerprints):
+        """Devuelve {huella: texto} de las huellas ya conocidas."""
+        found = {}
+        fingerprints = list(set(fingerprints))
+        with self._lock:
+            # SQLite limita el número de parámetros por consulta
+            for i in range(0, len(fingerprints), 500):
+                batch = fingerprints[i:i + 500]
+                rows = self._conn.execute(
+                    f"SELECT fingerprint, text FROM fingerprints WHERE version = ? "
+                    f"AND fingerprint IN ({', '.join('?' * len(batch))})",
+                    (EXTRACTOR_VERSION, *batch),
+                ).fetchall()
+                found.update(rows)
+        return found
+
+    def put_fingerprints(self, pages):
+        """Guarda pares (huella, texto)."""
+        now = time.time()
+        rows = [(fingerprint, EXTRACTOR_VERSION, text, now) for fingerprint, text in pages]
+        with self._lock, self._conn:
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO fingerprints (fingerprint, version, text, created) VALUES (?, ?, ?, ?)",
+                rows,
+            )
+
+    def stats(self):
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_ratio": self.hits / total if total else 0.0,
+            }
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
@@ -0,0 +1,230 @@
+import gc
+import hashlib
+import os
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+
+# Por debajo de este número de páginas no compensa arrancar procesos
+MIN_PARALLEL_PAGES = 32
+
+# Páginas por apertura del documento al leer página a página: al cerrarlo se
+# descartan los objetos que pdfminer guarda en caché (fuentes, imágenes, streams)
+REOPEN_EVERY = 200
+
+
+def _open_pdf(pdf_file, pages=None):
+    # pdfplumber (y pdfminer) tarda en importarse: se carga al abrir el primer PDF
+    import pdfplumber
+    return pdfplumber.open(pdf_file, pages=pages)
+
+
+def current_rss_mb():
+    """Memoria residente actual del proceso en MB, o None si el sistema no la expone."""
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") / 2**20
+    except (OSError, ValueError, IndexError):
+        return None
+
+
+def release_memory():
+    """Recoge los ciclos de objetos de pdfminer y devuelve al sistema la memoria libre."""
+    gc.collect()
+    try:
+        import ctypes
+        ctypes.CDLL("libc.so.6").malloc_trim(0)
+    except (OSError, AttributeError):
+        pass
+
+
+class MemoryGuard:
+    """Techo de memoria para la extracción.
+
+    `wait()` se llama entre páginas: si la memoria residente supera
+    `limit_mb`, libera cachés y espera (hasta `max_wait` segundos por página)
+    a que las etapas siguientes consuman lo que ya está en cola. Si aun así
+    no baja, sigue con la siguiente página: la extracción se frena, pero no
+    se interrumpe. `on_throttle(rss_mb, seconds)` recibe cada espera.
+    """
+
+    def __init__(self, limit_mb, poll_interval=0.1, max_wait=1.0, on_throttle=None,
+                 rss=current_rss_mb, sleep=time.sleep, clock=time.monotonic):
+        self.limit_mb = limit_mb
+        self.poll_interval = poll_interval
+        self.max_wait = max_wait
+        self.on_throttle = on_throttle
+        self.rss = rss
+        self.sleep = sleep
+        self.clock = clock
+        self.throttles = 0
+        self.throttled_seconds = 0.0
+
+    def over_limit(self):
+        rss = self.rss()
+        return rss is not None and rss > self.limit_mb
+
+    def wait(self, release=None):
+        if not self.over_limit():
+            return 0.0
+        start = self.clock()
+        if release:
+            release()
+        release_memory()
+        while self.over_limit() and self.clock() - start < self.max_wait:
+            self.sleep(self.poll_interval)
+        waited = self.clock() - start
+        self.throttles += 1
+        self.throttled_seconds += waited
+        if self.on_throttle:
+            self.on_throttle(self.rss(), waited)
+        return waited
+
+
+def count_pages(pdf_file):
+    """Devuelve el número de páginas del PDF."""
+    with _open_pdf(pdf_file) as pdf:
+        return len(pdf.pages)
+
+
+def _canonical(obj, memo, depth=0):
+    """Representación estable de un objeto del PDF, sin números de objeto (cambian al reescribirlo)."""
+    from pdfminer.pdftypes import PDFObjRef, PDFStream
+    if isinstance(obj, PDFObjRef):
+        key = obj.objid
+        if key not in memo:
+            # Se marca antes de resolver para cortar las referencias circulares
+            memo[key] = "ref"
+            memo[key] = _canonical(obj.resolve(), memo, depth + 1)
+        return memo[key]
+    if depth > 8:
+        return "..."
+    if isinstance(obj, PDFStream):
+        data = hashlib.sha256(obj.get_data()).hexdigest()
+        return ("stream", data, _canonical({k: v for k, v in obj.attrs.items()
+                                            if k not in ("Length", "Filter", "DecodeParms")}, memo, depth + 1))
+    if isinstance(obj, dict):
+        # "Parent" apunta al árbol de páginas, que cambia con cualquier página del libro
+        return tuple(sorted((str(k), _canonical(v, memo, depth + 1)) for k, v in obj.items() if k != "Parent"))
+    if isinstance(obj, (list, tuple)):
+        return tuple(_canonical(v, memo, depth + 1) for v in obj)
+    return repr(obj)
+
+
+def page_fingerprints(pdf_file, start_page, end_page):
+    """Genera una huella del contenido de cada página de [start_page, end_page).
+
+    La huella cubre los streams de dibujo de la página, sus fuentes y
+    XObjects y sus dimensiones, pero no la maquetación: se calcula mucho más
+    deprisa que `extract_text`. Dos páginas con la misma huella dan el mismo
+    texto, así que sirve para saber qué páginas de un PDF corregido no han
+    cambiado.
+    """
+    from pdfminer.pdftypes import resolve1
+    # Las fuentes y XObjects se comparten entre páginas: se resuelven una vez por documento
+    memo = {}
+    with _open_pdf(pdf_file, pages=range(start_page + 1, end_page + 1)) as pdf:
+        for page in pdf.pages:
+            obj = page.page_obj
+            resources = resolve1(obj.resources) or {}
+            digest = hashlib.sha256(repr((obj.mediabox, obj.cropbox, obj.rotate)).encode())
+            for stream in obj.contents:
+                digest.update(hashlib.sha256(resolve1(stream).get_data()).digest())
+            for key in ("Font", "XObject"):
+                digest.update(repr(_canonical(resources.get(key, {}), memo)).encode())
+            page.close()
+            yield digest.hexdigest()
+
+
+def _iter_range(pdf_file, start, end):
+    """Genera (texto, segundos) para cada página de [start, end)."""
+    with _open_pdf(pdf_file, pages=range(start + 1, end + 1)) as pdf:
+        for page in pdf.pages:
+            page_start = time.perf_counter()
+            try:
+                text = page.extract_text() or ""
+            finally:
+                # Sin esto pdfplumber conserva la maquetación de todas las páginas leídas
+                page.close()
+            yield text, time.perf_counter() - page_start
+
+
+def _extract_range(pdf_file, start, end):
+    """Extrae las páginas [start, end) con lo que tardó cada una. Se ejecuta en cada worker."""
+    return list(_iter_range(pdf_file, start, end))
+
+
+def _batches(runs, workers, batch_size=None):
+    """Reparte los tramos [start, end) en lotes contiguos de páginas, sin mezclar tramos en un lote."""
+    if batch_size is None:
+        # Varios lotes por worker para equilibrar páginas lentas y rápidas
+        total = sum(end - start for start, end in runs)
+        batch_size = max(1, -(-total // (workers * 4)))
+    return [(i, min(i + batch_size, end)) for start, end in runs for i in range(start, end, batch_size)]
+
+
+def iter_extracted(pdf_file, start_page, end_page, workers=None, batch_size=None,
+                   min_parallel_pages=MIN_PARALLEL_PAGES):
+    """Genera (texto, segundos) para cada página de [start_page, end_page), en orden."""
+    for _, text, seconds in iter_extracted_runs(pdf_file, [(start_page, end_page)], workers, batch_size,
+                                                min_parallel_pages):
+        yield text, seconds
+
+
+def iter_extracted_runs(pdf_file, runs, workers=None, batch_size=None, min_parallel_pages=MIN_PARALLEL_PAGES):
+    """Genera (página, texto, segundos) para cada página de los tramos `runs` ([(start, end), ...]), en orden.
+
+    Con más de un worker y suficientes páginas, todos los tramos se dividen
+    en lotes que reparte un único pool de procesos (cada proceso abre el PDF
+    por su cuenta). Como mucho hay `2 * workers` lotes por delante del que
+    se está leyendo, así que el texto en memoria no crece con el libro.
+    """
+    runs = [(start, end) for start, end in runs if end > start]
+    workers = workers or os.cpu_count() or 1
+    if workers <= 1 or sum(end - start for start, end in runs) < min_parallel_pages:
+        for start, end in runs:
+            for page, (text, seconds) in enumerate(_iter_range(pdf_file, start, end), start):
+                yield page, text, seconds
+        return
+    batches = iter(_batches(runs, workers, batch_size))
+    executor = ProcessPoolExecutor(max_workers=workers)
+    pending = deque()
+    try:
+        for start, end in batches:
+            pending.append((start, executor.submit(_extract_range, pdf_file, start, end)))
+            if len(pending) >= 2 * workers:
+                break
+        while pending:
+            start, future = pending.popleft()
+            pages = future.result()
+            batch = next(batches, None)
+            if batch is not None:
+                pending.append((batch[0], executor.submit(_extract_range, pdf_file, *batch)))
+            for page, (text, seconds) in enumerate(pages, start):
+                yield page, text, seconds
+    finally:
+        # shutdown(cancel_futures=True) es de Python 3.9: los lotes sin empezar se cancelan a mano
+        for _, future in pending:
+            future.cancel()
+        executor.shutdown()
+
+
+def iter_pages(pdf_file, start_page, end_page, reopen_every=REOPEN_EVERY, guard=None):
+    """Genera el texto de cada página de una en una, con memoria acotada.
+
+    Cada página libera su caché al terminar y el documento se reabre cada
+    `reopen_every` páginas. Con `guard` (un MemoryGuard) la lectura se frena
+    mientras el proceso supera su techo de memoria.
+    """
+    for window_start in range(start_page, end_page, reopen_every):
+        window_end = min(window_start + reopen_every, end_page)
+        with _open_pdf(pdf_file, pages=range(window_start + 1, window_end + 1)) as pdf:
+            for page in pdf.pages:
+                try:
+                    text = page.extract_text() or ""
+                finally:
+                    page.close()
+                yield text
+                if guard:
+                    guard.wait(release=pdf.flush_cache)
+        release_memory()
@@ -0,0 +1,251 @@
+import asyncio
+import queue
+import threading
+import time
+
+# Marca de fin de flujo entre etapas
+_END = object()
+
+
+class PipelineStopped(Exception):
+    """Se lanza dentro de una etapa cuando otra etapa ha fallado."""
+
+
+class StreamingPipeline:
+    """Pipeline extracción → chunks → traducción → síntesis con colas acotadas.
+
+    Cada etapa corre en su propio hilo y se comunica con la siguiente a través
+    de una `queue.Queue` de tamaño fijo, de modo que una etapa lenta frena a las
+    anteriores (backpressure) y nunca hay más de unos pocos chunks en memoria.
+    """
+
+    def __init__(self, creator, queue_size=8, manifest=None, lead_chunker=None, lead_chunks=1):
+        self.creator = creator
+        self.queue_size = queue_size
+        self.manifest = manifest
+        # Los primeros `lead_chunks` chunks se vuelven a partir con `lead_chunker`,
+        # más pequeño, para que el primer audio llegue antes (modo progresivo)
+        self.lead_chunker = lead_chunker
+        self.lead_chunks = lead_chunks if lead_chunker else 0
+        self._stop = threading.Event()
+        self._errors = []
+        self.started_at = None
+        self.first_chunk_seconds = None
+        self.pages_done = 0
+        self.total_pages = 0
+        # Bus de eventos del creador (ver instrumentation.py)
+        self.events = creator.events
+        self._queues = {}
+
+    # --- Utilidades de colas ---------------------------------------------
+
+    def _put(self, q, item):
+        while not self._stop.is_set():
+            try:
+                q.put(item, timeout=0.1)
+                return
+            except queue.Full:
+                continue
+        raise PipelineStopped()
+
+    def _get(self, q):
+        while not self._stop.is_set():
+            try:
+                return q.get(timeout=0.1)
+            except queue.Empty:
+                continue
+        raise PipelineStopped()
+
+    def _stage(self, target, *args):
+        def run():
+            try:
+                target(*args)
+            except PipelineStopped:
+                pass
+            except BaseException as e:
+                self._errors.append(e)
+                self._stop.set()
+        thread = threading.Thread(target=run, daemon=True)
+        thread.start()
+        return thread
+
+    # --- Etapas ----------------------------------------------------------
+
+    def _extract(self, out_q):
+        # El creador sirve las páginas ya indexadas y emite sus propios eventos
+        for page_text in self.creator.iter_page_texts():
+            self._put(out_q, page_text)
+            self.pages_done += 1
+        self._put(out_q, _END)
+
+    def _chunk(self, in_q, out_q):
+        emitted = 0
+
+        def pages():
+            while True:
+                page_text = self._get(in_q)
+                if page_text is _END:
+                    return
+                yield page_text
+
+        # Entre páginas solo se conservan la frase sin terminar y el chunk que se está llenando
+        for piece in self.creator.split_pages(pages()):
+            small = self.lead_chunker.split(piece) if emitted < self.lead_chunks else [piece]
+            emitted += 1
+            for chunk in small:
+                self._put(out_q, chunk)
+        self._put(out_q, _END)
+
+    def _translate(self, in_q, out_q):
+        batch_size = self.creator.translation_concurrency
+        finished = False
+        while not finished:
+            # Se espera al primer chunk y se añaden los que ya estén listos, hasta llenar el lote
+            batch = [self._get(in_q)]
+            while len(batch) < batch_size and batch[-1] is not _END:
+                try:
+                    batch.append(in_q.get_nowait())
+                except queue.Empty:
+                    break
+            if batch[-1] is _END:
+                batch.pop()
+                finished = True
+            if batch:
+                for chunk in self.creator.translate_chunks(batch):
+                    self._put(out_q, chunk)
+        self._put(out_q, _END)
+
+    async def _synthesize(self, in_q, concurrency, on_chunk_done):
+        loop = asyncio.get_running_loop()
+        # `concurrency` puede ser una función: el límite se reevalúa en cada chunk
+        limit = concurrency if callable(concurrency) else (lambda: concurrency)
+        active = 0
+        slot_freed = asyncio.Event()
+
+        async def acquire():
+            nonlocal active
+            while active >= max(1, limit()):
+                slot_freed.clear()
+                try:
+                    await asyncio.wait_for(slot_freed.wait(), 0.05)
+                except asyncio.TimeoutError:
+                    pass
+            active += 1
+
+        def release():
+            nonlocal active
+            active -= 1
+            slot_freed.set()
+
+        audio_files = []
+        tasks = set()
+        failures = []
+        completed = 0
+
+        def task_done(task):
+            tasks.discard(task)
+            if not task.cancelled() and task.exception():
+                failures.append(task.exception())
+
+        def finished(index, chunk_file):
+            nonlocal completed
+            completed += 1
+            if self.first_chunk_seconds is None:
+                self.first_chunk_seconds = time.perf_counter() - self.started_at
+            if on_chunk_done:
+                on_chunk_done(index, chunk_file, completed, self._estimated_chunks(len(audio_files)))
+
+        async def worker(index, chunk, chunk_file):
+            try:
+                await self.creator.text_to_speech(chunk, chunk_file)
+            finally:
+                release()
+            if self.manifest:
+                self.manifest.mark_done(index)
+            finished(index, chunk_file)
+
+        try:
+            while True:
+                # No se saca otro chunk de la cola hasta que haya hueco para sintetizarlo
+                await acquire()
+                chunk = await loop.run_in_executor(None, self._get, in_q)
+                if chunk is _END:
+                    release()
+                    break
+                index = len(audio_files)
+                self.events.emit("queue_depth", depths={name: q.qsize() for name, q in self._queues.items()})
+                chunk_file = self.creator.chunk_file(index)
+                audio_files.append(chunk_file)
+                if self.manifest:
+                    self.manifest.add_chunk(index, chunk, chunk_file)
+                    if self.manifest.is_done(index):
+                        # Ya sintetizado en una ejecución anterior
+                        self.events.emit("chunk_synthesized", chars=len(chunk), ok=True,
+                                         resumed=True, seconds=0.0)
+                        release()
+                        finished(index, chunk_file)
+                        continue
+                task = asyncio.ensure_future(worker(index, chunk, chunk_file))
+                tasks.add(task)
+                task.add_done_callback(task_done)
+                # Propaga el primer error de síntesis sin esperar al final
+                if failures:
+                    raise failures[0]
+            if tasks:
+                await asyncio.gather(*tasks)
+            if failures:
+                raise failures[0]
+            if self.manifest:
+                self.manifest.truncate(len(audio_files))
+                self.manifest.save()
+        except BaseException:
+            self._stop.set()
+            if self.manifest:
+                self.manifest.save()
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+            raise
+        return audio_files
+
+    def _estimated_chunks(self, chunks_so_far):
+        """Estima el total de chunks a partir de las páginas ya procesadas."""
+        if not self.pages_done or self.pages_done >= self.total_pages:
+            return chunks_so_far
+        return max(chunks_so_far, round(chunks_so_far * self.total_pages / self.pages_done))
+
+    # --- Entrada ---------------------------------------------------------
+
+    def run(self, concurrency=8, on_chunk_done=None):
+        """Ejecuta el pipeline completo y devuelve los archivos de audio en orden.
+
+        `concurrency` es un entero o una función sin argumentos que devuelve el
+        límite actual de síntesis en paralelo.
+        """
+        creator = self.creator
+        creator.resolve_page_range()
+        self.total_pages = max(0, creator.end_page - creator.start_page)
+
+        pages_q = queue.Queue(self.queue_size)
+        chunks_q = queue.Queue(self.queue_size)
+        ready_q = queue.Queue(self.queue_size)
+        self._queues = {"pages": pages_q, "chunks": chunks_q, "ready": ready_q}
+
+        self.started_at = time.perf_counter()
+        threads = [
+            self._stage(self._extract, pages_q),
+            self._stage(self._chunk, pages_q, chunks_q),
+            self._stage(self._translate, chunks_q, ready_q),
+        ]
+        try:
+            audio_files = asyncio.run(self._synthesize(ready_q, concurrency, on_chunk_done))
+        except PipelineStopped:
+            audio_files = None
+        finally:
+            self._stop.set()
+            for thread in threads:
+                thread.join()
+
+        if self._errors:
+            raise self._errors[0]
+        return audio_files
@@ -0,0 +1,168 @@
+import os
+import queue
+import shutil
+import tempfile
+import threading
+import time
+
+# Reproductores que aceptan MP3 por stdin, por orden de preferencia
+PLAYER_COMMANDS = [
+    ["mpv", "--no-video", "--really-quiet", "-"],
+    ["ffplay", "-nodisp", "-autoexit", "-loglevel", "quiet", "-i", "-"],
+]
+
+# Tamaño de los primeros chunks en modo progresivo (~20-30 s de voz)
+LEAD_CHUNK_LIMIT = 400
+
+
+def find_player_command():
+    for command in PLAYER_COMMANDS:
+        if shutil.which(command[0]):
+            return command
+    return None
+
+
+class ProgressivePlayer:
+    """Reproduce el audiolibro mientras se genera, alimentando al reproductor por stdin.
+
+    Recibe las tramas en orden de lectura (`feed`, conectado a
+    `Mp3Assembler.on_audio`) y arranca el reproductor en cuanto hay
+    `start_buffer` segundos de audio. La síntesis va mucho más deprisa que la
+    reproducción, así que el audio pendiente espera en un archivo temporal y
+    no en memoria. El búfer restante se estima con el reloj,
+    ya que el reproductor consume en tiempo real, y `concurrency()` pide más
+    paralelismo de síntesis cuando baja de `low_water` segundos.
+    """
+
+    def __init__(self, command=None, start_buffer=5.0, low_water=60.0,
+                 base_concurrency=2, max_concurrency=8, clock=time.monotonic):
+        self.command = command or find_player_command()
+        self.start_buffer = start_buffer
+        self.low_water = low_water
+        self.base_concurrency = base_concurrency
+        self.max_concurrency = max_concurrency
+        self.clock = clock
+        self.created_at = clock()
+        self.started_at = None
+        self.first_audio_seconds = None
+        self.fed_seconds = 0.0
+        self.underruns = 0
+        # Bytes de cada tramo escrito en `_spool`, en orden; None marca el final
+        self._queue = queue.Queue()
+        self._spool = None
+        self._process = None
+        self._thread = None
+        self._closed = False
+        self._lock = threading.Lock()
+
+    def feed(self, data, duration):
+        """Encola audio ya en orden; arranca la reproducción cuando el búfer inicial está lleno."""
+        with self._lock:
+            if self._closed:
+                return
+            now = self.clock()
+            if self.started_at is not None:
+                behind = (now - self.started_at) - self.fed_seconds
+                if behind > 0:
+                    # El reproductor se quedó sin audio y estuvo esperando
+                    self.underruns += 1
+                    self.started_at += behind
+            self.fed_seconds += duration
+            if self._spool is None:
+                self._spool = tempfile.TemporaryFile(prefix="audiolibro_", suffix=".mp3")
+            self._spool.seek(0, os.SEEK_END)
+            self._spool.write(data)
+            self._queue.put(len(data))
+            if self.started_at is None and self.fed_seconds >= self.start_buffer:
+                self._start(now)
+
+    def _start(self, now):
+        self.started_at = now
+        self.first_audio_seconds = now - self.created_at
+        if self.command:
+            import subprocess
+            try:
+                self._process = subprocess.Popen(self.command, stdin=subprocess.PIPE,
+                                                 stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+            except OSError as e:
+                print(f"No se pudo iniciar el reproductor: {e}")
+        else:
+            print("No se encontró mpv ni ffplay; el audiolibro se genera sin reproducirlo")
+        # Escribir en la tubería bloquea al ritmo de reproducción, así que va en su propio hilo
+        self._thread = threading.Thread(target=self._pump, daemon=True)
+        self._thread.start()
+
+    def _pump(self):
+        offset = 0
+        while True:
+            size = self._queue.get()
+            if size is None:
+                break
+            if self._process is None:
+                offset += size
+                continue
+            with self._lock:
+                self._spool.seek(offset)
+                data = self._spool.read(size)
+            offset += size
+            try:
+                self._process.stdin.write(data)
+                self._process.stdin.flush()
+            except OSError:
+                # El usuario cerró el reproductor; la generación continúa
+                self._process = None
+        if self._process is not None:
+            try:
+                self._process.stdin.close()
+            except OSError:
+                pass
+        self._close_spool()
+
+    def _close_spool(self):
+        with self._lock:
+            if self._spool is not None:
+                # El archivo temporal se borra al cerrarlo
+                self._spool.close()
+                self._spool = None
+
+    def buffered_seconds(self):
+        """Segundos de audio generados que aún no se han reproducido."""
+        with self._lock:
+            if self.started_at is None:
+                return self.fed_seconds
+            return max(0.0, self.fed_seconds - (self.clock() - self.started_at))
+
+    def concurrency(self):
+        """Chunks a sintetizar en paralelo: el máximo hasta que el búfer supera `low_water`."""
+        if self.started_at is None or self.buffered_seconds() < self.low_water:
+            return self.max_concurrency
+        return self.base_concurrency
+
+    def finish(self):
+        """No llegará más audio: el reproductor sigue hasta el final de lo recibido."""
+        with self._lock:
+            if self._closed:
+                return
+            self._closed = True
+            if self.started_at is None and self.fed_seconds:
+                # Libro más corto que el búfer inicial
+                self._start(self.clock())
+            self._queue.put(None)
+
+    def wait(self):
+        """Espera a que el reproductor termine."""
+        if self._thread:
+            self._thread.join()
+        process = self._process
+        if process is not None:
+            process.wait()
+
+    def abort(self):
+        with self._lock:
+            self._closed = True
+            self._queue.put(None)
+        if self._thread is None:
+            self._close_spool()
+        process = self._process
+        if process is not None:
+            process.terminate()
@@ -0,0 +1,252 @@
+"""Posprocesado del audio: recorte de silencios, volumen uniforme y fundidos entre chunks.
+
+Necesita NumPy y pydub (y ffmpeg para leer y escribir MP3; los WAV se leen y
+escriben sin él). Se activa con `AudioBookCreator(postprocess=True)`.
+"""
+import os
+import time
+import wave
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
+# Formato de salida de edge-tts: 24 kHz, mono
+SAMPLE_RATE = 24000
+
+# Ventana con la que se mide el nivel para detectar silencios y voz
+FRAME_MS = 10
+
+
+def frame_levels_db(samples, rate, frame_ms=FRAME_MS):
+    """Nivel RMS en dBFS de cada ventana de `frame_ms` (la última, incompleta, se ignora)."""
+    size = max(1, rate * frame_ms // 1000)
+    usable = len(samples) // size * size
+    if not usable:
+        return np.empty(0, dtype=np.float32)
+    frames = samples[:usable].reshape(-1, size)
+    power = np.einsum("ij,ij->i", frames, frames) / size
+    return 10 * np.log10(power + 1e-12)
+
+
+def trim_silence(samples, rate, threshold_db=-45.0, keep_ms=120):
+    """Quita el silencio del principio y del final, dejando `keep_ms` de margen a cada lado."""
+    levels = frame_levels_db(samples, rate)
+    loud = np.flatnonzero(levels > threshold_db)
+    if not loud.size:
+        return samples[:0]
+    size = max(1, rate * FRAME_MS // 1000)
+    keep = rate * keep_ms // 1000
+    start = max(0, loud[0] * size - keep)
+    end = min(len(samples), (loud[-1] + 1) * size + keep)
+    return samples[start:end]
+
+
+def speech_level_db(samples, rate, gate_db=-45.0):
+    """Nivel medio de las ventanas con voz (las más bajas que `gate_db` no cuentan); None si no hay voz."""
+    levels = frame_levels_db(samples, rate)
+    active = levels[levels > gate_db]
+    if not active.size:
+        return None
+    return float(10 * np.log10(np.mean(10 ** (active / 10))))
+
+
+def equal_power_crossfade(tail, head):
+    """Mezcla el final de un chunk con el principio del siguiente sin salto de volumen."""
+    n = min(len(tail), len(head))
+    if not n:
+        return np.concatenate([tail, head])
+    ramp = np.linspace(0.0, np.pi / 2, n, dtype=np.float32)
+    mixed = tail[len(tail) - n:] * np.cos(ramp) + head[:n] * np.sin(ramp)
+    return np.concatenate([tail[:len(tail) - n], mixed, head[n:]])
+
+
+class _WavWriter:
+    def __init__(self, output_file, rate):
+        self._wav = wave.open(output_file, "wb")
+        self._wav.setnchannels(1)
+        self._wav.setsampwidth(2)
+        self._wav.setframerate(rate)
+
+    def write(self, pcm):
+        self._wav.writeframes(pcm)
+
+    def close(self):
+        self._wav.close()
+
+    def abort(self):
+        self._wav.close()
+
+
+class _FfmpegWriter:
+    """Codifica a MP3 con un ffmpeg que recibe el PCM por la entrada estándar, bloque a bloque."""
+
+    def __init__(self, output_file, rate, bitrate):
+        import subprocess
+        from pydub.utils import get_encoder_name
+        self._process = subprocess.Popen(
+            [get_encoder_name(), "-loglevel", "error", "-y",
+             "-f", "s16le", "-ar", str(rate), "-ac", "1", "-i", "-",
+             "-c:a", "libmp3lame", "-b:a", bitrate, output_file],
+            stdin=subprocess.PIPE,
+        )
+
+    def write(self, pcm):
+        self._process.stdin.write(pcm)
+
+    def close(self):
+        self._process.stdin.close()
+        if self._process.wait():
+            raise OSError(f"ffmpeg terminó con código {self._process.returncode}")
+
+    def abort(self):
+        self._process.kill()
+        self._process.wait()
+
+
+def open_writer(output_file, rate, bitrate="48k"):
+    """Escritor por bloques: WAV con la biblioteca estándar y el resto con ffmpeg."""
+    if output_file.lower().endswith(".wav"):
+        return _WavWriter(output_file, rate)
+    return _FfmpegWriter(output_file, rate, bitrate)
+
+
+class AudioPostProcessor:
+    """Une los chunks del libro procesándolos como arrays de NumPy.
+
+    Cada chunk se decodifica (con pydub), se le recortan los silencios de los
+    bordes y se ajusta a un mismo nivel de voz (`target_db`, con la ganancia
+    acotada a `max_gain_db` y los picos por debajo de `ceiling_db`), de modo
+    que todo el libro suena igual de alto. Entre chunk y chunk se hace un
+    fundido de `crossfade_ms`. La salida se escribe en bloques de
+    `block_seconds` y como mucho hay `2 * decode_workers` chunks decodificados
+    a la vez, así que la memoria no depende de la longitud del libro.
+    """
+
+    def __init__(self, sample_rate=SAMPLE_RATE, target_db=-20.0, max_gain_db=12.0, ceiling_db=-1.0,
+                 silence_db=-45.0, keep_ms=120, crossfade_ms=30, block_seconds=30.0,
+                 decode_workers=1, bitrate="48k"):
+        self.sample_rate = sample_rate
+        self.target_db = target_db
+        self.max_gain_db = max_gain_db
+        self.ceiling = 10 ** (ceiling_db / 20)
+        self.silence_db = silence_db
+        self.keep_ms = keep_ms
+        self.crossfade = sample_rate * crossfade_ms // 1000
+        self.block = int(sample_rate * block_seconds)
+        self.decode_workers = max(1, int(decode_workers))
+        self.bitrate = bitrate
+        self._reset()
+
+    def _reset(self):
+        self.input_seconds = 0.0
+        self.output_seconds = 0.0
+        self.chunks = 0
+        self.silent_chunks = 0
+        self.gains_db = []
+        self.seconds = 0.0
+
+    def decode(self, path):
+        """Muestras float32 mono en [-1, 1] a `sample_rate`."""
+        from pydub import AudioSegment
+        segment = AudioSegment.from_file(path)
+        segment = segment.set_channels(1).set_frame_rate(self.sample_rate).set_sample_width(2)
+        return np.frombuffer(segment.raw_data, dtype="<i2").astype(np.float32) / 32768.0
+
+    def process(self, samples):
+        """Recorta y normaliza un chunk; devuelve (muestras, ganancia en dB o None si es silencio)."""
+        trimmed = trim_silence(samples, self.sample_rate, self.silence_db, self.keep_ms)
+        level = speech_level_db(trimmed, self.sample_rate, self.silence_db)
+        if level is None:
+            return trimmed, None
+        gain_db = float(np.clip(self.target_db - level, -self.max_gain_db, self.max_gain_db))
+        gain = 10 ** (gain_db / 20)
+        peak = float(np.max(np.abs(trimmed))) if trimmed.size else 0.0
+        if peak * gain > self.ceiling:
+            # Sin recortar picos: se baja la ganancia de este chunk lo justo
+            gain = self.ceiling / peak
+            gain_db = 20 * np.log10(gain)
+        trimmed *= gain
+        return trimmed, gain_db
+
+    def _load(self, path):
+        samples = self.decode(path)
+        duration = len(samples) / self.sample_rate
+        processed, gain_db = self.process(samples)
+        return duration, processed, gain_db
+
+    def _iter_loaded(self, audio_files):
+        """Chunks decodificados y procesados en orden, con como mucho 2 * decode_workers en memoria."""
+        if self.decode_workers == 1:
+            for path in audio_files:
+                yield self._load(path)
+            return
+        # La decodificación de MP3 ocurre en procesos de ffmpeg: los hilos bastan para usar varios núcleos
+        with ThreadPoolExecutor(max_workers=self.decode_workers) as executor:
+            pending = deque()
+            files = iter(audio_files)
+            for path in files:
+                pending.append(executor.submit(self._load, path))
+                if len(pending) >= 2 * self.decode_workers:
+                    break
+            while pending:
+                result = pending.popleft().result()
+                path = next(files, None)
+                if path is not None:
+                    pending.append(executor.submit(self._load, path))
+                yield result
+
+    def iter_blocks(self, audio_files):
+        """Genera el audio del libro procesado en bloques de como mucho `block_seconds`."""
+        carry = np.empty(0, dtype=np.float32)
+        for duration, samples, gain_db in self._iter_loaded(audio_files):
+            self.chunks += 1
+            self.input_seconds += duration
+            if gain_db is None:
+                self.silent_chunks += 1
+                continue
+            self.gains_db.append(gain_db)
+            carry = equal_power_crossfade(carry, samples) if carry.size else samples
+            # Se guarda el final para fundirlo con el chunk siguiente
+            keep = min(self.crossfade, len(carry))
+            ready = len(carry) - keep
+            for start in range(0, ready, self.block):
+                yield carry[start:min(start + self.block, ready)]
+            carry = carry[ready:].copy()
+        if carry.size:
+            yield carry
+
+    def run(self, audio_files, output_file):
+        """Procesa los chunks en orden y escribe `output_file`; devuelve las estadísticas."""
+        self._reset()
+        start = time.perf_counter()
+        writer = open_writer(output_file, self.sample_rate, self.bitrate)
+        try:
+            for block in self.iter_blocks(audio_files):
+                self.output_seconds += len(block) / self.sample_rate
+                pcm = (np.clip(block, -1.0, 1.0) * 32767).astype("<i2")
+                writer.write(pcm.tobytes())
+            writer.close()
+        except BaseException:
+            writer.abort()
+            try:
+                os.remove(output_file)
+            except OSError:
+                pass
+            raise
+        self.seconds = time.perf_counter() - start
+        return self.stats()
+
+    def stats(self):
+        gains = np.array(self.gains_db) if self.gains_db else np.zeros(1)
+        return {
+            "chunks": self.chunks,
+            "silent_chunks": self.silent_chunks,
+            "input_seconds": self.input_seconds,
+            "output_seconds": self.output_seconds,
+            "trimmed_seconds": self.input_seconds - self.output_seconds,
+            "gain_db_min": float(gains.min()),
+            "gain_db_max": float(gains.max()),
+            "seconds": self.seconds,
+            "audio_seconds_per_second": self.input_seconds / self.seconds if self.seconds else 0.0,
+        }
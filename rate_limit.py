@@ -0,0 +1,216 @@
+import asyncio
+import random
+import threading
+import time
+
+_SCHEDULERS = {}
+_SCHEDULERS_LOCK = threading.Lock()
+
+
+def is_throttle(exc):
+    """¿El servicio nos está frenando (429, 503 o timeout) en lugar de rechazar la petición?"""
+    # Antes de Python 3.11 asyncio.TimeoutError (el de wait_for, aiohttp o edge-tts) no es TimeoutError
+    if isinstance(exc, (TimeoutError, asyncio.TimeoutError)):
+        return True
+    response = getattr(exc, "response", None)
+    for status in (getattr(exc, "status", None), getattr(exc, "status_code", None),
+                   getattr(response, "status_code", None), getattr(response, "status", None)):
+        if status in (429, 503):
+            return True
+    text = str(exc)
+    return "429" in text or "Too Many Requests" in text
+
+
+class TokenBucket:
+    """Limita las llamadas a `rate` por segundo con ráfagas de hasta `burst`.
+
+    Se comparte entre hilos y event loops, así que la espera se hace con
+    `asyncio.sleep` fuera del lock.
+    """
+
+    def __init__(self, rate, burst=None, clock=time.monotonic):
+        self.rate = rate
+        self.burst = burst or max(1.0, rate)
+        self.clock = clock
+        self.tokens = self.burst
+        self._last = clock()
+        self._lock = threading.Lock()
+
+    def _take(self):
+        """Consume un token si hay; si no, devuelve cuánto esperar."""
+        with self._lock:
+            now = self.clock()
+            self.tokens = min(self.burst, self.tokens + (now - self._last) * self.rate)
+            self._last = now
+            if self.tokens >= 1:
+                self.tokens -= 1
+                return 0.0
+            return (1 - self.tokens) / self.rate
+
+    async def acquire(self):
+        while True:
+            wait = self._take()
+            if not wait:
+                return
+            await asyncio.sleep(wait)
+
+
+class AdaptiveConcurrency:
+    """Límite de llamadas simultáneas que se ajusta con AIMD.
+
+    Cada éxito suma 1/limit (un hueco más por cada ronda completa sin
+    errores) y cada señal de saturación lo multiplica por `decrease`. Como en
+    TCP, solo reduce una vez por ronda: los 429 de llamadas que empezaron antes
+    de la última reducción ya se contaron, así que una ráfaga de la misma
+    ronda no hunde el límite. Así oscila poco alrededor de lo que el servicio
+    admite de verdad.
+    """
+
+    def __init__(self, initial, minimum=1, maximum=None, decrease=0.5,
+                 poll_interval=0.01, clock=time.monotonic):
+        self.minimum = minimum
+        self.maximum = maximum or initial
+        self.limit = float(max(minimum, min(initial, self.maximum)))
+        self.decrease = decrease
+        self.poll_interval = poll_interval
+        self.clock = clock
+        self.in_flight = 0
+        self.peak = 0
+        self.throttles = 0
+        self._last_decrease = None
+        self._lock = threading.Lock()
+
+    def _try_acquire(self):
+        with self._lock:
+            if self.in_flight < int(self.limit):
+                self.in_flight += 1
+                self.peak = max(self.peak, self.in_flight)
+                return True
+            return False
+
+    async def __aenter__(self):
+        while not self._try_acquire():
+            await asyncio.sleep(self.poll_interval)
+        return self
+
+    async def __aexit__(self, *exc):
+        with self._lock:
+            self.in_flight -= 1
+
+    def on_success(self):
+        with self._lock:
+            self.limit = min(self.maximum, self.limit + 1 / self.limit)
+
+    def on_throttle(self, started_at=None):
+        """`started_at` es cuándo empezó la llamada rechazada (`clock()`)."""
+        with self._lock:
+            self.throttles += 1
+            if started_at is None:
+                started_at = self.clock()
+            if self._last_decrease is None or started_at >= self._last_decrease:
+                self.limit = max(self.minimum, self.limit * self.decrease)
+                self._last_decrease = self.clock()
+
+
+class CallScheduler:
+    """Planificador de llamadas a un backend: ritmo, concurrencia adaptativa y reintentos.
+
+    Cada intento pasa por el límite AIMD y por el token bucket. Si falla, se
+    reintenta con backoff exponencial y jitter completo (espera aleatoria
+    entre 0 y base·2^intento); los 429 y timeouts además reducen la
+    concurrencia. Solo tras agotar los reintentos se propaga el error:
+    `retries` es el valor por defecto y cada llamada puede pedir otro, porque
+    el planificador se comparte entre trabajos con configuraciones distintas.
+    """
+
+    def __init__(self, name, concurrency=4, max_concurrency=None, rate=None, burst=None,
+                 retries=4, base_delay=0.5, max_delay=30.0, timeout=None):
+        self.name = name
+        self.concurrency = AdaptiveConcurrency(concurrency, maximum=max_concurrency or concurrency)
+        self.bucket = TokenBucket(rate, burst) if rate else None
+        self.retries = retries
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.timeout = timeout
+        self.calls = 0
+        self.retried = 0
+        self.failures = 0
+        self._lock = threading.Lock()
+
+    @classmethod
+    def for_backend(cls, backend):
+        """Planificador compartido por todos los trabajos que usan el mismo backend.
+
+        Solo se comparte el estado del servicio (ritmo y concurrencia); los
+        reintentos de cada trabajo se pasan en `call`.
+        """
+        # Por clase: un backend de TTS y uno de traducción pueden llamarse igual
+        key = type(backend)
+        with _SCHEDULERS_LOCK:
+            scheduler = _SCHEDULERS.get(key)
+            if scheduler is None:
+                scheduler = cls(backend.name,
+                                concurrency=backend.concurrency,
+                                max_concurrency=getattr(backend, "max_concurrency", None),
+                                rate=getattr(backend, "rate_limit", None),
+                                burst=getattr(backend, "burst", None),
+                                timeout=getattr(backend, "timeout", None))
+                _SCHEDULERS[key] = scheduler
+            return scheduler
+
+    def backoff(self, attempt, exc=None):
+        retry_after = getattr(exc, "retry_after", None)
+        if retry_after:
+            return float(retry_after)
+        return random.uniform(0, min(self.max_delay, self.base_delay * 2 ** attempt))
+
+    async def call(self, fn, on_retry=None, retries=None):
+        """Ejecuta la corrutina que devuelve `fn()` con hasta `retries` reintentos (por defecto, `self.retries`).
+
+        `on_retry(attempt, exc, delay)` se llama antes de cada espera.
+        """
+        retries = self.retries if retries is None else retries
+        for attempt in range(retries + 1):
+            started_at = None
+            try:
+                async with self.concurrency:
+                    started_at = self.concurrency.clock()
+                    if self.bucket:
+                        await self.bucket.acquire()
+                    with self._lock:
+                        self.calls += 1
+                    if self.timeout:
+                        result = await asyncio.wait_for(fn(), self.timeout)
+                    else:
+                        result = await fn()
+                self.concurrency.on_success()
+                return result
+            except Exception as e:
+                if is_throttle(e):
+                    self.concurrency.on_throttle(started_at)
+                if attempt == retries:
+                    with self._lock:
+                        self.failures += 1
+                    raise
+                delay = self.backoff(attempt, e)
+                with self._lock:
+                    self.retried += 1
+                if on_retry:
+                    on_retry(attempt + 1, e, delay)
+                await asyncio.sleep(delay)
+
+    def stats(self):
+        return {
+            "calls": self.calls,
+            "retries": self.retried,
+            "failures": self.failures,
+            "throttles": self.concurrency.throttles,
+            "limit": self.concurrency.limit,
+            "peak_in_flight": self.concurrency.peak,
+        }
+
+
+def reset_call_schedulers():
+    """Olvida los planificadores compartidos (para empezar una medición desde cero)."""
+    with _SCHEDULERS_LOCK:
+        _SCHEDULERS.clear()
@@ -0,0 +1,236 @@
+import asyncio
+import hashlib
+import os
+import threading
+import time
+import traceback
+from concurrent.futures import ThreadPoolExecutor
+
+DEFAULT_WORKSPACE_ROOT = os.path.join(os.path.expanduser("~"), ".cache", "audiolibros", "jobs")
+
+
+class SharedLimiter:
+    """Límite de concurrencia compartido entre hilos y entre event loops.
+
+    Cada libro corre en su propio hilo con su propio event loop, así que un
+    `asyncio.Semaphore` no sirve para repartir el cupo de un backend entre
+    libros. Se usa tanto con `with` (hilos de traducción) como con
+    `async with` (síntesis).
+    """
+
+    def __init__(self, limit, poll_interval=0.01):
+        self.limit = limit
+        self.poll_interval = poll_interval
+        self._semaphore = threading.BoundedSemaphore(limit)
+        self._lock = threading.Lock()
+        self.in_use = 0
+        self.peak = 0
+
+    def _acquired(self):
+        with self._lock:
+            self.in_use += 1
+            self.peak = max(self.peak, self.in_use)
+
+    def release(self):
+        with self._lock:
+            self.in_use -= 1
+        self._semaphore.release()
+
+    def __enter__(self):
+        self._semaphore.acquire()
+        self._acquired()
+        return self
+
+    def __exit__(self, *exc):
+        self.release()
+
+    async def __aenter__(self):
+        # Sin bloquear el event loop: se reintenta hasta que quede un hueco
+        while not self._semaphore.acquire(blocking=False):
+            await asyncio.sleep(self.poll_interval)
+        self._acquired()
+        return self
+
+    async def __aexit__(self, *exc):
+        self.release()
+
+
+def job_id(job):
+    """Identificador estable del trabajo, para que su workspace sobreviva a reinicios."""
+    key = f"{os.path.abspath(job['pdf_file'])}|{os.path.abspath(job['output_dir'])}"
+    return hashlib.sha256(key.encode("utf-8")).hexdigest()[:16]
+
+
+class JobScheduler:
+    """Ejecuta varios libros en un pool acotado con cupos de TTS y traducción compartidos.
+
+    Cada trabajo es un dict con los argumentos de `AudioBookCreator` y recibe
+    su propio directorio de trabajo, así que los chunks de un libro nunca
+    pisan los de otro.
+    """
+
+    def __init__(self, max_workers=2, tts_limit=16, translation_limit=8,
+                 workspace_root=None, creator_factory=None):
+        self.max_workers = max_workers
+        self.tts_limiter = SharedLimiter(tts_limit)
+        self.translation_limiter = SharedLimiter(translation_limit)
+        self.workspace_root = workspace_root or DEFAULT_WORKSPACE_ROOT
+        self.creator_factory = creator_factory
+        self._executor = None
+        # Futures de `submit` sin terminar, para cancelar los que no han empezado al cerrar
+        self._submitted = set()
+        self._submit_lock = threading.Lock()
+        # Creadores en marcha, para poder cancelarlos todos (Ctrl+C en `run`)
+        self._active = set()
+        self._active_lock = threading.Lock()
+        self._cancelling = False
+
+    def _factory(self):
+        if self.creator_factory is None:
+            from audio import AudioBookCreator
+            self.creator_factory = AudioBookCreator
+        return self.creator_factory
+
+    def _check_outputs(self, jobs):
+        seen = set()
+        for job in jobs:
+            output_dir = os.path.abspath(job["output_dir"])
+            if output_dir in seen:
+                raise ValueError(f"Dos trabajos escriben en el mismo directorio: {job['output_dir']}")
+            seen.add(output_dir)
+
+    def run_job(self, job, on_job_done=None):
+        """Ejecuta un trabajo y devuelve su informe (nunca lanza)."""
+        job = dict(job)
+        report = {
+            "id": job_id(job),
+            "pdf_file": job["pdf_file"],
+            "output_dir": job["output_dir"],
+            "status": "running",
+        }
+        job.setdefault("work_dir", os.path.join(self.workspace_root, report["id"]))
+        creator = None
+        start = time.perf_counter()
+        try:
+            creator = self._factory()(**job)
+            creator.tts_limiter = self.tts_limiter
+            creator.translation_limiter = self.translation_limiter
+            with self._active_lock:
+                self._active.add(creator)
+                if self._cancelling:
+                    creator.cancel()
+            output_file = creator.create_audiobook()
+            if output_file:
+                report["status"] = "done"
+            else:
+                report["status"] = "cancelled" if getattr(creator, "status", None) == "cancelled" else "failed"
+            report["output_file"] = output_file
+        except Exception as e:
+            report["status"] = "failed"
+            report["error"] = f"{type(e).__name__}: {e}"
+            traceback.print_exc()
+        finally:
+            with self._active_lock:
+                self._active.discard(creator)
+        elapsed = time.perf_counter() - start
+        report["seconds"] = elapsed
+        report.update(_throughput(creator, elapsed))
+        if on_job_done:
+            on_job_done(creator, report)
+        return report
+
+    def submit(self, job, on_job_done=None):
+        """Encola un trabajo sin esperar a los anteriores y devuelve su Future.
+
+        Los trabajos enviados así comparten el pool y los cupos, de modo que
+        se pueden añadir libros mientras otros se están procesando. Si el
+        Future se cancela antes de empezar, el trabajo no llega a ejecutarse.
+        """
+        with self._submit_lock:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="libro")
+            future = self._executor.submit(self.run_job, job, on_job_done)
+            self._submitted.add(future)
+        future.add_done_callback(self._forget)
+        return future
+
+    def _forget(self, future):
+        with self._submit_lock:
+            self._submitted.discard(future)
+
+    def cancel_all(self):
+        """Cancela los libros en marcha y los que empiecen a partir de ahora (se reanudan con resume)."""
+        with self._active_lock:
+            self._cancelling = True
+            creators = list(self._active)
+        for creator in creators:
+            creator.cancel()
+
+    def shutdown(self, wait=True):
+        """Descarta los trabajos enviados con `submit` que no han empezado y espera al resto."""
+        with self._submit_lock:
+            executor, self._executor = self._executor, None
+            submitted, self._submitted = self._submitted, set()
+        # shutdown(cancel_futures=True) es de Python 3.9
+        for future in submitted:
+            future.cancel()
+        if executor:
+            executor.shutdown(wait=wait)
+
+    def run(self, jobs, on_job_done=None):
+        """Ejecuta todos los trabajos y devuelve (informes por trabajo, resumen global)."""
+        jobs = list(jobs)
+        self._check_outputs(jobs)
+        start = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            futures = [executor.submit(self.run_job, job, on_job_done) for job in jobs]
+            try:
+                reports = [future.result() for future in futures]
+            except BaseException:
+                # Ctrl+C: al salir del `with` se espera a los hilos, así que primero se detienen los libros
+                for future in futures:
+                    future.cancel()
+                self.cancel_all()
+                raise
+        elapsed = time.perf_counter() - start
+        summary = {
+            "jobs": len(reports),
+            "done": sum(r["status"] == "done" for r in reports),
+            "failed": sum(r["status"] != "done" for r in reports),
+            "seconds": elapsed,
+            "pages": sum(r.get("pages", 0) for r in reports),
+            "chars": sum(r.get("chars", 0) for r in reports),
+            "chunks": sum(r.get("chunks", 0) for r in reports),
+            "peak_tts_concurrency": self.tts_limiter.peak,
+            "peak_translation_concurrency": self.translation_limiter.peak,
+        }
+        summary["pages_per_second"] = summary["pages"] / elapsed if elapsed else 0.0
+        summary["chunks_per_second"] = summary["chunks"] / elapsed if elapsed else 0.0
+        return reports, summary
+
+
+def _throughput(creator, elapsed):
+    if creator is None or creator.manifest is None or creator.start_page is None:
+        return {}
+    chunks = creator.manifest.chunks
+    pages = max(0, (creator.end_page or 0) - creator.start_page)
+    chars = chunks[-1]["end"] if chunks else 0
+    return {
+        "pages": pages,
+        "chars": chars,
+        "chunks": len(chunks),
+        "pages_per_second": pages / elapsed if elapsed else 0.0,
+        "chunks_per_second": len(chunks) / elapsed if elapsed else 0.0,
+    }
+
+
+def print_report(reports, summary):
+    for r in reports:
+        line = f"[{r['status']}] {r['pdf_file']} → {r['output_dir']}  {r['seconds']:.1f}s"
+        if "pages" in r:
+            line += f"  {r['pages_per_second']:.2f} páginas/s  {r['chunks_per_second']:.2f} chunks/s"
+        if "error" in r:
+            line += f"  ({r['error']})"
+        print(line)
+    print(f"Total: {summary['done']}/{summary['jobs']} libros en {summary['seconds']:.1f}s, "
+          f"{summary['pages_per_second']:.2f} páginas/s, {summary['chunks_per_second']:.2f} chunks/s")
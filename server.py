@@ -0,0 +1,597 @@
+"""Servicio HTTP local: cola persistente de audiolibros con un pool de trabajadores.
+
+Uso:
+    python server.py --port 8765 --workers 2 --data-dir ~/audiolibros-servicio
+
+    curl -X POST localhost:8765/jobs -d '{"pdf": "/ruta/libro.pdf", "start_page": 9, "translate": true}'
+    curl -X POST 'localhost:8765/jobs?end_page=40&voice=es-ES-AlvaroNeural' \\
+         -H 'Content-Type: application/pdf' --data-binary @libro.pdf
+    curl localhost:8765/jobs/<id>
+    curl -O -r 0-999999 localhost:8765/jobs/<id>/audio
+
+Rutas:
+    POST /jobs                  encola un libro (JSON con "pdf", o el PDF en el cuerpo y las opciones en la URL)
+    GET  /jobs[?status=queued]  trabajos más recientes primero
+    GET  /jobs/<id>             estado, progreso y tiempo restante
+    GET  /jobs/<id>/metrics     métricas por etapa (en directo mientras se ejecuta)
+    GET  /jobs/<id>/audio       el audiolibro terminado, con soporte de Range
+    POST /jobs/<id>/cancel      cancela (lo sintetizado se conserva)
+    POST /jobs/<id>/retry       vuelve a encolar un trabajo fallido o cancelado; sigue donde se quedó
+    GET  /metrics               cola, trabajadores y cupos de TTS y traducción
+
+Los trabajos se guardan en SQLite (`job_queue.py`) y se ejecutan con el
+`JobScheduler` y `resume=True`: si el servicio se detiene, los que estaban
+en marcha vuelven a la cola y al arrancar continúan desde el último chunk
+terminado.
+"""
+import argparse
+import inspect
+import json
+import os
+import re
+import sys
+import threading
+import time
+from http import HTTPStatus
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlsplit
+
+from cli import FailureCollector, ManifestError, normalize_job
+from job_queue import FINAL_STATUSES, STATUSES, JobQueue
+from scheduler import JobScheduler
+
+DEFAULT_DATA_DIR = os.path.join(os.path.expanduser("~"), ".cache", "audiolibros", "servicio")
+
+# Opciones de AudioBookCreator que puede elegir quien envía un trabajo; el
+# resto (rutas, cachés, comandos) solo se fijan en el servidor con --defaults
+CLIENT_OPTIONS = {
+    "pdf", "pdf_file", "start_page", "end_page", "translate", "translate_to_spanish", "target_language",
+    "voice", "tts_backend", "translation_backend", "detect_language", "clean_text", "streaming",
+    "incremental", "postprocess",
+}
+
+# El progreso se escribe en la base como mucho cada tantos segundos; entre medias se sirve de memoria
+PROGRESS_SAVE_INTERVAL = 2.0
+
+BLOCK_SIZE = 64 * 1024
+
+_RANGE = re.compile(r"bytes=(\d*)-(\d*)$")
+
+
+class RequestError(Exception):
+    """Petición que no se puede atender; se responde con `status` y el mensaje en JSON."""
+
+    def __init__(self, status, message):
+        super().__init__(message)
+        self.status = status
+
+
+def parse_range(header, size):
+    """(inicio, fin incluido) pedidos en una cabecera Range de un solo tramo.
+
+    Devuelve None si no hay cabecera o no se entiende (se sirve el archivo
+    entero, como permite el estándar) y lanza RequestError 416 si el tramo
+    queda fuera del archivo.
+    """
+    if not header:
+        return None
+    match = _RANGE.match(header.strip())
+    if not match or not any(match.groups()):
+        return None
+    first, last = match.groups()
+    if not first:
+        # "bytes=-N": los últimos N bytes
+        length = int(last)
+        if not length or not size:
+            raise RequestError(HTTPStatus.REQUESTED_RANGE_NOT_SATISFIABLE, f"Rango no válido: {header}")
+        return max(0, size - length), size - 1
+    start = int(first)
+    end = min(int(last), size - 1) if last else size - 1
+    if start >= size or end < start:
+        raise RequestError(HTTPStatus.REQUESTED_RANGE_NOT_SATISFIABLE, f"Rango no válido: {header}")
+    return start, end
+
+
+class JobService:
+    """Cola persistente de libros ejecutada por un `JobScheduler`.
+
+    Un hilo reparte los trabajos de la cola entre `workers` huecos del pool;
+    todos comparten los cupos de TTS y traducción, así que con varios libros
+    en marcha el backend se mantiene ocupado sin pasarse de su límite. Cada
+    trabajo escribe en `salidas/<id>` dentro de `data_dir` y su directorio de
+    trabajo es estable, de modo que `resume=True` retoma lo ya sintetizado
+    tras un reinicio.
+    """
+
+    def __init__(self, data_dir=None, workers=2, tts_limit=16, translation_limit=8, defaults=None,
+                 creator_factory=None):
+        self.data_dir = os.path.abspath(data_dir or DEFAULT_DATA_DIR)
+        self.upload_dir = os.path.join(self.data_dir, "uploads")
+        self.output_root = os.path.join(self.data_dir, "salidas")
+        os.makedirs(self.upload_dir, exist_ok=True)
+        os.makedirs(self.output_root, exist_ok=True)
+        self.workers = workers
+        self.defaults = dict(defaults or {})
+        self.queue = JobQueue(os.path.join(self.data_dir, "cola.sqlite3"))
+        self._creator_class = creator_factory
+        self.scheduler = JobScheduler(max_workers=workers, tts_limit=tts_limit,
+                                      translation_limit=translation_limit,
+                                      workspace_root=os.path.join(self.data_dir, "trabajo"),
+                                      creator_factory=self._create_creator)
+        self._lock = threading.Lock()
+        self._slots = threading.Semaphore(workers)
+        self._wakeup = threading.Event()
+        self._stopping = threading.Event()
+        self._dispatcher = None
+        # Trabajos en marcha: id -> creator (None hasta que se construye)
+        self._running = {}
+        self._by_output = {}
+        self._collectors = {}
+        self._live = {}
+        self._progress_saved = {}
+        self.started = None
+        self.finished = {status: 0 for status in FINAL_STATUSES}
+
+    def _factory(self):
+        if self._creator_class is None:
+            from audio import AudioBookCreator
+            self._creator_class = AudioBookCreator
+        return self._creator_class
+
+    def start(self):
+        requeued = self.queue.recover()
+        if requeued:
+            print(f"{requeued} trabajos interrumpidos vuelven a la cola y se reanudarán")
+        self.started = time.time()
+        self._dispatcher = threading.Thread(target=self._dispatch_loop, name="cola-libros", daemon=True)
+        self._dispatcher.start()
+
+    def stop(self):
+        """Detiene el reparto y cancela lo que está en marcha; esos trabajos quedan en cola para el próximo arranque."""
+        self._stopping.set()
+        self._wakeup.set()
+        with self._lock:
+            creators = [creator for creator in self._running.values() if creator is not None]
+        for creator in creators:
+            creator.cancel()
+        if self._dispatcher:
+            self._dispatcher.join()
+        self.scheduler.shutdown(wait=True)
+        self.queue.close()
+
+    def _dispatch_loop(self):
+        while not self._stopping.is_set():
+            if not self._slots.acquire(timeout=0.5):
+                continue
+            # Se limpia antes de mirar la cola: un envío posterior no se pierde
+            self._wakeup.clear()
+            job = None if self._stopping.is_set() else self.queue.claim()
+            if job is None:
+                self._slots.release()
+                self._wakeup.wait(1.0)
+                continue
+            self._launch(job)
+
+    def _launch(self, job):
+        params = job["params"]
+        with self._lock:
+            self._running[job["id"]] = None
+            self._by_output[os.path.abspath(params["output_dir"])] = job["id"]
+        print(f"Empieza el trabajo {job['id']} (intento {job['attempts']}): {params['pdf_file']}")
+        self.scheduler.submit(params, self._job_done)
+
+    def _create_creator(self, **params):
+        creator = self._factory()(**params)
+        collector = FailureCollector()
+        creator.events.subscribe(collector)
+        with self._lock:
+            job_id = self._by_output[os.path.abspath(params["output_dir"])]
+            self._running[job_id] = creator
+            self._collectors[job_id] = collector
+        creator.set_progress_callback(lambda percent, eta: self._progress(job_id, percent, eta))
+        # Una cancelación pudo llegar mientras se construía el creator
+        if self._stopping.is_set() or self.queue.get(job_id)["status"] == "cancelling":
+            creator.cancel()
+        return creator
+
+    def _progress(self, job_id, percent, eta):
+        now = time.monotonic()
+        with self._lock:
+            self._live[job_id] = (percent, eta)
+            if now - self._progress_saved.get(job_id, 0.0) < PROGRESS_SAVE_INTERVAL:
+                return
+            self._progress_saved[job_id] = now
+        self.queue.set_progress(job_id, percent, eta)
+
+    def _job_done(self, creator, report):
+        with self._lock:
+            job_id = self._by_output.pop(os.path.abspath(report["output_dir"]))
+            self._running.pop(job_id, None)
+            collector = self._collectors.pop(job_id, None)
+            self._live.pop(job_id, None)
+            self._progress_saved.pop(job_id, None)
+        try:
+            status = report["status"]
+            if collector:
+                report["failed_chunks"] = collector.failures
+                report["retries"] = collector.retries
+            if creator is not None:
+                report["metrics"] = creator.metrics.summary()
+                if status != "done" and creator.manifest:
+                    report["pending_chunks"] = len(creator.manifest.pending())
+            current = self.queue.get(job_id)["status"]
+            if status != "done" and current == "cancelling":
+                status = "cancelled"
+            elif status == "cancelled" and self._stopping.is_set():
+                # Interrumpido por el cierre del servicio, no por el usuario
+                self.queue.requeue(job_id)
+                print(f"Trabajo {job_id} interrumpido; se reanudará al volver a arrancar")
+                return
+            error = report.get("error")
+            if status == "failed" and not error:
+                error = f"{report.get('pending_chunks', 0)} chunks sin completar"
+            self.queue.finish(job_id, status, output_file=report.get("output_file"), error=error, report=report)
+            with self._lock:
+                self.finished[status] += 1
+            print(f"Trabajo {job_id}: {status} en {report['seconds']:.1f}s")
+        finally:
+            self._slots.release()
+            self._wakeup.set()
+
+    def submit(self, options, job_id=None):
+        """Valida las opciones de un libro y lo encola; devuelve el trabajo."""
+        unknown = sorted(set(options) - CLIENT_OPTIONS)
+        if unknown:
+            raise RequestError(HTTPStatus.BAD_REQUEST, f"Opciones no admitidas: {', '.join(unknown)}")
+        for key in ("start_page", "end_page"):
+            value = options.get(key)
+            if value is not None and (not isinstance(value, int) or isinstance(value, bool) or value < 0):
+                raise RequestError(HTTPStatus.BAD_REQUEST, f"'{key}' debe ser un entero no negativo")
+        pdf_file = options.get("pdf") or options.get("pdf_file")
+        if not isinstance(pdf_file, str) or not os.path.isfile(pdf_file):
+            raise RequestError(HTTPStatus.BAD_REQUEST, f"No existe el PDF: {pdf_file}")
+        job_id = job_id or self.queue.new_id()
+        entry = {key: value for key, value in options.items() if key not in ("pdf", "pdf_file")}
+        entry.update(pdf_file=os.path.abspath(pdf_file), output_dir=os.path.join(self.output_root, job_id),
+                     resume=True)
+        creator_params = set(inspect.signature(self._factory()).parameters)
+        try:
+            params = normalize_job(entry, self.defaults, creator_params)
+        except ManifestError as e:
+            raise RequestError(HTTPStatus.BAD_REQUEST, str(e)) from None
+        job = self.queue.add(params, job_id)
+        self._wakeup.set()
+        return job
+
+    def save_upload(self, stream, length, max_bytes):
+        """Guarda un PDF enviado en el cuerpo de la petición y devuelve (id del trabajo, ruta)."""
+        if length > max_bytes:
+            raise RequestError(HTTPStatus.REQUEST_ENTITY_TOO_LARGE,
+                               f"El PDF ocupa {length} bytes; el máximo es {max_bytes}")
+        job_id = self.queue.new_id()
+        path = os.path.join(self.upload_dir, f"{job_id}.pdf")
+        partial = path + ".part"
+        remaining = length
+        try:
+            with open(partial, "wb") as f:
+                while remaining:
+                    block = stream.read(min(BLOCK_SIZE, remaining))
+                    if not block:
+                        raise RequestError(HTTPStatus.BAD_REQUEST, "El cuerpo terminó antes de Content-Length")
+                    if remaining == length and not block.startswith(b"%PDF-"):
+                        raise RequestError(HTTPStatus.UNSUPPORTED_MEDIA_TYPE, "El cuerpo no es un PDF")
+                    f.write(block)
+                    remaining -= len(block)
+            os.replace(partial, path)
+        except BaseException:
+            try:
+                os.remove(partial)
+            except OSError:
+                pass
+            raise
+        return job_id, path
+
+    def cancel(self, job_id):
+        status = self.queue.request_cancel(job_id)
+        if status is None:
+            raise RequestError(HTTPStatus.NOT_FOUND, f"No existe el trabajo {job_id}")
+        if status == "cancelling":
+            with self._lock:
+                creator = self._running.get(job_id)
+            if creator is not None:
+                creator.cancel()
+        return self.job(job_id)
+
+    def retry(self, job_id):
+        job = self.job(job_id)
+        if job["status"] not in ("failed", "cancelled"):
+            raise RequestError(HTTPStatus.CONFLICT, f"El trabajo {job_id} está {job['status']}; "
+                                                    f"solo se reintentan los fallidos o cancelados")
+        self.queue.requeue(job_id)
+        self._wakeup.set()
+        return self.job(job_id)
+
+    def job(self, job_id):
+        """El trabajo con el progreso en directo si está en marcha."""
+        job = self.queue.get(job_id)
+        if job is None:
+            raise RequestError(HTTPStatus.NOT_FOUND, f"No existe el trabajo {job_id}")
+        with self._lock:
+            live = self._live.get(job_id)
+        if live is not None:
+            job["progress"], job["eta"] = live
+        return job
+
+    def job_metrics(self, job_id):
+        job = self.job(job_id)
+        with self._lock:
+            creator = self._running.get(job_id)
+        if creator is not None:
+            return {"id": job_id, "status": job["status"], "live": True, **creator.metrics.summary()}
+        metrics = (job["report"] or {}).get("metrics") or {}
+        return {"id": job_id, "status": job["status"], "live": False, **metrics}
+
+    def audio_file(self, job_id):
+        job = self.job(job_id)
+        if job["status"] != "done":
+            raise RequestError(HTTPStatus.CONFLICT, f"El trabajo {job_id} está {job['status']}")
+        path = job["output_file"]
+        if not path or not os.path.isfile(path):
+            raise RequestError(HTTPStatus.NOT_FOUND, f"El audio del trabajo {job_id} ya no existe")
+        return path
+
+    def metrics(self):
+        uptime = time.time() - self.started if self.started else 0.0
+        limiters = {}
+        for name, limiter in (("tts", self.scheduler.tts_limiter),
+                              ("translation", self.scheduler.translation_limiter)):
+            limiters[name] = {"limit": limiter.limit, "in_use": limiter.in_use, "peak": limiter.peak}
+        with self._lock:
+            running = len(self._running)
+            finished = dict(self.finished)
+        return {
+            "uptime_seconds": uptime,
+            "workers": self.workers,
+            "running": running,
+            "jobs": self.queue.counts(),
+            "finished_since_start": finished,
+            "jobs_per_hour": finished["done"] * 3600 / uptime if uptime else 0.0,
+            **limiters,
+        }
+
+
+def public_job(job):
+    """Lo que se devuelve de un trabajo por HTTP (el informe completo está en /metrics del trabajo)."""
+    view = {key: job[key] for key in ("id", "status", "created", "started", "finished", "attempts",
+                                      "progress", "eta", "error")}
+    params = job["params"]
+    view["pdf_file"] = params["pdf_file"]
+    view["options"] = {key: value for key, value in params.items()
+                       if key in CLIENT_OPTIONS and key != "pdf_file"}
+    if job["status"] == "done":
+        view["audio"] = f"/jobs/{job['id']}/audio"
+        if job["output_file"] and os.path.isfile(job["output_file"]):
+            view["bytes"] = os.path.getsize(job["output_file"])
+    return view
+
+
+def _query_options(query):
+    """Opciones de la URL; los valores se leen como JSON (números, true/false) y si no, como texto."""
+    options = {}
+    for key, values in parse_qs(query).items():
+        try:
+            options[key] = json.loads(values[-1])
+        except ValueError:
+            options[key] = values[-1]
+    return options
+
+
+class JobRequestHandler(BaseHTTPRequestHandler):
+    server_version = "audiolibros"
+
+    @property
+    def service(self):
+        return self.server.service
+
+    def log_message(self, format, *args):
+        if self.server.verbose:
+            super().log_message(format, *args)
+
+    def _send_json(self, data, status=HTTPStatus.OK):
+        body = json.dumps(data, ensure_ascii=False, default=str).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        if self.command != "HEAD":
+            self.wfile.write(body)
+
+    def _handle(self, routes):
+        url = urlsplit(self.path)
+        parts = [part for part in url.path.split("/") if part]
+        try:
+            handler = routes(parts)
+            if handler is None:
+                raise RequestError(HTTPStatus.NOT_FOUND, f"Ruta desconocida: {url.path}")
+            result = handler(parts, url.query)
+            if isinstance(result, tuple):
+                self._send_json(*result)
+            elif result is not None:
+                self._send_json(result)
+        except RequestError as e:
+            self._send_json({"error": str(e)}, e.status)
+        except (BrokenPipeError, ConnectionResetError):
+            pass
+
+    def do_GET(self):
+        self._handle(self._get_route)
+
+    def do_HEAD(self):
+        self._handle(self._get_route)
+
+    def do_POST(self):
+        self._handle(self._post_route)
+
+    def _get_route(self, parts):
+        if parts == ["metrics"]:
+            return lambda parts, query: self.service.metrics()
+        if parts == ["jobs"]:
+            return self._list_jobs
+        if len(parts) == 2 and parts[0] == "jobs":
+            return lambda parts, query: public_job(self.service.job(parts[1]))
+        if len(parts) == 3 and parts[0] == "jobs":
+            if parts[2] == "metrics":
+                return lambda parts, query: self.service.job_metrics(parts[1])
+            if parts[2] == "audio":
+                return self._send_audio
+        return None
+
+    def _post_route(self, parts):
+        if parts == ["jobs"]:
+            return self._submit
+        if len(parts) == 3 and parts[0] == "jobs":
+            if parts[2] == "cancel":
+                return lambda parts, query: public_job(self.service.cancel(parts[1]))
+            if parts[2] == "retry":
+                return lambda parts, query: public_job(self.service.retry(parts[1]))
+        return None
+
+    def _list_jobs(self, parts, query):
+        options = parse_qs(query)
+        status = options.get("status", [None])[-1]
+        if status is not None and status not in STATUSES:
+            raise RequestError(HTTPStatus.BAD_REQUEST, f"Estado desconocido: {status}")
+        try:
+            limit = int(options.get("limit", ["100"])[-1])
+        except ValueError:
+            raise RequestError(HTTPStatus.BAD_REQUEST, "'limit' debe ser un entero") from None
+        return {"jobs": [public_job(job) for job in self.service.queue.list(status, limit)]}
+
+    def _content_length(self):
+        try:
+            return int(self.headers.get("Content-Length", ""))
+        except ValueError:
+            raise RequestError(HTTPStatus.LENGTH_REQUIRED, "Falta Content-Length") from None
+
+    def _submit(self, parts, query):
+        content_type = self.headers.get("Content-Type", "").split(";")[0].strip().lower()
+        if content_type in ("application/pdf", "application/octet-stream"):
+            job_id, path = self.service.save_upload(self.rfile, self._content_length(), self.server.max_upload_bytes)
+            options = _query_options(query)
+            if "pdf" in options or "pdf_file" in options:
+                os.remove(path)
+                raise RequestError(HTTPStatus.BAD_REQUEST, "Con el PDF en el cuerpo no se indica otra ruta")
+            try:
+                job = self.service.submit(dict(options, pdf_file=path), job_id)
+            except RequestError:
+                os.remove(path)
+                raise
+        else:
+            length = self._content_length()
+            if length > self.server.max_json_bytes:
+                raise RequestError(HTTPStatus.REQUEST_ENTITY_TOO_LARGE, "Cuerpo JSON demasiado grande")
+            try:
+                options = json.loads(self.rfile.read(length) or b"{}")
+            except ValueError as e:
+                raise RequestError(HTTPStatus.BAD_REQUEST, f"JSON no válido: {e}") from None
+            if not isinstance(options, dict):
+                raise RequestError(HTTPStatus.BAD_REQUEST, "El cuerpo debe ser un objeto JSON")
+            job = self.service.submit(dict(_query_options(query), **options))
+        return public_job(job), HTTPStatus.CREATED
+
+    def _send_audio(self, parts, query):
+        path = self.service.audio_file(parts[1])
+        size = os.path.getsize(path)
+        byte_range = parse_range(self.headers.get("Range"), size)
+        if byte_range is None:
+            start, end = 0, size - 1
+            self.send_response(HTTPStatus.OK)
+        else:
+            start, end = byte_range
+            self.send_response(HTTPStatus.PARTIAL_CONTENT)
+            self.send_header("Content-Range", f"bytes {start}-{end}/{size}")
+        self.send_header("Content-Type", "audio/mpeg")
+        self.send_header("Content-Length", str(end - start + 1))
+        self.send_header("Accept-Ranges", "bytes")
+        self.send_header("Content-Disposition", f'attachment; filename="{parts[1]}.mp3"')
+        self.end_headers()
+        if self.command == "HEAD":
+            return None
+        with open(path, "rb") as f:
+            f.seek(start)
+            remaining = end - start + 1
+            while remaining > 0:
+                block = f.read(min(BLOCK_SIZE, remaining))
+                if not block:
+                    break
+                self.wfile.write(block)
+                remaining -= len(block)
+        return None
+
+
+class JobServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, address, service, max_upload_mb=200, verbose=True):
+        super().__init__(address, JobRequestHandler)
+        self.service = service
+        self.max_upload_bytes = int(max_upload_mb * 1024 * 1024)
+        self.max_json_bytes = 1024 * 1024
+        self.verbose = verbose
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Servicio HTTP local con una cola persistente de audiolibros.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--data-dir", default=DEFAULT_DATA_DIR,
+                        help="Cola, PDFs subidos, directorios de trabajo y audiolibros terminados")
+    parser.add_argument("-w", "--workers", type=int, default=2, help="Libros en paralelo")
+    parser.add_argument("--tts-limit", type=int, default=16, help="Peticiones TTS simultáneas entre todos los libros")
+    parser.add_argument("--translation-limit", type=int, default=8)
+    parser.add_argument("--defaults", default="{}",
+                        help="Argumentos de AudioBookCreator para todos los trabajos (JSON o ruta a un JSON)")
+    parser.add_argument("--max-upload-mb", type=float, default=200)
+    parser.add_argument("-q", "--quiet", action="store_true", help="No registrar cada petición")
+    return parser.parse_args(argv)
+
+
+def load_defaults(value):
+    if os.path.isfile(value):
+        with open(value, encoding="utf-8") as f:
+            value = f.read()
+    defaults = json.loads(value)
+    if not isinstance(defaults, dict):
+        raise ValueError("--defaults debe ser un objeto JSON")
+    return defaults
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    try:
+        defaults = load_defaults(args.defaults)
+    except (OSError, ValueError) as e:
+        print(f"Error: --defaults no válido: {e}", file=sys.stderr)
+        return 2
+    service = JobService(args.data_dir, args.workers, args.tts_limit, args.translation_limit, defaults)
+    try:
+        server = JobServer((args.host, args.port), service, args.max_upload_mb, verbose=not args.quiet)
+    except OSError as e:
+        print(f"Error: no se pudo abrir {args.host}:{args.port}: {e}", file=sys.stderr)
+        service.queue.close()
+        return 2
+    service.start()
+    host, port = server.server_address[:2]
+    print(f"Servicio de audiolibros en http://{host}:{port} ({args.workers} trabajadores, datos en {service.data_dir})")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        print("Deteniendo; los trabajos en marcha se reanudarán en el próximo arranque")
+    finally:
+        server.server_close()
+        service.stop()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
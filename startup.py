@@ -0,0 +1,25 @@
+import threading
+
+# Módulos que las interfaces no deben importar antes de mostrar la ventana
+HEAVY_MODULES = ("audio", "pdfplumber", "pdfminer", "edge_tts", "googletrans", "httpx", "aiohttp")
+
+_lock = threading.Lock()
+
+
+def load_creator():
+    """Devuelve AudioBookCreator, importando el pipeline la primera vez.
+
+    Python guarda el módulo en `sys.modules`, así que los trabajos siguientes
+    lo reutilizan sin coste. El lock evita que la precarga y el primer trabajo
+    lo importen a la vez desde hilos distintos.
+    """
+    with _lock:
+        from audio import AudioBookCreator
+    return AudioBookCreator
+
+
+def preload(root):
+    """Importa el pipeline en segundo plano cuando la ventana ya está en pantalla."""
+    def start():
+        threading.Thread(target=load_creator, daemon=True).start()
+    root.after_idle(start)
@@ -0,0 +1,48 @@
+import os
+
+from audio_cache import AudioCache
+
+
+def _audio(tmp_path, name, size=100):
+    path = tmp_path / name
+    path.write_bytes(name.encode() * (size // len(name)) + b"\0" * (size % len(name)))
+    return str(path)
+
+
+def _age(cache, text, seconds_ago):
+    path = cache._path(cache.make_key(text, "voz"))
+    mtime = os.path.getmtime(path) - seconds_ago
+    os.utime(path, (mtime, mtime))
+
+
+def test_hit_copies_the_audio_and_ignores_spacing(tmp_path):
+    cache = AudioCache(str(tmp_path / "cache"))
+    cache.put("Hola  mundo.\n", "voz", {"rate": "+0%"}, _audio(tmp_path, "hola"))
+    output = str(tmp_path / "salida.mp3")
+    assert cache.get("Hola mundo.", "voz", {"rate": "+0%"}, output)
+    assert open(output, "rb").read() == open(tmp_path / "hola", "rb").read()
+    # Otra voz u otros ajustes son otra entrada
+    assert not cache.get("Hola mundo.", "otra voz", {"rate": "+0%"}, output)
+    assert not cache.get("Hola mundo.", "voz", {"rate": "+10%"}, output)
+    assert cache.stats() == {"hits": 1, "misses": 2, "evictions": 0}
+
+
+def test_empty_audio_is_not_cached(tmp_path):
+    cache = AudioCache(str(tmp_path / "cache"))
+    cache.put("vacío", "voz", None, _audio(tmp_path, "vacio", 0))
+    assert cache.size() == 0
+
+
+def test_evicts_least_recently_used_entries(tmp_path):
+    cache = AudioCache(str(tmp_path / "cache"), max_bytes=350)
+    for age, text in ((300, "uno"), (200, "dos"), (100, "tres")):
+        cache.put(text, "voz", None, _audio(tmp_path, text))
+        _age(cache, text, age)
+    # Leer "uno" lo marca como reciente: sale "dos", el usado hace más tiempo
+    assert cache.get("uno", "voz", None, str(tmp_path / "salida.mp3"))
+    cache.put("cuatro", "voz", None, _audio(tmp_path, "cuatro"))
+    output = str(tmp_path / "salida.mp3")
+    assert [cache.get(text, "voz", None, output) for text in ("uno", "dos", "tres", "cuatro")] == \
+        [True, False, True, True]
+    assert cache.size() <= 350
+    assert cache.stats()["evictions"] == 1
@@ -0,0 +1,69 @@
+import time
+
+import pytest
+
+from chunker import TextChunker
+
+TEXT = " ".join(f"Frase número {i}, con una cláusula y algo más de texto." for i in range(400))
+
+
+def test_rejects_invalid_limits():
+    with pytest.raises(ValueError):
+        TextChunker(0)
+    with pytest.raises(ValueError):
+        TextChunker(100, unit="words")
+
+
+@pytest.mark.parametrize("unit", ["chars", "bytes"])
+def test_chunks_respect_limit_and_keep_text(unit):
+    chunker = TextChunker(300, unit)
+    chunks = chunker.split(TEXT)
+    assert all(chunker.measure(chunk) <= 300 for chunk in chunks)
+    assert " ".join(chunks).split() == TEXT.split()
+    # Se corta por frases: cada chunk termina donde termina una
+    assert all(chunk.endswith(".") for chunk in chunks)
+
+
+def test_oversized_sentence_and_word_are_split():
+    chunker = TextChunker(20)
+    chunks = chunker.split("palabra, " * 10 + "x" * 50)
+    assert all(len(chunk) <= 20 for chunk in chunks)
+    assert "".join(chunks).replace(" ", "") == "palabra," * 10 + "x" * 50
+
+
+def test_bytes_limit_counts_utf8():
+    chunker = TextChunker(10, "bytes")
+    chunks = chunker.split("ñ" * 25)
+    assert all(len(chunk.encode("utf-8")) <= 10 for chunk in chunks)
+    assert "".join(chunks) == "ñ" * 25
+
+
+def test_split_is_linear():
+    chunker = TextChunker(3500, "bytes")
+    timings = []
+    for copies in (4, 16):
+        start = time.perf_counter()
+        chunker.split(TEXT * copies)
+        timings.append(time.perf_counter() - start)
+    # Cuatro veces más texto no debe costar mucho más de cuatro veces más
+    assert timings[1] < timings[0] * 12
+
+
+def test_split_stable_realigns_after_edit():
+    chunker = TextChunker(300)
+    before = chunker.split_stable(TEXT)
+    after = chunker.split_stable("Una frase nueva al principio del libro. " + TEXT)
+    assert all(len(chunk) <= 300 for chunk in after)
+    # Tras la siguiente frase ancla los cortes coinciden con los de antes
+    assert before[-len(before) // 2:] == after[-len(before) // 2:]
+
+
+@pytest.mark.parametrize("stable", [False, True])
+def test_split_pages_matches_joined_text(stable):
+    chunker = TextChunker(120)
+    # Cortes en mitad de una palabra, de una frase y justo tras un punto
+    pages = [TEXT[i:j] for i, j in zip(range(0, len(TEXT), 997), range(997, len(TEXT) + 997, 997))]
+    joined = chunker.split_stable(TEXT) if stable else chunker.split(TEXT)
+    assert list(chunker.split_pages(pages, stable)) == joined
+    assert list(chunker.split_pages(["Fin de una página", "\nsiguiente página."])) == \
+        ["Fin de una página\nsiguiente página."]
@@ -0,0 +1,56 @@
+import json
+
+import pytest
+
+from cli import ManifestError, build_jobs, parse_args
+
+
+def _manifest(tmp_path, data):
+    path = tmp_path / "libros.json"
+    path.write_text(json.dumps(data), encoding="utf-8")
+    return str(path)
+
+
+def test_single_book():
+    jobs, workers = build_jobs(parse_args(["libro.pdf", "-o", "salida", "--start-page", "9"]))
+    assert workers == 1
+    assert jobs == [{"resume": True, "start_page": 9, "pdf_file": "libro.pdf", "output_dir": "salida"}]
+
+
+def test_manifest_defaults_entries_and_command_line(tmp_path):
+    path = _manifest(tmp_path, {
+        "defaults": {"resume": False, "voice": "es-ES-AlvaroNeural"},
+        "workers": 3,
+        "jobs": [
+            {"pdf": "a.pdf", "output": "a"},
+            {"pdf": "b.pdf", "output": "b", "resume": True, "translate": False},
+        ],
+    })
+    jobs, workers = build_jobs(parse_args(["--manifest", path, "--target-language", "fr"]))
+    assert workers == 3
+    assert jobs[0] == {"resume": False, "voice": "es-ES-AlvaroNeural", "target_language": "fr",
+                       "pdf_file": "a.pdf", "output_dir": "a", "translate_to_spanish": True}
+    # Lo que indica cada libro manda sobre los defaults
+    assert jobs[1]["resume"] is True and jobs[1]["translate_to_spanish"] is False
+    # La línea de comandos manda sobre los defaults del manifiesto, pero no sobre cada libro
+    path = _manifest(tmp_path, {
+        "defaults": {"resume": True},
+        "jobs": [{"pdf": "a.pdf", "output": "a"}, {"pdf": "b.pdf", "output": "b", "resume": True}],
+    })
+    jobs, _ = build_jobs(parse_args(["--manifest", path, "--no-resume"]))
+    assert [job["resume"] for job in jobs] == [False, True]
+
+
+@pytest.mark.parametrize("argv, data", [
+    (["libro.pdf"], None),
+    (["libro.pdf", "--manifest", "{manifest}"], [{"pdf": "a.pdf", "output": "a"}]),
+    (["--manifest", "{manifest}"], []),
+    (["--manifest", "{manifest}"], [{"pdf": "a.pdf"}]),
+    (["--manifest", "{manifest}"], [{"pdf": "a.pdf", "output": "a", "velocidad": 2}]),
+])
+def test_invalid_jobs(tmp_path, argv, data):
+    if data is not None:
+        path = _manifest(tmp_path, data)
+        argv = [path if arg == "{manifest}" else arg for arg in argv]
+    with pytest.raises(ManifestError):
+        build_jobs(parse_args(argv))
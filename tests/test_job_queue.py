@@ -0,0 +1,76 @@
+from job_queue import JobQueue
+
+
+def _queue(tmp_path):
+    return JobQueue(str(tmp_path / "jobs.sqlite3"))
+
+
+def test_claim_takes_the_oldest_queued_job(tmp_path):
+    queue = _queue(tmp_path)
+    first = queue.add({"pdf_file": "a.pdf"})
+    second = queue.add({"pdf_file": "b.pdf"})
+    claimed = queue.claim()
+    assert claimed["id"] == first["id"]
+    assert claimed["status"] == "running" and claimed["attempts"] == 1
+    assert queue.claim()["id"] == second["id"]
+    assert queue.claim() is None
+    queue.close()
+
+
+def test_recover_requeues_running_and_finishes_cancelling(tmp_path):
+    queue = _queue(tmp_path)
+    running = queue.add({"pdf_file": "a.pdf"})
+    cancelling = queue.add({"pdf_file": "b.pdf"})
+    queue.claim()
+    queue.claim()
+    queue.request_cancel(cancelling["id"])
+    queue.close()
+
+    queue = _queue(tmp_path)
+    assert queue.recover() == 1
+    assert queue.get(running["id"])["status"] == "queued"
+    assert queue.get(cancelling["id"])["status"] == "cancelled"
+    assert queue.claim()["attempts"] == 2
+    queue.close()
+
+
+def test_request_cancel(tmp_path):
+    queue = _queue(tmp_path)
+    queued = queue.add({"pdf_file": "a.pdf"})
+    assert queue.request_cancel(queued["id"]) == "cancelled"
+    running = queue.add({"pdf_file": "b.pdf"})
+    queue.claim()
+    assert queue.request_cancel(running["id"]) == "cancelling"
+    queue.finish(running["id"], "done")
+    # Un trabajo terminado no cambia
+    assert queue.request_cancel(running["id"]) == "done"
+    assert queue.request_cancel("no-existe") is None
+    assert queue.counts()["cancelled"] == 1
+    queue.close()
+
+
+def test_requeue_retries_failed_and_cancelled_jobs_but_not_done_ones(tmp_path):
+    queue = _queue(tmp_path)
+    failed = queue.add({"pdf_file": "a.pdf"})
+    queue.claim()
+    queue.finish(failed["id"], "failed", error="sin red")
+    assert queue.requeue(failed["id"])
+    job = queue.get(failed["id"])
+    assert job["status"] == "queued" and job["finished"] is None
+    retried = queue.claim()
+    assert retried["attempts"] == 2 and retried["error"] is None
+    queue.finish(failed["id"], "done", output_file="a.mp3")
+    assert not queue.requeue(failed["id"])
+    assert queue.get(failed["id"])["progress"] == 100
+    queue.close()
+
+
+def test_claim_from_two_connections_never_returns_the_same_job(tmp_path):
+    first, second = _queue(tmp_path), _queue(tmp_path)
+    for name in "abcd":
+        first.add({"pdf_file": f"{name}.pdf"})
+    claimed = [queue.claim()["id"] for queue in (first, second, second, first)]
+    assert len(set(claimed)) == 4
+    assert first.claim() is None and second.claim() is None
+    first.close()
+    second.close()
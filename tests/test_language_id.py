@@ -0,0 +1,41 @@
+from language_id import SEGMENT_SEPARATOR, LanguageFilter, detect, split_translation
+
+SPANISH = "El libro cuenta la historia de una familia que vive en la costa y de sus viajes por el mar."
+ENGLISH = "The book tells the story of a family that lives on the coast and of their journeys at sea."
+FRENCH = "Le livre raconte l'histoire d'une famille qui vit sur la côte et de ses voyages en mer."
+CODE = "def main():\n    return run(sys.argv[1:])\n"
+URL = "https://example.org/libro\n"
+
+
+def test_detect():
+    assert detect(SPANISH) == "es"
+    assert detect(ENGLISH) == "en"
+    assert detect(FRENCH) == "fr"
+    assert detect("Hola") is None
+
+
+def test_plan_keeps_target_language_code_and_links():
+    text = f"{SPANISH}\n\n{ENGLISH}\n\n{CODE}\n{URL}"
+    language_filter = LanguageFilter("es")
+    plan = language_filter.plan(text)
+    assert "".join(piece for piece, _, _ in plan) == text
+    assert [(piece, language) for piece, translate, language in plan if translate] == [(ENGLISH, "en")]
+    skipped = language_filter.stats()["skipped_chars_by_reason"]
+    assert set(skipped) == {"target", "code", "url"}
+
+
+def test_group_sends_one_request_per_source_language():
+    language_filter = LanguageFilter("es")
+    plans = [language_filter.plan(f"{ENGLISH}\n\n{FRENCH}\n\n{ENGLISH} Again."),
+             language_filter.plan(ENGLISH)]
+    requests = language_filter.group(plans)
+    assert sorted(language for _, language, _ in requests) == ["en", "en", "fr"]
+    first = next(text for text, language, members in requests if language == "en" and members[0][0] == 0)
+    assert split_translation(first, 2) == [ENGLISH, f"{ENGLISH} Again."]
+
+
+def test_split_translation():
+    assert split_translation(SEGMENT_SEPARATOR.join(["uno", "dos", "tres"]), 3) == ["uno", "dos", "tres"]
+    # Los traductores a veces cambian los espacios alrededor del separador
+    assert split_translation("uno\n # # #\ndos", 2) == ["uno", "dos"]
+    assert split_translation("uno dos", 2) is None
@@ -0,0 +1,57 @@
+import json
+import os
+
+from manifest import MANIFEST_NAME, JobManifest
+
+PARAMS = {"pdf": "libro.pdf", "start_page": 0, "end_page": 10}
+
+
+def _open(tmp_path, params=PARAMS, resume=True):
+    manifest = JobManifest.open(str(tmp_path), params, resume=resume)
+    chunks = ["Primer chunk.", "Segundo chunk.", "Tercer chunk."]
+    manifest.set_chunks(chunks, [str(tmp_path / f"temp_chunk_{i}.mp3") for i in range(len(chunks))])
+    return manifest
+
+
+def _write(path, data=b"audio"):
+    with open(path, "wb") as f:
+        f.write(data)
+
+
+def test_mark_done_requires_a_non_empty_file(tmp_path):
+    manifest = _open(tmp_path)
+    assert not manifest.mark_done(0)
+    _write(manifest.chunks[0]["file"], b"")
+    assert not manifest.mark_done(0)
+    _write(manifest.chunks[0]["file"])
+    assert manifest.mark_done(0)
+    assert manifest.pending() == [1, 2]
+
+
+def test_resume_keeps_done_chunks_with_intact_files(tmp_path):
+    manifest = _open(tmp_path)
+    for index in (0, 1):
+        _write(manifest.chunks[index]["file"])
+        manifest.mark_done(index)
+    manifest.save()
+    # El archivo del segundo chunk cambia de tamaño: ya no cuenta como hecho
+    _write(manifest.chunks[1]["file"], b"otro audio")
+    assert _open(tmp_path).pending() == [1, 2]
+
+
+def test_resume_restarts_with_other_params_or_without_resume(tmp_path):
+    manifest = _open(tmp_path)
+    _write(manifest.chunks[0]["file"])
+    manifest.mark_done(0)
+    manifest.save()
+    assert _open(tmp_path, {**PARAMS, "end_page": 20}).pending() == [0, 1, 2]
+    assert _open(tmp_path, resume=False).pending() == [0, 1, 2]
+
+
+def test_state_is_saved_and_reset_on_resume(tmp_path):
+    manifest = _open(tmp_path)
+    manifest.set_state("incomplete")
+    path = os.path.join(str(tmp_path), MANIFEST_NAME)
+    with open(path, encoding="utf-8") as f:
+        assert json.load(f)["state"] == "incomplete"
+    assert _open(tmp_path).data["state"] == "running"
@@ -0,0 +1,54 @@
+import struct
+
+import pytest
+
+from backends import SILENT_FRAME
+from mp3_assembler import Mp3Assembler, Mp3FormatError, iter_frames
+
+
+def _chunk(tmp_path, name, frames):
+    path = tmp_path / name
+    path.write_bytes(b"ID3\x03\x00\x00\x00\x00\x00\x00" + SILENT_FRAME * frames)
+    return str(path)
+
+
+def test_frames_are_copied_in_order_behind_an_info_frame(tmp_path):
+    output = str(tmp_path / "libro.mp3")
+    assembler = Mp3Assembler(output)
+    # Los chunks pueden terminar desordenados
+    assembler.chunk_ready(1, _chunk(tmp_path, "b.mp3", 5))
+    assembler.chunk_ready(0, _chunk(tmp_path, "a.mp3", 3))
+    assembler.close()
+
+    with open(output, "rb") as f:
+        data = f.read()
+    frames = list(iter_frames(data))
+    assert len(frames) == 8
+    first = frames[0][0]
+    assert data[first:] == SILENT_FRAME * 8
+    assert assembler.spans[0] == (first, 3 * len(SILENT_FRAME), 3)
+    assert assembler.spans[1] == (first + 3 * len(SILENT_FRAME), 5 * len(SILENT_FRAME), 5)
+
+    header = frames[0][1]
+    tag = 4 + header.side_info_length
+    assert data[tag:tag + 4] == b"Info"
+    flags, count, total = struct.unpack(">III", data[tag + 4:tag + 16])
+    assert count == 8 and total == len(data)
+    assert assembler.duration == pytest.approx(8 * 576 / 24000)
+
+
+def test_append_copy_matches_append(tmp_path):
+    copied = Mp3Assembler(str(tmp_path / "copia.mp3"))
+    copied.append_copy(SILENT_FRAME * 100, 100)
+    copied.close()
+    parsed = Mp3Assembler(str(tmp_path / "analizado.mp3"))
+    parsed.append(SILENT_FRAME * 100)
+    parsed.close()
+    assert (tmp_path / "copia.mp3").read_bytes() == (tmp_path / "analizado.mp3").read_bytes()
+
+
+def test_missing_chunk_fails_on_close(tmp_path):
+    assembler = Mp3Assembler(str(tmp_path / "libro.mp3"))
+    assembler.chunk_ready(1, _chunk(tmp_path, "b.mp3", 2))
+    with pytest.raises(Mp3FormatError):
+        assembler.close()
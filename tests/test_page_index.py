@@ -0,0 +1,41 @@
+import os
+
+import page_index
+from page_index import PageIndex
+
+
+def _index(tmp_path):
+    return PageIndex(str(tmp_path / "pages.sqlite3"))
+
+
+def test_pages_are_served_by_content_hash(tmp_path):
+    index = _index(tmp_path)
+    pdf = tmp_path / "libro.pdf"
+    pdf.write_bytes(b"%PDF version 1")
+    digest = index.digest(str(pdf))
+    index.put_pages(digest, [(0, "uno"), (2, "tres")])
+    assert index.get_pages(digest, 0, 3) == {0: "uno", 2: "tres"}
+    assert index.indexed_pages(digest, 0, 3) == {0, 2}
+    assert index.stats()["hits"] == 2 and index.stats()["misses"] == 1
+
+    # Una copia idéntica comparte entradas; un PDF modificado no reutiliza nada
+    copy = tmp_path / "copia.pdf"
+    copy.write_bytes(pdf.read_bytes())
+    assert index.digest(str(copy)) == digest
+    pdf.write_bytes(b"%PDF version 2")
+    stat = os.stat(pdf)
+    os.utime(pdf, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10**9))
+    changed = index.digest(str(pdf))
+    assert changed != digest
+    assert index.get_pages(changed, 0, 3) == {}
+    index.close()
+
+
+def test_fingerprints_survive_between_versions(tmp_path, monkeypatch):
+    index = _index(tmp_path)
+    index.put_fingerprints([("huella-a", "texto a"), ("huella-b", "texto b")])
+    assert index.get_fingerprints(["huella-a", "huella-c"]) == {"huella-a": "texto a"}
+    # Otra versión del extractor invalida las huellas guardadas
+    monkeypatch.setattr(page_index, "EXTRACTOR_VERSION", page_index.EXTRACTOR_VERSION + 1)
+    assert index.get_fingerprints(["huella-a"]) == {}
+    index.close()
@@ -0,0 +1,60 @@
+import pytest
+
+from audio import AudioBookCreator
+from benchmark import make_pdf
+
+
+@pytest.fixture(scope="module")
+def pdf_file(tmp_path_factory):
+    return make_pdf(str(tmp_path_factory.mktemp("pdf") / "libro.pdf"), pages=6, lines_per_page=12)
+
+
+def _spoken_chunks(pdf_file, output_dir, **options):
+    """Textos enviados al TTS, en el orden del libro."""
+    creator = AudioBookCreator(pdf_file, output_dir, chunk_size=300, tts_backend="fake", use_cache=False,
+                               use_translation_memory=False, use_page_index=False, **options)
+    spoken = {}
+    text_to_speech = creator.text_to_speech
+
+    async def recording_tts(text, output_file):
+        spoken[output_file] = text
+        await text_to_speech(text, output_file)
+    creator.text_to_speech = recording_tts
+    assert creator.create_audiobook()
+    return [spoken[creator.chunk_file(i)] for i in range(len(spoken))]
+
+
+def test_streaming_matches_batch(pdf_file, tmp_path):
+    batch = _spoken_chunks(pdf_file, str(tmp_path / "lotes"))
+    assert len(batch) > 6
+    assert _spoken_chunks(pdf_file, str(tmp_path / "streaming"), streaming=True) == batch
+
+
+@pytest.mark.parametrize("stable", [False, True])
+def test_low_memory_chunks_match_whole_text(pdf_file, tmp_path, stable):
+    creator = AudioBookCreator(pdf_file, str(tmp_path), chunk_size=300, low_memory=True, use_page_index=False)
+    creator.resolve_page_range()
+    text = creator.extract_text_from_pdf()
+    split = creator.chunker.split_stable if stable else creator.split_text
+    assert creator.extract_chunks(stable) == split(text)
+
+
+def test_stores_open_only_when_used(pdf_file, tmp_path):
+    stores = tmp_path / "almacenes"
+    creator = AudioBookCreator(pdf_file, str(tmp_path / "salida"), tts_backend="fake",
+                               cache_dir=str(stores / "audio"), translation_db=str(stores / "tm.sqlite3"),
+                               page_index_db=str(stores / "pages.sqlite3"))
+    assert not stores.exists()
+    assert creator.translation_memory is None  # sin traducción no hay memoria de traducción
+    creator.resolve_page_range()
+    assert (stores / "pages.sqlite3").exists()
+    assert not (stores / "audio").exists()
+
+
+def test_translate_text_keeps_paragraphs(pdf_file, tmp_path):
+    creator = AudioBookCreator(pdf_file, str(tmp_path), chunk_size=40, translate_to_spanish=True,
+                               detect_language=False, tts_backend="fake", translation_backend="fake",
+                               use_cache=False, use_translation_memory=False, use_page_index=False)
+    text = "Primer párrafo, con una frase larga que ocupa más de un chunk.\n\nSegundo párrafo.\nTercero."
+    assert creator.translate_text(text) == text
+    assert creator.translate_text("") == ""
@@ -0,0 +1,47 @@
+import sys
+
+from backends import SILENT_FRAME
+from playback import ProgressivePlayer
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def _copy_command(path):
+    # Un "reproductor" que guarda lo que recibe por stdin
+    return [sys.executable, "-c",
+            f"import shutil, sys; shutil.copyfileobj(sys.stdin.buffer, open({str(path)!r}, 'wb'))"]
+
+
+def test_plays_everything_in_order_without_holding_it_in_memory(tmp_path):
+    received = tmp_path / "recibido.mp3"
+    player = ProgressivePlayer(_copy_command(received), start_buffer=1.0, clock=FakeClock())
+    chunks = [bytes([i]) * 1000 + SILENT_FRAME for i in range(50)]
+    for chunk in chunks:
+        player.feed(chunk, 0.5)
+        # En la cola solo hay tamaños: el audio pendiente está en disco
+        assert all(isinstance(item, int) for item in list(player._queue.queue) if item is not None)
+    player.finish()
+    player.wait()
+    assert received.read_bytes() == b"".join(chunks)
+    assert player._spool is None
+
+
+def test_starts_after_the_initial_buffer():
+    clock = FakeClock()
+    player = ProgressivePlayer([sys.executable, "-c", "import sys; sys.stdin.buffer.read()"],
+                               start_buffer=5.0, clock=clock)
+    player.feed(SILENT_FRAME, 3.0)
+    assert player.started_at is None and player.buffered_seconds() == 3.0
+    clock.now = 2.0
+    player.feed(SILENT_FRAME, 3.0)
+    assert player.first_audio_seconds == 2.0
+    clock.now = 4.0
+    assert player.buffered_seconds() == 4.0
+    player.abort()
+    player.wait()
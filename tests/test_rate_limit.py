@@ -0,0 +1,115 @@
+import asyncio
+
+import pytest
+
+from rate_limit import AdaptiveConcurrency, CallScheduler, TokenBucket, is_throttle
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+class Throttled(Exception):
+    status = 429
+
+
+def test_is_throttle():
+    assert is_throttle(Throttled())
+    assert is_throttle(asyncio.TimeoutError())
+    assert is_throttle(TimeoutError())
+    assert is_throttle(Exception("HTTP 429 Too Many Requests"))
+    assert not is_throttle(ValueError("texto no válido"))
+
+
+def test_aimd_grows_additively_and_halves_once_per_round():
+    clock = FakeClock()
+    limit = AdaptiveConcurrency(4, maximum=8, clock=clock)
+    for _ in range(4):
+        limit.on_success()
+    assert limit.limit == pytest.approx(4.9, abs=0.1)
+    clock.now = 1.0
+    limit.on_throttle(started_at=0.5)
+    assert limit.limit == pytest.approx(2.45, abs=0.05)
+    # Los rechazos de llamadas que empezaron antes de la reducción no vuelven a reducir
+    limit.on_throttle(started_at=0.9)
+    assert limit.limit == pytest.approx(2.45, abs=0.05)
+    limit.on_throttle(started_at=1.5)
+    assert limit.limit == pytest.approx(1.2, abs=0.05)
+    for _ in range(10):
+        limit.on_throttle()
+    assert limit.limit == 1
+    assert limit.throttles == 13
+
+
+def test_token_bucket_waits_for_the_next_token():
+    clock = FakeClock()
+    bucket = TokenBucket(rate=2, burst=2, clock=clock)
+    assert bucket._take() == 0.0
+    assert bucket._take() == 0.0
+    assert bucket._take() == pytest.approx(0.5)
+    clock.now = 0.5
+    assert bucket._take() == 0.0
+
+
+def _scheduler(**options):
+    return CallScheduler("prueba", concurrency=4, max_concurrency=8, base_delay=0, **options)
+
+
+def test_retries_until_success_and_reports_each_retry():
+    scheduler = _scheduler(retries=4)
+    attempts = []
+    retries = []
+
+    async def flaky():
+        attempts.append(1)
+        if len(attempts) < 3:
+            raise ConnectionError("sin conexión")
+        return "hecho"
+
+    result = asyncio.run(scheduler.call(flaky, on_retry=lambda attempt, exc, delay: retries.append(attempt)))
+    assert result == "hecho"
+    assert retries == [1, 2]
+    assert scheduler.stats()["calls"] == 3 and scheduler.stats()["retries"] == 2
+    # Un error que no es de saturación no toca la concurrencia
+    assert scheduler.concurrency.throttles == 0
+
+
+def test_gives_up_after_the_retries_of_each_call():
+    scheduler = _scheduler(retries=4)
+
+    async def always_throttled():
+        raise Throttled()
+
+    with pytest.raises(Throttled):
+        asyncio.run(scheduler.call(always_throttled, retries=1))
+    assert scheduler.calls == 2 and scheduler.failures == 1
+    assert scheduler.concurrency.limit < 4
+
+
+def test_timeouts_back_off():
+    scheduler = _scheduler(retries=0, timeout=0.01)
+
+    async def slow():
+        await asyncio.sleep(1)
+
+    with pytest.raises(asyncio.TimeoutError):
+        asyncio.run(scheduler.call(slow))
+    assert scheduler.concurrency.throttles == 1
+
+
+def test_concurrency_never_exceeds_the_limit():
+    scheduler = CallScheduler("prueba", concurrency=3, max_concurrency=3, base_delay=0)
+
+    async def work():
+        await asyncio.sleep(0.01)
+
+    async def run_all():
+        await asyncio.gather(*(scheduler.call(work) for _ in range(20)))
+
+    asyncio.run(run_all())
+    assert scheduler.concurrency.peak == 3
+    assert scheduler.concurrency.in_flight == 0
@@ -0,0 +1,91 @@
+import os
+import time
+from http import HTTPStatus
+
+import pytest
+
+from job_queue import FINAL_STATUSES
+from server import JobService, RequestError, parse_range
+
+
+@pytest.mark.parametrize("header, expected", [
+    (None, None),
+    ("", None),
+    ("bytes=0-99", (0, 99)),
+    ("bytes=100-", (100, 999)),
+    ("bytes=900-5000", (900, 999)),
+    ("bytes=-100", (900, 999)),
+    ("bytes=-5000", (0, 999)),
+    # Varios tramos o unidades desconocidas: se sirve el archivo entero
+    ("bytes=0-1,5-6", None),
+    ("items=0-1", None),
+    ("bytes=-", None),
+])
+def test_parse_range(header, expected):
+    assert parse_range(header, 1000) == expected
+
+
+@pytest.mark.parametrize("header, size", [("bytes=1000-", 1000), ("bytes=50-10", 1000), ("bytes=-0", 1000),
+                                          ("bytes=-10", 0)])
+def test_unsatisfiable_range(header, size):
+    with pytest.raises(RequestError) as error:
+        parse_range(header, size)
+    assert error.value.status == HTTPStatus.REQUESTED_RANGE_NOT_SATISFIABLE
+
+
+FAKE_DEFAULTS = {"tts_backend": "fake", "translation_backend": "fake", "use_cache": False,
+                 "use_translation_memory": False, "use_page_index": False}
+
+
+@pytest.fixture(scope="module")
+def pdf_file(tmp_path_factory):
+    from benchmark import make_pdf
+    return make_pdf(str(tmp_path_factory.mktemp("pdf") / "libro.pdf"), pages=4, lines_per_page=10)
+
+
+def _wait(service, job_id, statuses, timeout=60):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        job = service.job(job_id)
+        if job["status"] in statuses:
+            return job
+        time.sleep(0.05)
+    raise AssertionError(f"el trabajo sigue {job['status']}")
+
+
+def test_service_runs_a_submitted_book(tmp_path, pdf_file):
+    service = JobService(str(tmp_path), workers=1, defaults=FAKE_DEFAULTS)
+    service.start()
+    try:
+        job = _wait(service, service.submit({"pdf": pdf_file})["id"], FINAL_STATUSES)
+    finally:
+        service.stop()
+    assert job["status"] == "done" and job["progress"] == 100
+    assert os.path.getsize(job["output_file"]) > 0
+
+
+def test_submit_rejects_unknown_options_and_missing_pdfs(tmp_path, pdf_file):
+    service = JobService(str(tmp_path), defaults=FAKE_DEFAULTS)
+    for options in ({"pdf": pdf_file, "cache_dir": "/tmp"}, {"pdf": pdf_file, "start_page": -1},
+                    {"pdf": str(tmp_path / "no-existe.pdf")}):
+        with pytest.raises(RequestError) as error:
+            service.submit(options)
+        assert error.value.status == HTTPStatus.BAD_REQUEST
+    service.queue.close()
+
+
+def test_interrupted_job_resumes_after_a_restart(tmp_path, pdf_file):
+    defaults = dict(FAKE_DEFAULTS, tts_options={"latency": 1.0})
+    service = JobService(str(tmp_path), workers=1, defaults=defaults)
+    service.start()
+    job_id = service.submit({"pdf": pdf_file})["id"]
+    _wait(service, job_id, ("running",))
+    service.stop()
+    restarted = JobService(str(tmp_path), workers=1, defaults=defaults)
+    assert restarted.queue.get(job_id)["status"] == "queued"
+    restarted.start()
+    try:
+        job = _wait(restarted, job_id, FINAL_STATUSES)
+    finally:
+        restarted.stop()
+    assert job["status"] == "done" and job["attempts"] == 2
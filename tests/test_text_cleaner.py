@@ -0,0 +1,40 @@
+from text_cleaner import PAGE_NUMBER, PageCleaner, edge_key
+
+
+def _body(n, lines=8):
+    return [f"Línea {k} de la página {n}, con texto propio del cuerpo." for k in range(lines)]
+
+
+def _book(pages=8):
+    return ["\n".join(["Historia del Mar — Capítulo 2", *_body(n), str(n)]) for n in range(1, pages + 1)]
+
+
+def test_headers_and_page_numbers_are_removed():
+    cleaner = PageCleaner()
+    pages = list(cleaner.clean(_book()))
+    assert pages == ["\n".join(_body(n)) + "\n" for n in range(1, 9)]
+    removed = cleaner.stats()["removed_by_reason"]
+    assert set(removed) == {"header_footer", "page_number"}
+
+
+def test_page_number_pattern():
+    for line in ("47", "- 47 -", "Página 3 de 120", "xiv", "[12]", "page 7 of 9"):
+        assert PAGE_NUMBER.match(line), line
+    for line in ("did", "mild", "civil", "mix", "I", "iiii", "2024 fue un buen año"):
+        assert not PAGE_NUMBER.match(line), line
+
+
+def test_edge_key_ignores_page_numbers():
+    assert edge_key("Capítulo 3 — Título 47") == edge_key("Capítulo 3 — Título 48") == "capítulo 3 título"
+    assert edge_key("xiv Prólogo") == "prólogo"
+
+
+def test_duplicates_in_the_body_are_kept():
+    lines = _body(1)
+    text = "\n".join(lines[:4] + ["Nunca más.", "Nunca más."] + lines[4:]) + "\n"
+    assert list(PageCleaner().clean([text])) == [text]
+
+
+def test_duplicated_edge_line_is_removed():
+    text = "\n".join(["Título repetido", "Título repetido", *_body(1)]) + "\n"
+    assert list(PageCleaner().clean([text])) == ["\n".join(["Título repetido", *_body(1)]) + "\n"]
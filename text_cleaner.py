@@ -0,0 +1,138 @@
+import re
+from collections import Counter, deque
+
+# Romano bien formado y no vacío, en minúsculas y por debajo de 400 (como la
+# numeración de los preliminares): así "did", "mild", "civil", "mix" o un "I"
+# suelto no se confunden con números de página
+ROMAN = r"(?-i:(?=[ivxlc])c{0,3}(?:xc|xl|l?x{0,3})(?:ix|iv|v?i{0,3}))"
+
+# Línea que solo contiene el número de página: "47", "- 47 -", "Página 3 de 120", "xiv"
+PAGE_NUMBER = re.compile(
+    r"^[\s\-–—·|\[\](){}]*(?:(?:page|p[áa]gina|p[áa]g\.?|p\.)\s*)?"
+    rf"(?:\d{{1,5}}|{ROMAN})(?:\s*(?:/|of|de)\s*\d{{1,5}})?[\s\-–—·|\[\](){{}}]*$",
+    re.IGNORECASE)
+
+# Número de página (o romano) al principio o al final de una cabecera: "Capítulo 3 — Título 47"
+_NUMBER_WORD = re.compile(rf"^(?:\d+|{ROMAN})$")
+
+
+def edge_key(line):
+    """Forma de una línea de cabecera o pie sin el número de página, para compararla entre páginas."""
+    words = re.findall(r"\w+", line.lower())
+    while words and _NUMBER_WORD.match(words[0]):
+        words.pop(0)
+    while words and _NUMBER_WORD.match(words[-1]):
+        words.pop()
+    return " ".join(words)
+
+
+class PageCleaner:
+    """Quita cabeceras, pies, números de página y bloques repetidos del flujo de páginas.
+
+    Trabaja sobre una ventana deslizante de páginas (`lookbehind` anteriores y
+    `lookahead` posteriores), así que es lineal en el tamaño del libro, la
+    memoria no depende de su longitud y sirve en modo streaming. Se elimina:
+
+    - una de las `edge_lines` primeras o últimas líneas si la misma línea (sin
+      su número de página) aparece en esa posición en al menos `min_repeats`
+      páginas de la ventana;
+    - una línea de los bordes que solo sea un número de página;
+    - una línea de al menos `min_block_chars` caracteres repetida tal cual en
+      `min_repeats` páginas de la ventana (marcas de agua, avisos de licencia);
+    - una línea con texto idéntica a la anterior (duplicada por la maquetación)
+      si está en los bordes de la página o aparece también en otra página de
+      la ventana; una repetición en el cuerpo del texto se respeta.
+    """
+
+    def __init__(self, edge_lines=3, lookbehind=4, lookahead=4, min_repeats=3, min_block_chars=20):
+        self.edge_lines = edge_lines
+        self.lookbehind = lookbehind
+        self.lookahead = lookahead
+        self.min_repeats = min_repeats
+        self.min_block_chars = min_block_chars
+        self.chars_in = 0
+        self.chars_out = 0
+        self.removed = Counter()
+
+    @property
+    def chars_removed(self):
+        # No es chars_in - chars_out: cada página limpia termina en salto de línea
+        return sum(self.removed.values())
+
+    def _analyze(self, text):
+        lines = text.splitlines()
+        content = [i for i, line in enumerate(lines) if line.strip()]
+        edges = {}
+        for position, i in enumerate(content[:self.edge_lines]):
+            edges[i] = ("top", position, edge_key(lines[i]))
+        for position, i in enumerate(reversed(content[-self.edge_lines:])):
+            edges.setdefault(i, ("bottom", position, edge_key(lines[i])))
+        keys = set(edges.values())
+        keys.update(("line", line.strip()) for line in lines if line.strip())
+        return lines, edges, keys
+
+    def _decide(self, page, counts):
+        lines, edges, _ = page
+        kept = []
+        previous = None
+        for i, line in enumerate(lines):
+            stripped = line.strip()
+            reason = None
+            if not stripped:
+                kept.append(line)
+                continue
+            if i in edges:
+                if PAGE_NUMBER.match(stripped):
+                    reason = "page_number"
+                elif edges[i][2] and counts[edges[i]] >= self.min_repeats:
+                    reason = "header_footer"
+            if reason is None:
+                if len(stripped) >= self.min_block_chars and counts[("line", stripped)] >= self.min_repeats:
+                    reason = "repeated_block"
+                elif (stripped == previous and any(c.isalpha() for c in stripped)
+                      and (i in edges or counts[("line", stripped)] >= 2)):
+                    reason = "duplicate_line"
+            if reason:
+                self.removed[reason] += len(line) + 1
+                continue
+            kept.append(line)
+            previous = stripped
+        text = "\n".join(kept).strip("\n")
+        return text + "\n" if text else ""
+
+    def clean(self, pages):
+        """Genera el texto limpio de cada página de `pages`, en orden (una página por entrada)."""
+        counts = Counter()
+        history = deque()
+        pending = deque()
+
+        def decide_next():
+            page = pending.popleft()
+            text = self._decide(page, counts)
+            self.chars_out += len(text)
+            history.append(page)
+            if len(history) > self.lookbehind:
+                # Las claves que salen de la ventana se borran: la memoria no crece con el libro
+                for key in history.popleft()[2]:
+                    counts[key] -= 1
+                    if not counts[key]:
+                        del counts[key]
+            return text
+
+        for text in pages:
+            self.chars_in += len(text)
+            page = self._analyze(text)
+            counts.update(page[2])
+            pending.append(page)
+            if len(pending) > self.lookahead:
+                yield decide_next()
+        while pending:
+            yield decide_next()
+
+    def stats(self):
+        return {
+            "chars_in": self.chars_in,
+            "chars_out": self.chars_out,
+            "chars_removed": self.chars_removed,
+            "removed_by_reason": dict(self.removed),
+        }
@@ -0,0 +1,77 @@
+import asyncio
+
+
+class TranslationError(Exception):
+    """Uno o más chunks no se pudieron traducir tras agotar los reintentos."""
+
+    def __init__(self, failures):
+        self.failures = failures  # {índice del chunk: última excepción}
+        indexes = ", ".join(str(i) for i in sorted(failures))
+        super().__init__(f"No se pudieron traducir {len(failures)} chunks (índices: {indexes})")
+
+
+class BatchTranslator:
+    """Traduce una lista de chunks en paralelo, con reintentos independientes por chunk.
+
+    `translate(text)` es una corrutina (ver `TranslationBackend.translate`);
+    como mucho `concurrency` peticiones están en vuelo a la vez. Los resultados
+    se devuelven en el orden original.
+    """
+
+    def __init__(self, translate, target, concurrency=4, retries=3, backoff=1.0, memory=None):
+        self.translate = translate
+        self.target = target
+        self.concurrency = max(1, int(concurrency))
+        self.retries = retries
+        self.backoff = backoff
+        self.memory = memory
+        self.requests = 0
+        self.retried = 0
+        self.cached = 0
+
+    async def _translate_with_retries(self, text, semaphore):
+        for attempt in range(self.retries + 1):
+            try:
+                async with semaphore:
+                    self.requests += 1
+                    return await self.translate(text)
+            except Exception:
+                if attempt == self.retries:
+                    raise
+                self.retried += 1
+                await asyncio.sleep(self.backoff * 2 ** attempt)
+
+    async def translate_all(self, chunks):
+        results = list(chunks)
+        pending = [i for i, chunk in enumerate(chunks) if chunk.strip()]
+
+        # Una sola consulta a la memoria de traducción para todo el lote
+        if self.memory:
+            known = self.memory.get_many([chunks[i] for i in pending], self.target)
+            for i in pending:
+                if chunks[i] in known:
+                    results[i] = known[chunks[i]]
+            pending = [i for i in pending if chunks[i] not in known]
+            self.cached += len(known)
+
+        semaphore = asyncio.Semaphore(self.concurrency)
+        outcomes = await asyncio.gather(
+            *(self._translate_with_retries(chunks[i], semaphore) for i in pending),
+            return_exceptions=True)
+        failures = {}
+        for i, outcome in zip(pending, outcomes):
+            if isinstance(outcome, Exception):
+                failures[i] = outcome
+            else:
+                results[i] = outcome
+
+        if self.memory:
+            done = [(chunks[i], results[i]) for i in pending if i not in failures]
+            if done:
+                self.memory.put_many(done, self.target)
+        if failures:
+            raise TranslationError(failures)
+        return results
+
+    def run(self, chunks):
+        return asyncio.run(self.translate_all(chunks))
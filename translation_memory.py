@@ -0,0 +1,108 @@
+import hashlib
+import os
+import sqlite3
+import threading
+import time
+
+from audio_cache import normalize_text
+
+DEFAULT_DB_PATH = os.path.join(os.path.expanduser("~"), ".cache", "audiolibros", "translations.sqlite3")
+
+# SQLite limita el número de parámetros por consulta
+_MAX_PARAMS = 900
+
+
+def segment_key(text, backend=None):
+    payload = normalize_text(text)
+    if backend:
+        # Cada backend traduce distinto (el falso ni siquiera traduce): no comparten entradas
+        payload = f"{backend}\n{payload}"
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class TranslationMemory:
+    """Memoria de traducción local en SQLite, indexada por hash del segmento e idioma destino.
+
+    Con `backend` el nombre del backend de traducción entra en el hash, así que
+    lo que devolvió un backend nunca se sirve como traducción de otro.
+    """
+
+    def __init__(self, db_path=None, backend=None):
+        self.db_path = db_path or DEFAULT_DB_PATH
+        self.backend = backend
+        os.makedirs(os.path.dirname(os.path.abspath(self.db_path)), exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(self.db_path, timeout=30, check_same_thread=False)
+        with self._conn:
+            # WAL permite que varios procesos lean mientras otro escribe
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS translations ("
+                " key TEXT NOT NULL,"
+                " target TEXT NOT NULL,"
+                " translation TEXT NOT NULL,"
+                " created REAL NOT NULL,"
+                " PRIMARY KEY (key, target))"
+            )
+        self.hits = 0
+        self.misses = 0
+        self.chars_hit = 0
+        self.chars_missed = 0
+
+    def get(self, text, target):
+        return self.get_many([text], target).get(text)
+
+    def get_many(self, texts, target):
+        """Busca muchos segmentos a la vez. Devuelve {texto: traducción} con los encontrados."""
+        keys = {}
+        for text in texts:
+            keys.setdefault(segment_key(text, self.backend), []).append(text)
+        unique_keys = list(keys)
+        found = {}
+        with self._lock:
+            for i in range(0, len(unique_keys), _MAX_PARAMS):
+                batch = unique_keys[i:i + _MAX_PARAMS]
+                placeholders = ",".join("?" * len(batch))
+                rows = self._conn.execute(
+                    f"SELECT key, translation FROM translations WHERE target = ? AND key IN ({placeholders})",
+                    [target] + batch,
+                ).fetchall()
+                for key, translation in rows:
+                    for text in keys[key]:
+                        found[text] = translation
+            for text in texts:
+                if text in found:
+                    self.hits += 1
+                    self.chars_hit += len(text)
+                else:
+                    self.misses += 1
+                    self.chars_missed += len(text)
+        return found
+
+    def put(self, text, target, translation):
+        self.put_many([(text, translation)], target)
+
+    def put_many(self, pairs, target):
+        now = time.time()
+        rows = [(segment_key(text, self.backend), target, translation, now) for text, translation in pairs]
+        with self._lock, self._conn:
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO translations (key, target, translation, created) VALUES (?, ?, ?, ?)",
+                rows,
+            )
+
+    def stats(self):
+        with self._lock:
+            total_chars = self.chars_hit + self.chars_missed
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "chars_hit": self.chars_hit,
+                "chars_missed": self.chars_missed,
+                "hit_ratio": self.chars_hit / total_chars if total_chars else 0.0,
+            }
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
@@ -0,0 +1,52 @@
+import asyncio
+
+DEFAULT_VOICE = "es-ES-AlvaroNeural"
+# Ajustes que acepta edge_tts.Communicate; forman parte de la clave de la caché
+DEFAULT_TTS_SETTINGS = {"rate": "+0%", "volume": "+0%", "pitch": "+0Hz"}
+
+
+class SynthesisEngine:
+    """Sintetiza muchos chunks a la vez dentro de un único event loop."""
+
+    def __init__(self, synthesize, concurrency=8):
+        # `synthesize` es una corrutina con la firma (text, output_file)
+        self.synthesize = synthesize
+        self.concurrency = max(1, int(concurrency))
+
+    async def synthesize_all(self, chunks, output_files, on_chunk_done=None):
+        """Sintetiza todos los chunks respetando el límite de concurrencia.
+
+        Devuelve los archivos de salida en el orden original de los chunks.
+        `on_chunk_done(index, output_file, completed, total)` se llama cada vez
+        que termina un chunk, en el orden en que van terminando.
+        """
+        if len(chunks) != len(output_files):
+            raise ValueError("Debe haber un archivo de salida por cada chunk")
+
+        semaphore = asyncio.Semaphore(self.concurrency)
+        total = len(chunks)
+        completed = 0
+
+        async def worker(index):
+            async with semaphore:
+                await self.synthesize(chunks[index], output_files[index])
+            return index
+
+        tasks = [asyncio.ensure_future(worker(i)) for i in range(total)]
+        try:
+            for future in asyncio.as_completed(tasks):
+                index = await future
+                completed += 1
+                if on_chunk_done:
+                    on_chunk_done(index, output_files[index], completed, total)
+        except BaseException:
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+            raise
+
+        return list(output_files)
+
+    def run(self, chunks, output_files, on_chunk_done=None):
+        """Punto de entrada síncrono: un solo `asyncio.run` para todo el libro."""
+        return asyncio.run(self.synthesize_all(chunks, output_files, on_chunk_done))